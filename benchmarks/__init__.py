@@ -0,0 +1,5 @@
+"""
+Benchmarks of the collection and parametrization performance of pytest-cases, compared with plain pytest.
+
+Run them with `python -m benchmarks.run --help`. They are not part of the distributed package.
+"""
@@ -0,0 +1,258 @@
+"""
+Generation of the synthetic test modules used by the benchmarks. For each scenario and size, two variants of the same
+test suite are generated: one relying on pytest-cases ('pytest_cases') and one relying on plain pytest ('pytest'), so
+that the overhead of pytest-cases can be measured.
+"""
+from __future__ import division
+
+import os
+
+try:  # type hints, python 3+
+    from typing import Callable, Dict, List, Tuple  # noqa
+except ImportError:
+    pass
+
+
+VARIANTS = ('pytest_cases', 'pytest')
+"""The variants generated for each scenario"""
+
+GENERATOR_SIZE = 10
+"""The number of cases generated by each @cases_generator function"""
+
+MARK = "pytest.mark.skipif(False, reason='never')"
+"""The pytest mark applied to the marked cases"""
+
+NB_PARAM_FIXTURES = 200
+"""The number of parameter names in the `param_fixtures` scenario"""
+
+
+def _cases_module(size  # type: int
+                  ):
+    # type: (...) -> Tuple[str, List[Tuple[str, str, int]]]
+    """
+    Returns the source of a cases module with `size` cases, and the list of (kind, function name, nb of cases) in it.
+    A quarter of the cases are generated with @cases_generator, the rest is evenly split between plain, tagged and
+    marked cases.
+    """
+    functions = []
+    nb_generated = size // 4
+    for i in range(nb_generated // GENERATOR_SIZE):
+        functions.append(('gen', GENERATOR_SIZE))
+    if nb_generated % GENERATOR_SIZE > 0:
+        functions.append(('gen', nb_generated % GENERATOR_SIZE))
+    for i in range(size - nb_generated):
+        functions.append((('plain', 'tagged', 'marked')[i % 3], 1))
+
+    lines = ["import pytest",
+             "from pytest_cases import case_tags, cases_generator",
+             ""]
+    listing = []
+    for i, (kind, nb) in enumerate(functions):
+        name = "case_%s_%s" % (kind, i)
+        lines.append("")
+        if kind == 'gen':
+            lines.append("@cases_generator('%s i={i}', i=range(%s))" % (name, nb))
+            lines.append("def %s(i):" % name)
+            lines.append("    return i, %s, None" % i)
+        else:
+            if kind == 'tagged':
+                lines.append("@case_tags('a', 'b')")
+            elif kind == 'marked':
+                lines.append("@%s" % MARK)
+            lines.append("def %s():" % name)
+            lines.append("    return %s, None, None" % i)
+        listing.append((kind, name, nb))
+
+    return '\n'.join(lines) + '\n', listing
+
+
+def _cases_data_files(size  # type: int
+                      ):
+    # type: (...) -> Dict[str, Dict[str, str]]
+    cases_src, listing = _cases_module(size)
+
+    with_cases = """import pytest
+from pytest_cases import cases_data
+
+import cases_module
+
+
+@cases_data(module=cases_module)
+def test_all(case_data):
+    case_data.get()
+
+
+@cases_data(module=cases_module, has_tag='a')
+def test_tagged(case_data):
+    case_data.get()
+"""
+
+    # the plain pytest variant: same case functions, but without the decorators, listed explicitly
+    plain_src = cases_src.replace("from pytest_cases import case_tags, cases_generator", "") \
+                         .replace("@case_tags('a', 'b')\n", "").replace("@%s\n" % MARK, "")
+    plain_src = '\n'.join(line for line in plain_src.split('\n') if not line.startswith('@cases_generator'))
+    plain_cases = []
+    for kind, name, nb in listing:
+        if kind == 'gen':
+            plain_cases.append("CASES.extend(pytest.param(partial(m.%s, i=i), id='%s i=%%s' %% i) for i in range(%s))"
+                               % (name, name, nb))
+        elif kind == 'marked':
+            plain_cases.append("CASES.append(pytest.param(m.%s, marks=%s, id='%s'))" % (name, MARK, name))
+        else:
+            plain_cases.append("CASES.append(pytest.param(m.%s, id='%s'))" % (name, name))
+            if kind == 'tagged':
+                plain_cases.append("TAGGED.append(pytest.param(m.%s, id='%s'))" % (name, name))
+
+    plain = """from functools import partial
+
+import pytest
+
+import cases_module as m
+
+CASES = []
+TAGGED = []
+%s
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_all(case):
+    case()
+
+
+@pytest.mark.parametrize('case', TAGGED)
+def test_tagged(case):
+    case()
+""" % '\n'.join(plain_cases)
+
+    return {'pytest_cases': {'cases_module.py': cases_src, 'test_benchmark.py': with_cases},
+            'pytest': {'cases_module.py': plain_src, 'test_benchmark.py': plain}}
+
+
+def _get_dimensions(size  # type: int
+                    ):
+    # type: (...) -> Tuple[int, int, int]
+    """Returns 3 dimensions of a cartesian product of about `size` elements"""
+    a = max(1, int(round(size ** (1. / 3))))
+    b = max(1, int(round((size / a) ** .5)))
+    c = max(1, int(round(size / (a * b))))
+    return a, b, c
+
+
+def _fixture_plus_files(size  # type: int
+                        ):
+    # type: (...) -> Dict[str, Dict[str, str]]
+    a, b, c = _get_dimensions(size)
+
+    with_cases = """import pytest
+from pytest_cases import pytest_fixture_plus
+
+
+@pytest_fixture_plus
+@pytest.mark.parametrize('a', range(%s))
+@pytest.mark.parametrize('b', range(%s))
+@pytest.mark.parametrize('c', [pytest.param(0, marks=%s)] + list(range(1, %s)))
+def fix(a, b, c):
+    return a + b + c
+
+
+def test_fixture(fix):
+    pass
+""" % (a, b, MARK, c)
+
+    plain = """from itertools import product
+
+import pytest
+
+PARAMS = [pytest.param(p, marks=%s) if p[2] == 0 else p for p in product(range(%s), range(%s), range(%s))]
+
+
+@pytest.fixture(params=PARAMS)
+def fix(request):
+    a, b, c = request.param
+    return a + b + c
+
+
+def test_fixture(fix):
+    pass
+""" % (MARK, a, b, c)
+
+    return {'pytest_cases': {'test_benchmark.py': with_cases},
+            'pytest': {'test_benchmark.py': plain}}
+
+
+def _param_fixtures_files(size  # type: int
+                          ):
+    # type: (...) -> Dict[str, Dict[str, str]]
+    nb_rows = max(1, size // 100)
+    names = ["p%s" % i for i in range(NB_PARAM_FIXTURES)]
+
+    rows = "[tuple(r * %s + i for i in range(%s)) for r in range(%s)]" % (NB_PARAM_FIXTURES, NB_PARAM_FIXTURES,
+                                                                          nb_rows)
+
+    with_cases = """from pytest_cases import param_fixtures
+
+%s, = param_fixtures(%r, %s)
+
+
+def test_param_fixtures(%s):
+    pass
+""" % (', '.join(names), ', '.join(names), rows, ', '.join(names))
+
+    plain = """import pytest
+
+
+@pytest.fixture(params=%s)
+def root(request):
+    return request.param
+
+
+def _create_fixture(i):
+    @pytest.fixture(name='p%%s' %% i)
+    def _fixture(root):
+        return root[i]
+    return _fixture
+
+
+for _i in range(%s):
+    globals()['p%%s_fixture' %% _i] = _create_fixture(_i)
+
+
+def test_param_fixtures(%s):
+    pass
+""" % (rows, NB_PARAM_FIXTURES, ', '.join(names))
+
+    return {'pytest_cases': {'test_benchmark.py': with_cases},
+            'pytest': {'test_benchmark.py': plain}}
+
+
+SCENARIOS = {
+    'cases_data': _cases_data_files,
+    'pytest_fixture_plus': _fixture_plus_files,
+    'param_fixtures': _param_fixtures_files,
+}  # type: Dict[str, Callable[[int], Dict[str, Dict[str, str]]]]
+"""The benchmark scenarios. For each of them, a function returning the files to generate for each variant"""
+
+
+def generate(scenario,  # type: str
+             size,      # type: int
+             root_dir   # type: str
+             ):
+    # type: (...) -> Dict[str, str]
+    """
+    Generates the test files for all variants of `scenario` with the given size, in a sub-directory of `root_dir` per
+    variant.
+
+    :param scenario: one of `SCENARIOS`
+    :param size: the approximate number of tests to generate
+    :param root_dir:
+    :return: a dictionary variant -> directory containing the test files
+    """
+    dirs = dict()
+    for variant, files in SCENARIOS[scenario](size).items():
+        variant_dir = os.path.join(root_dir, '%s_%s_%s' % (scenario, size, variant))
+        os.makedirs(variant_dir)
+        for file_name, src in files.items():
+            with open(os.path.join(variant_dir, file_name), 'w') as f:
+                f.write(src)
+        dirs[variant] = variant_dir
+    return dirs
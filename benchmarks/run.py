@@ -0,0 +1,294 @@
+"""
+Runs the benchmarks and writes the results as json, optionally comparing them with a baseline results file.
+
+    python -m benchmarks.run --sizes 10 1000 100000 --output results.json
+    python -m benchmarks.run --output new.json --baseline results.json
+
+For each scenario (see `generate.SCENARIOS`), size and variant, the generated test suite is
+
+ - collected (`pytest --collect-only`), in a separate process, to measure the collection time and peak memory,
+ - run (only for sizes up to `--max-run-size`), to measure the run time. The difference of run time between the
+   'pytest_cases' and 'pytest' variants divided by the number of tests is reported as the per-test overhead.
+
+In addition, the time per call of the wrappers created by pytest-cases is measured in the current process and compared
+with the equivalent plain functions, see `wrappers`.
+
+Each measure is repeated `--repeat` times and the minimum is kept. The first collection is also reported separately
+(`collect_time_cold`) since it is the only one that can not benefit from the pytest cache.
+"""
+from __future__ import division, print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from benchmarks.generate import generate, SCENARIOS
+from benchmarks.wrappers import measure_wrappers
+
+try:  # type hints, python 3+
+    from typing import Any, Dict, List, Optional  # noqa
+except ImportError:
+    pass
+
+
+RESULT_PREFIX = 'BENCHMARK_RESULT:'
+"""Prefix of the line containing the measures, in the output of the measuring process"""
+
+# The program executed in a separate process to measure a pytest session. Its argument is the json list of the pytest
+# command-line arguments. The collection time is measured from the session start to the end of the collection, and the
+# run time from the end of the collection to the end of the session. The peak memory is the maximum resident set size
+# of the process, in kB.
+_MEASURE_PROGRAM = """
+import json, sys
+import pytest
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+class _Measures(object):
+    nb_tests = None
+    def pytest_sessionstart(self, session):
+        self.start = perf_counter()
+    def pytest_collection_finish(self, session):
+        self.collected = perf_counter()
+        self.nb_tests = len(session.items)
+    def pytest_sessionfinish(self, session):
+        self.end = perf_counter()
+
+measures = _Measures()
+exit_code = pytest.main(json.loads(sys.argv[1]), plugins=[measures])
+
+try:
+    import resource
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_memory //= 1024
+except ImportError:
+    peak_memory = None
+
+print(%r + json.dumps(dict(exit_code=int(exit_code), nb_tests=measures.nb_tests, peak_memory_kb=peak_memory,
+                                 collect_time=measures.collected - measures.start,
+                                 run_time=measures.end - measures.collected)))
+""" % RESULT_PREFIX
+
+METRICS = ('collect_time', 'collect_time_cold', 'peak_memory_kb', 'run_time')
+"""The measures compared with the baseline"""
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+"""The root of the repository, containing the `pytest_cases` package"""
+
+
+def _get_subprocess_env():
+    # type: (...) -> Dict[str, str]
+    """
+    Returns the environment of the measuring processes: the project root is put first on the `PYTHONPATH` so that they
+    import the `pytest_cases` package of this repository, even from the temporary directory of the test suite.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (PROJECT_ROOT, env.get('PYTHONPATH', None)) if p)
+    return env
+
+
+def measure_pytest(test_dir,           # type: str
+                   collect_only=True   # type: bool
+                   ):
+    # type: (...) -> Dict[str, Any]
+    """
+    Runs pytest on `test_dir` in a separate process and returns the measures: collect_time, run_time,
+    peak_memory_kb, nb_tests.
+
+    :param test_dir:
+    :param collect_only:
+    :return:
+    """
+    args = [test_dir, '-q', '-p', 'no:warnings', '-o', 'addopts=']
+    if collect_only:
+        args.append('--collect-only')
+    out = subprocess.check_output([sys.executable, '-c', _MEASURE_PROGRAM, json.dumps(args)], cwd=test_dir,
+                                  env=_get_subprocess_env(), universal_newlines=True)
+    for line in out.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            res = json.loads(line[len(RESULT_PREFIX):])
+            if res['exit_code'] not in (0, 5):
+                raise ValueError("pytest failed on benchmark %s with exit code %s:\n%s"
+                                 % (test_dir, res['exit_code'], out))
+            return res
+    raise ValueError("Benchmark %s did not produce any result:\n%s" % (test_dir, out))
+
+
+def run_benchmark(scenario,      # type: str
+                  size,          # type: int
+                  root_dir,      # type: str
+                  repeat=3,      # type: int
+                  run=True       # type: bool
+                  ):
+    # type: (...) -> List[Dict[str, Any]]
+    """
+    Runs the benchmark of `scenario` with the given size for all variants, and returns a result entry per variant.
+
+    :param scenario:
+    :param size:
+    :param root_dir: the directory where test files will be generated
+    :param repeat: the number of times each measure is done
+    :param run: whether to run the tests in addition to collecting them
+    :return:
+    """
+    results = []
+    for variant, test_dir in sorted(generate(scenario, size, root_dir).items()):
+        collects = [measure_pytest(test_dir, collect_only=True) for _ in range(repeat)]
+        entry = dict(scenario=scenario, size=size, variant=variant,
+                     nb_tests=collects[0]['nb_tests'],
+                     collect_time=min(c['collect_time'] for c in collects),
+                     collect_time_cold=collects[0]['collect_time'],
+                     peak_memory_kb=min(c['peak_memory_kb'] for c in collects) if collects[0]['peak_memory_kb']
+                     else None,
+                     run_time=None)
+        if run:
+            entry['run_time'] = min(measure_pytest(test_dir, collect_only=False)['run_time'] for _ in range(repeat))
+        results.append(entry)
+        print("%-20s %7s %-13s %7s tests  collect: %.3fs (cold: %.3fs)  peak memory: %s kB  run: %s"
+              % (scenario, size, variant, entry['nb_tests'], entry['collect_time'], entry['collect_time_cold'],
+                 entry['peak_memory_kb'], '-' if entry['run_time'] is None else '%.3fs' % entry['run_time']))
+    return results
+
+
+def get_overheads(results  # type: List[Dict[str, Any]]
+                  ):
+    # type: (...) -> List[Dict[str, Any]]
+    """
+    Computes the overhead of the 'pytest_cases' variants compared with the 'pytest' ones, for each scenario and size.
+
+    :param results:
+    :return:
+    """
+    by_key = dict(((r['scenario'], r['size'], r['variant']), r) for r in results)
+    overheads = []
+    for (scenario, size, variant), r in sorted(by_key.items()):
+        ref = by_key.get((scenario, size, 'pytest'), None)
+        if variant == 'pytest' or ref is None:
+            continue
+        overhead = dict(scenario=scenario, size=size,
+                        collect_time_ratio=r['collect_time'] / ref['collect_time'],
+                        per_test_overhead=None)
+        if r['run_time'] is not None and ref['run_time'] is not None and r['nb_tests']:
+            overhead['per_test_overhead'] = (r['run_time'] - ref['run_time']) / r['nb_tests']
+        overheads.append(overhead)
+    return overheads
+
+
+def compare_with_baseline(report,         # type: Dict[str, Any]
+                          baseline,       # type: Dict[str, Any]
+                          tolerance=0.2   # type: float
+                          ):
+    # type: (...) -> List[Dict[str, Any]]
+    """
+    Compares the results with the baseline results, and returns the list of regressions: for each result entry and
+    metric that is more than `tolerance` (relative) above the baseline, a dictionary with the details.
+
+    :param report: the results of the current run, in the same format than the json results file
+    :param baseline: the contents of a previous results file
+    :param tolerance:
+    :return:
+    """
+    regressions = []
+    for name, w in report['wrappers'].items():
+        b = baseline.get('wrappers', {}).get(name, None)
+        if b is not None and w['pytest_cases'] / b['pytest_cases'] > 1 + tolerance:
+            regressions.append(dict(scenario='wrapper', size='-', variant=name, metric='time_per_call',
+                                    value=w['pytest_cases'], baseline=b['pytest_cases'],
+                                    ratio=w['pytest_cases'] / b['pytest_cases']))
+
+    ref = dict(((r['scenario'], r['size'], r['variant']), r) for r in baseline['results'])
+    for r in report['results']:
+        b = ref.get((r['scenario'], r['size'], r['variant']), None)
+        if b is None:
+            continue
+        for metric in METRICS:
+            if r.get(metric) is None or not b.get(metric):
+                continue
+            ratio = r[metric] / b[metric]
+            if ratio > 1 + tolerance:
+                regressions.append(dict(scenario=r['scenario'], size=r['size'], variant=r['variant'],
+                                        metric=metric, value=r[metric], baseline=b[metric], ratio=ratio))
+    return regressions
+
+
+def main(argv=None  # type: Optional[List[str]]
+         ):
+    parser = argparse.ArgumentParser(description="pytest-cases collection and parametrization benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help="the number of cases/parameters of each benchmark (default: 10 1000 100000)")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS),
+                        help="the scenarios to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="number of repetitions of each measure (default: 3)")
+    parser.add_argument('--max-run-size', type=int, default=1000,
+                        help="the tests are only run (not only collected) up to this size (default: 1000)")
+    parser.add_argument('--output', '-o', default=None, help="the json file where to write the results")
+    parser.add_argument('--baseline', default=None, help="a json results file to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative increase above the baseline considered as a regression (default: 0.2)")
+    parser.add_argument('--keep', action='store_true', help="keep the generated test files")
+    args = parser.parse_args(argv)
+
+    root_dir = tempfile.mkdtemp(prefix='pytest_cases_benchmarks_')
+    try:
+        results = []
+        for scenario in args.scenarios:
+            for size in args.sizes:
+                results += run_benchmark(scenario, size, root_dir, repeat=args.repeat,
+                                         run=size <= args.max_run_size)
+    finally:
+        if args.keep:
+            print("generated test files kept in %s" % root_dir)
+        else:
+            shutil.rmtree(root_dir, ignore_errors=True)
+
+    try:
+        from pkg_resources import get_distribution
+        pytest_cases_version = get_distribution('pytest_cases').version
+    except Exception:
+        pytest_cases_version = None
+
+    report = {
+        'environment': dict(python=platform.python_version(), platform=platform.platform(),
+                            pytest=pytest.__version__, pytest_cases=pytest_cases_version),
+        'results': results,
+        'overheads': get_overheads(results),
+        'wrappers': measure_wrappers(),
+    }
+    for o in report['overheads']:
+        print("%-20s %7s  pytest-cases/pytest collection time: x%.2f  per-test overhead: %s"
+              % (o['scenario'], o['size'], o['collect_time_ratio'],
+                 '-' if o['per_test_overhead'] is None else '%.1fus' % (o['per_test_overhead'] * 1e6)))
+    for name, w in sorted(report['wrappers'].items()):
+        print("%-20s  time per call: %.3fus (plain pytest: %.3fus)"
+              % (name, w['pytest_cases'] * 1e6, w['pytest'] * 1e6))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, tolerance=args.tolerance)
+        for r in regressions:
+            print("REGRESSION %(scenario)s %(size)s %(variant)s: %(metric)s = %(value)s (baseline: %(baseline)s, "
+                  "x%(ratio).2f)" % r)
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Micro-benchmarks of the wrappers created by pytest-cases, called in the current process: the time per call of each
+wrapper is compared with the time per call of the equivalent plain function.
+"""
+from __future__ import division
+
+from timeit import Timer
+
+import pytest
+
+from pytest_cases import pytest_fixture_plus
+from pytest_cases.main import CaseDataFromFunction
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict  # noqa
+except ImportError:
+    pass
+
+
+class _FakeRequest(object):
+    """A minimal replacement for the pytest `request` object received by fixture functions"""
+    __slots__ = 'param',
+
+    def __init__(self, param):
+        self.param = param
+
+
+def _get_fixture_function(fixture):
+    """
+    Returns the function wrapped by a pytest fixture object. Recent versions of pytest (8.4+) return a fixture
+    definition object, while older versions return the function itself.
+    """
+    get_wrapped_function = getattr(fixture, '_get_wrapped_function', None)
+    if get_wrapped_function is not None:
+        return get_wrapped_function()
+    pytest_wrapped = getattr(fixture, '__pytest_wrapped__', None)
+    return fixture if pytest_wrapped is None else pytest_wrapped.obj
+
+
+def _time_per_call(f,            # type: Callable[[], Any]
+                   number=20000  # type: int
+                   ):
+    # type: (...) -> float
+    """Returns the minimum time per call of `f` over several runs, in seconds"""
+    return min(Timer(f).repeat(repeat=5, number=number)) / number
+
+
+def case_simple():
+    return 1, 2, None
+
+
+def _case_data_get():
+    # type: (...) -> Dict[str, float]
+    """`case_data.get()` compared with calling the case function directly"""
+    case_data = CaseDataFromFunction(case_simple)
+    return dict(pytest_cases=_time_per_call(case_data.get), pytest=_time_per_call(case_simple))
+
+
+def _fixture_plus_call():
+    # type: (...) -> Dict[str, float]
+    """a `@pytest_fixture_plus` fixture with 3 stacked parametrize marks compared with a plain parametrized fixture"""
+    @pytest.mark.parametrize('a', [1, 2])
+    @pytest.mark.parametrize('b', [1, 2])
+    @pytest.mark.parametrize('c', [1, 2])
+    def fix(a, b, c):
+        return a + b + c
+
+    def plain_fix(request):
+        a, b, c = request.param
+        return a + b + c
+
+    wrapped = _get_fixture_function(pytest_fixture_plus(fix))
+    request = _FakeRequest((1, 2, 1))
+    return dict(pytest_cases=_time_per_call(lambda: wrapped(request=request)),
+                pytest=_time_per_call(lambda: plain_fix(request)))
+
+
+WRAPPERS = {
+    'case_data.get': _case_data_get,
+    'pytest_fixture_plus': _fixture_plus_call,
+}  # type: Dict[str, Callable[[], Dict[str, float]]]
+"""The micro-benchmarks. Each returns a dictionary variant -> time per call in seconds"""
+
+
+def measure_wrappers():
+    # type: (...) -> Dict[str, Dict[str, float]]
+    """
+    Runs all micro-benchmarks and returns, for each wrapper, the time per call of each variant and the overhead (the
+    difference between the 'pytest_cases' and 'pytest' variants).
+
+    :return:
+    """
+    results = dict()
+    for name, bench in sorted(WRAPPERS.items()):
+        res = bench()
+        res['overhead'] = res['pytest_cases'] - res['pytest']
+        results[name] = res
+    return results
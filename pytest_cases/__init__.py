@@ -1,4 +1,4 @@
-from pytest_cases.case_funcs import case_name, test_target, case_tags, cases_generator
+from pytest_cases.case_funcs import case_name, test_target, case_tags, cases_generator, case_cache
 try:
     # python 3.5+
     from pytest_cases.case_funcs import CaseData, Given, ExpectedNormal, ExpectedError, MultipleStepsCaseData
@@ -7,6 +7,7 @@ except ImportError:
 
 from pytest_cases.main import cases_data, CaseDataGetter, cases_fixture, pytest_fixture_plus, \
     unfold_expected_err, get_all_cases, THIS_MODULE, get_pytest_parametrize_args, param_fixtures, param_fixture
+from pytest_cases.case_sources import cases_from_files, cases_from_file, load_mmap
 
 __all__ = [
     # the 3 submodules
@@ -15,5 +16,6 @@ __all__ = [
     'cases_data', 'CaseData', 'CaseDataGetter', 'cases_fixture', 'pytest_fixture_plus',
     'unfold_expected_err', 'get_all_cases', 'get_pytest_parametrize_args', 'param_fixtures', 'param_fixture',
     'case_name', 'Given', 'ExpectedNormal', 'ExpectedError',
-    'test_target', 'case_tags', 'THIS_MODULE', 'cases_generator', 'MultipleStepsCaseData'
+    'test_target', 'case_tags', 'THIS_MODULE', 'cases_generator', 'MultipleStepsCaseData', 'case_cache',
+    'cases_from_files', 'cases_from_file', 'load_mmap'
 ]
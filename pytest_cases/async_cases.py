@@ -0,0 +1,147 @@
+"""
+Support of `async def` case functions (python 3.5+). Their data is awaited in an event loop when `CaseDataGetter.get()`
+is called (see `call_case_function`), or, with the `--cases-async-gather` option, the data of all the async cases used
+by a test function is awaited at once before its first test runs, and handed over to `get()` through a result map.
+"""
+from types import GeneratorType
+
+try:  # python 3.5+
+    from inspect import isawaitable, iscoroutinefunction
+    from pytest_cases.async_gather import run_coroutine, gather_calls
+except (ImportError, SyntaxError):
+    isawaitable = None
+    iscoroutinefunction = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, Hashable, List, Tuple  # noqa
+except ImportError:
+    pass
+
+
+NOT_GATHERED = object()
+"""Marker returned by `pop_gathered_result` when no result was gathered for a case"""
+
+_PENDING = dict()  # type: Dict[str, List[Tuple[Hashable, Callable, Dict[str, Any]]]]
+"""The async cases used by each test function, that were not gathered yet: test id -> [(case key, f, kwargs)]"""
+
+_GATHERED = dict()  # type: Dict[Hashable, List[Any]]
+"""The gathered results: for each case key, a list [is_exception, result, number of remaining users]"""
+
+_AWAITABLE_TYPES = dict()  # type: Dict[type, bool]
+"""Whether the instances of each type returned by a case function are awaitable, see `_is_awaitable`"""
+
+
+def is_async_case_function(f):
+    """Returns True if `f` is an `async def` case function"""
+    return iscoroutinefunction is not None and iscoroutinefunction(f)
+
+
+def call_case_function(f,       # type: Callable
+                       *args,
+                       **kwargs
+                       ):
+    """
+    Calls case function `f` with the provided arguments and returns its result. If `f` is an `async def` function (or
+    returns an awaitable), the result is awaited in an event loop.
+
+    :param f:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    res = f(*args, **kwargs)
+    if isawaitable is not None and _is_awaitable(res):
+        res = run_coroutine(res)
+    return res
+
+
+def _is_awaitable(res):
+    # type: (...) -> bool
+    """
+    Returns `inspect.isawaitable(res)`, remembered per type as it is much slower than calling a simple case function.
+    Generators are always checked, as only the ones created by `@types.coroutine` functions are awaitable.
+    """
+    t = type(res)
+    try:
+        return _AWAITABLE_TYPES[t]
+    except KeyError:
+        if t is GeneratorType:
+            return isawaitable(res)
+        awaitable = _AWAITABLE_TYPES[t] = isawaitable(res)
+        return awaitable
+
+
+def register_async_cases(test_id,  # type: str
+                         cases     # type: List[Tuple[Hashable, Callable, Dict[str, Any]]]
+                         ):
+    """
+    Registers the async cases used by the tests of function `test_id`, so that `gather_test_cases` awaits them all at
+    once. `cases` should contain a tuple `(case_key, case_function, case_kwargs)` for each usage of a case: the gathered
+    result is released once it has been retrieved as many times as it appears.
+
+    :param test_id: the id of the test function, see `plugin.get_test_id`
+    :param cases:
+    :return:
+    """
+    _PENDING.setdefault(test_id, []).extend(cases)
+
+
+def gather_test_cases(test_id,          # type: str
+                      max_concurrency=0  # type: int
+                      ):
+    """
+    Awaits the data of all async cases registered for the tests of function `test_id` with `asyncio.gather`, with at
+    most `max_concurrency` case functions awaited at the same time (0 for no limit). Does nothing if they were already
+    gathered. The results can then be retrieved with `pop_gathered_result`.
+
+    :param test_id:
+    :param max_concurrency:
+    :return:
+    """
+    cases = _PENDING.pop(test_id, None)
+    if not cases:
+        return
+
+    to_gather = []
+    for case_key, f, kwargs in cases:
+        entry = _GATHERED.get(case_key, None)
+        if entry is None:
+            entry = _GATHERED[case_key] = [False, None, 0]
+            to_gather.append((case_key, f, kwargs))
+        # one more user
+        entry[2] += 1
+
+    results = gather_calls([(f, kwargs) for _, f, kwargs in to_gather], max_concurrency)
+    for (case_key, _, _), res in zip(to_gather, results):
+        entry = _GATHERED[case_key]
+        entry[0] = isinstance(res, BaseException)
+        entry[1] = res
+
+
+def pop_gathered_result(case_key  # type: Hashable
+                        ):
+    """
+    Returns the gathered result for the case with key `case_key`, or raises the exception raised by the case function.
+    Returns `NOT_GATHERED` if no result was gathered for this case.
+
+    :param case_key:
+    :return:
+    """
+    entry = _GATHERED.get(case_key, None)
+    if entry is None:
+        return NOT_GATHERED
+
+    # release the result once all users have retrieved it
+    entry[2] -= 1
+    if entry[2] <= 0:
+        del _GATHERED[case_key]
+
+    if entry[0]:
+        raise entry[1]
+    return entry[1]
+
+
+def clear_async_cases():
+    """Releases all gathered results that were not used"""
+    _PENDING.clear()
+    _GATHERED.clear()
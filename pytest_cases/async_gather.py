@@ -0,0 +1,87 @@
+"""
+The parts of the support of `async def` case functions that require the python 3.5+ syntax. This module is only
+imported by `async_cases`, that provides the public functions.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:  # python 3.7+
+    from asyncio import get_running_loop
+except ImportError:
+    from asyncio import _get_running_loop as _get_loop_or_none
+
+    def get_running_loop():
+        loop = _get_loop_or_none()
+        if loop is None:
+            raise RuntimeError("no running event loop")
+        return loop
+
+try:  # type hints
+    from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple  # noqa
+except ImportError:
+    pass
+
+
+def _run_in_new_loop(awaitable  # type: Awaitable
+                     ):
+    """ Runs `awaitable` until completion in a new event loop, and returns its result """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
+def run_coroutine(awaitable  # type: Awaitable
+                  ):
+    """
+    Runs `awaitable` until completion and returns its result, or raises its exception. This can be used from
+    synchronous code only: if an event loop is already running in this thread (for example in an async test), the
+    awaitable is run in a new event loop in another thread.
+
+    :param awaitable:
+    :return:
+    """
+    try:
+        get_running_loop()
+    except RuntimeError:
+        return _run_in_new_loop(awaitable)
+    else:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(_run_in_new_loop, awaitable).result()
+
+
+async def _call_limited(semaphore,  # type: Optional[asyncio.Semaphore]
+                        f,          # type: Callable
+                        kwargs      # type: Dict[str, Any]
+                        ):
+    """ Awaits the result of async case function `f`, within the concurrency limit of `semaphore` """
+    if semaphore is None:
+        return await f(**kwargs)
+    async with semaphore:
+        return await f(**kwargs)
+
+
+async def _gather(calls,           # type: List[Tuple[Callable, Dict[str, Any]]]
+                  max_concurrency  # type: int
+                  ):
+    # note: the semaphore is created here so that it belongs to the running loop
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+    return await asyncio.gather(*(_call_limited(semaphore, f, kwargs) for f, kwargs in calls),
+                                return_exceptions=True)
+
+
+def gather_calls(calls,             # type: List[Tuple[Callable, Dict[str, Any]]]
+                 max_concurrency=0  # type: int
+                 ):
+    # type: (...) -> List[Any]
+    """
+    Calls the async case functions `f(**kwargs)` for each `(f, kwargs)` in `calls`, and awaits all their results at
+    once with `asyncio.gather`, with at most `max_concurrency` of them running at a time.
+
+    :param calls:
+    :param max_concurrency: the maximum number of case functions awaited at the same time, 0 for no limit
+    :return: the list of results, in the same order as `calls`. If a case function raised an exception, the exception
+        is returned instead of its result.
+    """
+    return run_coroutine(_gather(calls, max_concurrency))
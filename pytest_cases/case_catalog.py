@@ -0,0 +1,295 @@
+from pytest_cases.case_funcs import CASE_TAGS_FIELD
+from pytest_cases.tag_expr import compile_tag_expression, is_tag_expression
+
+try:  # type hints, python 3+
+    from typing import Callable, Dict, List, Tuple, Optional, Any  # noqa
+
+    from types import ModuleType  # noqa
+
+    from pytest_cases.tag_expr import TagExpression  # noqa
+
+    # Type hint for a catalog entry: (first line number, name in the module, case function)
+    CaseEntry = Tuple[int, str, Callable]
+except ImportError:
+    pass
+
+
+CASE_PREFIX = 'case_'
+"""Prefix used by default to identify case functions within a module"""
+
+
+def _get_code(f):
+    """
+    Returns the source code associated to function f. It is robust to wrappers such as @lru_cache
+    :param f:
+    :return:
+    """
+    if hasattr(f, '__wrapped__'):
+        return _get_code(f.__wrapped__)
+    elif hasattr(f, '__code__'):
+        return f.__code__
+    else:
+        raise ValueError("Cannot get code information for function " + str(f))
+
+
+def _iter_bits(bits  # type: int
+               ):
+    """
+    Yields the positions of the bits set in `bits`, in increasing order.
+
+    :param bits:
+    :return:
+    """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class _ModuleCatalog(object):
+    """
+    The result of a scan of a module: the list of case functions defined in it.
+    `case_names` is the list of names starting with `CASE_PREFIX` that were present in the module at the time of the
+    scan. It is used to detect that a module has changed since the scan, for example when `THIS_MODULE` is used: in
+    that case the module is scanned while it is still being imported.
+
+    The catalog also holds an index of the case tags, built the first time a selection is made. Selections are
+    represented as bitsets (python ints), where bit i is set if `entries[i]` is selected:
+
+     - `tag_index` maps each tag to the bitset of the cases having this tag,
+     - `tag_groups` maps each distinct list of tags (as a tuple) to the bitset of the cases having exactly these tags.
+       A `filter` is therefore only evaluated once per distinct list of tags, and its result is remembered in
+       `filter_results`.
+
+    Cases with tags that are not hashable can not be indexed: they are listed in `unindexed` as (tags, bit) tuples.
+    """
+    __slots__ = 'module', 'case_names', 'entries', 'tag_index', 'tag_groups', 'unindexed', 'filter_results'
+
+    def __init__(self, module, case_names, entries):
+        self.module = module
+        self.case_names = case_names
+        self.entries = entries
+        self.tag_index = None    # type: Dict[Any, int]
+        self.tag_groups = None   # type: Dict[Tuple[Any, ...], int]
+        self.unindexed = None    # type: List[Tuple[Tuple[Any, ...], int]]
+        self.filter_results = dict()
+
+    def _build_index(self):
+        """Builds the tag index, see class docstring"""
+        tag_index = dict()
+        tag_groups = dict()
+        unindexed = []
+        for i, (_, _, f) in enumerate(self.entries):
+            bit = 1 << i
+            tags = tuple(getattr(f, CASE_TAGS_FIELD, ()))
+            try:
+                tag_groups[tags] = tag_groups.get(tags, 0) | bit
+                for t in tags:
+                    tag_index[t] = tag_index.get(t, 0) | bit
+            except TypeError:
+                # some tags are not hashable
+                unindexed.append((tags, bit))
+
+        self.tag_index = tag_index
+        self.tag_groups = tag_groups
+        self.unindexed = unindexed
+
+    def get_all_bits(self):
+        # type: (...) -> int
+        """Returns the bitset selecting all cases"""
+        return (1 << len(self.entries)) - 1
+
+    def get_tag_bits(self, tag):
+        # type: (...) -> int
+        """
+        Returns the bitset of the cases having tag `tag`.
+
+        :param tag:
+        :return:
+        """
+        if self.tag_index is None:
+            self._build_index()
+
+        try:
+            bits = self.tag_index.get(tag, 0)
+        except TypeError:
+            # non-hashable tag: it can only be found in the non-indexed cases
+            bits = 0
+
+        for tags, bit in self.unindexed:
+            if tag in tags:
+                bits |= bit
+        return bits
+
+    def get_has_tag_bits(self, has_tag):
+        # type: (...) -> int
+        """
+        Returns the bitset of the cases selected by `has_tag`: the cases having this tag, or if `has_tag` is a tags
+        expression such as "a and not b" (see `tag_expr.is_tag_expression`), the cases matching it. A tag present in
+        the module always takes precedence over an expression with the same name. Strings without operators nor
+        parenthesis are always tag names: they select nothing if no case has this tag.
+
+        :param has_tag:
+        :return:
+        """
+        bits = self.get_tag_bits(has_tag)
+        if bits == 0 and is_tag_expression(has_tag):
+            bits = self.get_expression_bits(compile_tag_expression(has_tag))
+        return bits
+
+    def get_expression_bits(self, tag_expr):
+        # type: (...) -> int
+        """
+        Returns the bitset of the cases matching the compiled tags expression `tag_expr`
+
+        :param tag_expr:
+        :return:
+        """
+        return tag_expr.get_bits(self.get_tag_bits, self.get_all_bits())
+
+    def get_filter_bits(self, filter):
+        # type: (...) -> int
+        """
+        Returns the bitset of the cases for which `filter(tags)` is True, where `tags` is the list of tags of the case.
+        The result is remembered for each filter.
+
+        :param filter:
+        :return:
+        """
+        try:
+            return self.filter_results[filter]
+        except KeyError:
+            pass
+        except TypeError:
+            # non-hashable filter: do not remember the result
+            return self._compute_filter_bits(filter)
+
+        bits = self.filter_results[filter] = self._compute_filter_bits(filter)
+        return bits
+
+    def _compute_filter_bits(self, filter):
+        if self.tag_index is None:
+            self._build_index()
+
+        bits = 0
+        # note: the filter receives a new list each time, as in previous versions, so that it may modify it
+        for tags, group_bits in self.tag_groups.items():
+            if filter(list(tags)):
+                bits |= group_bits
+        for tags, bit in self.unindexed:
+            if filter(list(tags)):
+                bits |= bit
+        return bits
+
+    def select(self, bits):
+        # type: (...) -> List[CaseEntry]
+        """
+        Returns the entries selected by bitset `bits`, in catalog order
+
+        :param bits:
+        :return:
+        """
+        entries = self.entries
+        return [entries[i] for i in _iter_bits(bits)]
+
+
+_CATALOGS = dict()
+"""The catalogs of all modules scanned during this session, by module name"""
+
+
+def get_module_cases(module  # type: ModuleType
+                     ):
+    # type: (...) -> List[CaseEntry]
+    """
+    Returns the list of case functions defined in `module` (not the imported ones), as a list of
+    `(first_line_nb, name, case_function)` tuples sorted by name.
+
+    The result is computed once per module and session, and recomputed if the names in the module change (for example
+    when the module is still being imported). The case tags are indexed once per session, see `_ModuleCatalog`.
+
+    :param module:
+    :return:
+    """
+    return _get_catalog(module).entries
+
+
+def select_module_cases(module,        # type: ModuleType
+                        has_tag=None,  # type: Any
+                        filter=None,   # type: Callable[[Any], bool]
+                        tag_expr=None  # type: TagExpression
+                        ):
+    # type: (...) -> List[CaseEntry]
+    """
+    Returns the case functions defined in `module` that have tag `has_tag` (if provided), for which `filter(tags)`
+    is True (if provided), and that match the compiled tags expression `tag_expr` (if provided), in the same format
+    than `get_module_cases`. `has_tag` may also be a tags expression such as "a and not b", see `tag_expr`.
+
+    The selection relies on an index of the case tags, built once per module and session. The filter is only called
+    once per distinct set of tags, and its result is remembered for the next selections with the same filter object.
+
+    :param module:
+    :param has_tag:
+    :param filter:
+    :param tag_expr:
+    :return:
+    """
+    catalog = _get_catalog(module)
+    if has_tag is None and filter is None and tag_expr is None:
+        return catalog.entries
+
+    bits = catalog.get_all_bits()
+    if tag_expr is not None:
+        bits &= catalog.get_expression_bits(tag_expr)
+    if has_tag is not None and bits:
+        bits &= catalog.get_has_tag_bits(has_tag)
+    if filter is not None and bits:
+        bits &= catalog.get_filter_bits(filter)
+
+    return catalog.select(bits)
+
+
+def _get_catalog(module  # type: ModuleType
+                 ):
+    # type: (...) -> _ModuleCatalog
+    """
+    Returns the catalog of `module`, see `get_module_cases`
+
+    :param module:
+    :return:
+    """
+    case_names = tuple(sorted(n for n in vars(module) if n.startswith(CASE_PREFIX)))
+
+    # (1) already scanned in this session
+    catalog = _CATALOGS.get(module.__name__, None)
+    if catalog is not None and catalog.module is module and catalog.case_names == case_names:
+        return catalog
+
+    # (2) actual scan
+    entries = _scan_module(module, case_names)
+    catalog = _CATALOGS[module.__name__] = _ModuleCatalog(module, case_names, entries)
+    return catalog
+
+
+def _scan_module(module,     # type: ModuleType
+                 case_names  # type: Tuple[str, ...]
+                 ):
+    # type: (...) -> List[CaseEntry]
+    """
+    Scans the module to find all case functions in it.
+
+    :param module:
+    :param case_names: the names starting with `CASE_PREFIX` in the module, sorted
+    :return:
+    """
+    entries = []
+    for f_name in case_names:
+        f = getattr(module, f_name)
+        # only keep the functions
+        #  - from the module file (not the imported ones),
+        if callable(f):
+            code = _get_code(f)
+            # check if the function is actually defined in this module (not imported)
+            if code.co_filename == module.__file__:  # or we could use f.__module__ == module.__name__ ?
+                entries.append((code.co_firstlineno, f_name, f))
+
+    return entries
@@ -7,7 +7,8 @@ try:  # python 3.2+
 except ImportError:
     from functools32 import lru_cache as lru
 
-from itertools import product
+from pytest_cases.common import LazyProduct, SampledProduct
+from pytest_cases.covering_arrays import CoveringArray, get_strength
 
 try:  # python 3.5+
     from typing import Callable, Union, Optional, Any, Tuple, Dict, Iterable
@@ -111,19 +112,26 @@ def test_target(target  # type: Any
 test_target.__test__ = False  # disable this function in pytest (otherwise name starts with 'test' > it will appear)
 
 
+GENERATOR_STRATEGIES = ('product', 'pairwise', 'nwise', 'sample')
+"""The possible values of the `strategy` argument of `@cases_generator`"""
+
+
 @function_decorator
-def cases_generator(names=None,       # type: Union[str, Callable[[Any], str], Iterable[str]]
-                    lru_cache=False,  # type: bool,
+def cases_generator(names=None,             # type: Union[str, Callable[[Any], str], Iterable[str]]
+                    lru_cache=False,        # type: bool,
+                    strategy='product',     # type: str
+                    strategy_options=None,  # type: Dict[str, Any]
                     case_func=DECORATED,
-                    **param_ranges    # type: Iterable[Any]
+                    **param_ranges          # type: Iterable[Any]
                     ):
     """
     Decorator to declare a case function as being a cases generator. `param_ranges` should be a named list of parameter
     ranges to explore to generate the cases.
 
-    The decorator will use `itertools.product` to create a cartesian product of the named parameter ranges, and create
-    a case for each combination. When the case function will be called for a given combination, the corresponding
-    parameters will be passed to the decorated function.
+    The decorator will create a lazy cartesian product of the named parameter ranges (similar to `itertools.product`),
+    and a case for each combination. The combinations are not created in advance: each case only knows its index in the
+    product, and the corresponding parameters are computed when needed. When the case function will be called for a
+    given combination, the corresponding parameters will be passed to the decorated function.
 
     >>> @cases_generator("test with i={i}", i=range(10))
     >>> def case_10_times(i):
@@ -132,6 +140,25 @@ def cases_generator(names=None,       # type: Union[str, Callable[[Any], str], I
     >>>     outs = i+1, i+2
     >>>     return ins, outs, None
 
+    When there are many parameters, the cartesian product may be too large. Another `strategy` can then be used to only
+    generate a subset of the combinations:
+
+     - `strategy='pairwise'`: every pair of values of any two parameters appears in at least one case (covering array
+       of strength 2, see `covering_arrays`).
+     - `strategy='nwise', strategy_options=dict(strength=k)`: every combination of values of any `k` parameters
+       appears in at least one case.
+     - `strategy='sample', strategy_options=dict(n=..., seed=0)`: `n` combinations of the cartesian product drawn at
+       random, without replacement. The sample only depends on `seed`.
+
+    All strategies are deterministic, so that the same cases are generated in all runs and on all xdist workers.
+    The options of the strategies are passed in the dedicated `strategy_options` argument, so that any name can be
+    used for the parameters.
+
+    >>> @cases_generator("a={a},b={b},c={c}", strategy='pairwise', a=range(10), b=range(10), c=range(10))
+    >>> def case_pairwise(a, b, c):
+    >>>     ''' Generates about 100 cases instead of 1000 '''
+    >>>     ...
+
     :param names: a name template, that will be transformed into the case name using
         `names.format(**params)` for each case, where `params` is the dictionary of parameter values for this
         generated case. Alternately a callable returning a string can be provided, in which case
@@ -140,16 +167,74 @@ def cases_generator(names=None,       # type: Union[str, Callable[[Any], str], I
     :param lru_cache: a boolean (default False) indicating if the generated cases should be cached. This is identical
         to decorating the function with an additional `@lru_cache(maxsize=n)` where n is the total number of generated
         cases.
+    :param strategy: how the parameter values are combined: 'product' (default), 'pairwise', 'nwise' or 'sample'.
+    :param strategy_options: an optional dictionary of options for the `strategy`: `strength` for 'nwise' (required),
+        `n` (required) and `seed` for 'sample'.
     :param param_ranges: named parameters and for each of them the list of values to be used to generate cases. For
-        each combination of values (a cartesian product is made) the parameters will be passed to the underlying
-        function so they should have names the underlying function can handle.
+        each combination of values (a cartesian product is made, unless another `strategy` is used) the parameters will
+        be passed to the underlying function so they should have names the underlying function can handle.
     :return:
     """
-    kwarg_values = list(product(*param_ranges.values()))
-    setattr(case_func, _GENERATOR_FIELD, (names, param_ranges.keys(), kwarg_values))
+    options = dict(strategy_options) if strategy_options is not None else dict()
+    if strategy == 'sample':
+        try:
+            nb_samples = options.pop('n')
+        except KeyError:
+            raise ValueError("`strategy_options=dict(n=...)` should be provided with strategy='sample'")
+        seed = options.pop('seed', 0)
+    elif strategy in GENERATOR_STRATEGIES:
+        strength = get_strength(strategy, options.pop('strength', None))
+    else:
+        raise ValueError("Invalid `strategy` %r, it should be one of %s" % (strategy, GENERATOR_STRATEGIES))
+    if len(options) > 0:
+        raise ValueError("Invalid `strategy_options` for strategy %r: %s" % (strategy, ', '.join(sorted(options))))
+
+    param_names = tuple(param_ranges.keys())
+    if strategy == 'sample':
+        kwarg_values = SampledProduct([param_ranges[n] for n in param_names], nb_samples, seed=seed)
+    elif strength is None:
+        kwarg_values = LazyProduct(*(param_ranges[n] for n in param_names))
+    else:
+        kwarg_values = CoveringArray([param_ranges[n] for n in param_names], strength)
+
+    setattr(case_func, _GENERATOR_FIELD, (names, param_names, kwarg_values))
     if lru_cache:
         nb_cases = len(kwarg_values)
         # decorate the function with the appropriate lru cache size
         case_func = lru(maxsize=nb_cases)(case_func)
 
     return case_func
+
+
+CASE_CACHE_FIELD = '__case_cache__'
+"""Internal marker used for cases decorated with @case_cache. Its value is the `persist` option"""
+
+
+@function_decorator
+def case_cache(persist=False,     # type: bool
+               case_func=DECORATED
+               ):
+    """
+    Decorator to declare that the results of a case function should be cached. The cache is used when
+    `case_data.get()` is called without arguments, and is keyed on the case function and its generated parameters
+    if it is a cases generator (see `@cases_generator`).
+
+    ```python
+    @case_cache(persist=True)
+    def case_big_dataset():
+        ...
+    ```
+
+    With `persist=False` (default) the results are cached in memory for the whole session. With `persist=True` they are
+    stored in the pytest cache directory and reused across sessions: the cache key is a hash of the case function code
+    object, default values, closure contents and generated parameters, so the result is computed again when the case
+    function changes. Note that modifications in other functions called by the case function are not detected: use
+    `pytest --cache-clear` in that case. Large numpy arrays in the results are stored in separate `.npy` files and are
+    memory-mapped (read-only) when loaded.
+
+    :param persist: a boolean (default False) indicating if the results should be persisted in the pytest cache
+        directory and reused across sessions.
+    :return:
+    """
+    setattr(case_func, CASE_CACHE_FIELD, persist)
+    return case_func
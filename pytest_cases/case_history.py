@@ -0,0 +1,284 @@
+"""
+History of the cases durations and outcomes across sessions, stored in the pytest cache. It is recorded by the plugin
+(see `plugin.pytest_runtest_logreport`) when an option uses it (see `enable_history`), and used to run the recently
+failed and the slowest cases first (`--cases-order=history`), or to balance the shards (see `sharding`).
+
+For each case id (see `case_stats.get_case_id`) the history contains
+
+ - the total duration of the tests using the case, and the number of these tests, in the last session where the case
+   was used,
+ - the number of the last session where a test using the case failed, if any,
+ - the number of the last session where the case was used.
+
+With pytest-xdist, each worker records the results of the tests that it runs and merges them in the history at the end
+of the session (see `save_history`), under the session number chosen by the controller (see `get_next_run`).
+"""
+import os
+from contextlib import contextmanager
+
+try:  # POSIX
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:  # type hints, python 3+
+    from typing import Any, Dict, Iterable, List, Optional, Tuple  # noqa
+except ImportError:
+    pass
+
+
+HISTORY_CACHE_KEY = 'pytest_cases/history'
+"""The key of the cases history in the pytest cache"""
+
+RECENT_RUNS = 5
+"""A failure is considered recent if it happened in one of the last `RECENT_RUNS` sessions"""
+
+MAX_UNSEEN_RUNS = 20
+"""The cases that were not used in the last `MAX_UNSEEN_RUNS` sessions are removed from the history"""
+
+_ENABLED = False
+"""Whether the history is loaded and recorded, see `enable_history`"""
+
+_RUN = 0
+"""The number of sessions recorded in the history"""
+
+_HISTORY = dict()  # type: Dict[str, List[Any]]
+"""The history loaded from the cache: case id -> [total duration, number of tests, last failed session or None,
+last session]."""
+
+_SESSION = dict()  # type: Dict[str, List[Any]]
+"""The durations and outcomes recorded in the current session: case id -> [total duration, number of tests, failed]"""
+
+
+def enable_history(enabled=True  # type: bool
+                   ):
+    """
+    Enables or disables the recording of the cases history. Disabling also forgets the history loaded and the results
+    recorded in the current session.
+
+    :param enabled:
+    :return:
+    """
+    global _ENABLED
+    _ENABLED = enabled
+    if not enabled:
+        clear_history()
+
+
+def is_history_enabled():
+    # type: (...) -> bool
+    """Returns True if the cases history is recorded, see `enable_history`"""
+    return _ENABLED
+
+
+def load_history(cache):
+    """
+    Loads the cases history from the pytest cache. Does nothing if `cache` is None.
+
+    :param cache: the pytest cache (`config.cache`) or None
+    :return:
+    """
+    global _RUN
+    if cache is None:
+        return
+    stored = cache.get(HISTORY_CACHE_KEY, None)
+    if stored is None:
+        return
+    try:
+        _RUN = int(stored['run'])
+        _HISTORY.update((case_id, list(h)) for case_id, h in stored['cases'].items())
+    except (KeyError, TypeError, ValueError, AttributeError):
+        # corrupted or old format: ignore it
+        _RUN = 0
+        _HISTORY.clear()
+
+
+def get_next_run():
+    # type: (...) -> int
+    """Returns the number of the current session in the history, see `save_history`"""
+    return _RUN + 1
+
+
+def save_history(cache,
+                 run=None  # type: int
+                 ):
+    """
+    Merges the results of the current session in the history, and stores it in the pytest cache. Does nothing if
+    `cache` is None or if nothing was recorded during the session.
+
+    When several processes record the results of the same session (the pytest-xdist workers), they should all provide
+    the same session number `run` (see `get_next_run`). The history is then read again from the cache while holding a
+    lock, so that the results saved by the other processes are kept: the durations of a case used in several processes
+    are added.
+
+    :param cache: the pytest cache (`config.cache`) or None
+    :param run: the number of the current session, when it is recorded by several processes. By default the session
+        following the one of the loaded history.
+    :return:
+    """
+    global _RUN
+    if cache is None or len(_SESSION) == 0:
+        return
+
+    if run is None:
+        _RUN += 1
+        _merge_session(_RUN)
+        cache.set(HISTORY_CACHE_KEY, {'run': _RUN, 'cases': _HISTORY})
+    else:
+        with _history_lock(cache):
+            # reload the history, that may have been updated by another process for the same session
+            _HISTORY.clear()
+            load_history(cache)
+            _RUN = max(_RUN, run)
+            _merge_session(run)
+            cache.set(HISTORY_CACHE_KEY, {'run': _RUN, 'cases': _HISTORY})
+    _SESSION.clear()
+
+
+def _merge_session(run  # type: int
+                   ):
+    """
+    Merges the results recorded in the current session in the history, as the results of session `run`. The cases that
+    were not used in the last `MAX_UNSEEN_RUNS` sessions are removed.
+    """
+    for case_id, (total, nb, failed) in _SESSION.items():
+        h = _HISTORY.get(case_id, None)
+        if h is not None and h[3] == run:
+            # already recorded by another process during this session
+            total += h[0]
+            nb += h[1]
+        last_failed = run if failed else (h[2] if h is not None else None)
+        _HISTORY[case_id] = [total, nb, last_failed, run]
+
+    for case_id in [c for c, h in _HISTORY.items() if run - h[3] >= MAX_UNSEEN_RUNS]:
+        del _HISTORY[case_id]
+
+
+@contextmanager
+def _history_lock(cache):
+    """
+    An exclusive lock shared by all processes using the pytest cache directory of `cache`, if possible (POSIX systems,
+    pytest cache with a `mkdir` or `makedir` method). Otherwise no lock is taken.
+    """
+    mkdir = getattr(cache, 'mkdir', None) or getattr(cache, 'makedir', None)
+    if fcntl is None or mkdir is None:
+        yield
+        return
+
+    with open(os.path.join(str(mkdir('pytest_cases')), 'history.lock'), 'w') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def clear_history():
+    """Forgets the history loaded and the results recorded in the current session"""
+    global _RUN
+    _RUN = 0
+    _HISTORY.clear()
+    _SESSION.clear()
+
+
+def record_case_result(case_id,  # type: str
+                       duration,  # type: float
+                       failed     # type: bool
+                       ):
+    """
+    Records the duration and outcome of a test phase using case `case_id`, in the current session.
+
+    :param case_id:
+    :param duration: the duration of the phase, or 0 if it should not be accounted (setup or teardown)
+    :param failed: True if the phase failed
+    :return:
+    """
+    try:
+        s = _SESSION[case_id]
+    except KeyError:
+        _SESSION[case_id] = [duration, 1 if duration > 0 else 0, failed]
+    else:
+        s[0] += duration
+        if duration > 0:
+            s[1] += 1
+        s[2] = s[2] or failed
+
+
+def get_case_total_duration(case_id,  # type: str
+                            default=None  # type: Optional[float]
+                            ):
+    # type: (...) -> Optional[float]
+    """
+    Returns the total duration of the tests using case `case_id` in the last session where it was used, or `default`
+    if the case has no history.
+
+    :param case_id:
+    :param default:
+    :return:
+    """
+    h = _HISTORY.get(case_id, None)
+    return default if h is None else h[0]
+
+
+def get_case_mean_duration(case_id,  # type: str
+                           default=None  # type: Optional[float]
+                           ):
+    # type: (...) -> Optional[float]
+    """
+    Returns the mean duration of a test using case `case_id` in the last session where it was used, or `default` if
+    the case has no history.
+
+    :param case_id:
+    :param default:
+    :return:
+    """
+    h = _HISTORY.get(case_id, None)
+    return default if h is None or h[1] == 0 else h[0] / h[1]
+
+
+def get_runs_since_failure(case_id  # type: str
+                           ):
+    # type: (...) -> Optional[int]
+    """
+    Returns the number of sessions since the last failure of a test using case `case_id` (0 for the last recorded
+    session), or None if it never failed.
+
+    :param case_id:
+    :return:
+    """
+    h = _HISTORY.get(case_id, None)
+    return None if h is None or h[2] is None else _RUN - h[2]
+
+
+def get_history_sort_key(case_ids  # type: Iterable[str]
+                         ):
+    # type: (...) -> Tuple[int, int, float]
+    """
+    Returns the sort key of a test using the given cases, so that tests are sorted in this order:
+
+     - tests using a recently failed case (see `RECENT_RUNS`), the most recent failures first,
+     - tests using a case without history,
+     - the other tests, longest first.
+
+    :param case_ids:
+    :return:
+    """
+    since_failure = None
+    duration = 0.
+    no_history = False
+    for case_id in case_ids:
+        runs = get_runs_since_failure(case_id)
+        if runs is not None and runs < RECENT_RUNS and (since_failure is None or runs < since_failure):
+            since_failure = runs
+        d = get_case_mean_duration(case_id)
+        if d is None:
+            no_history = True
+        else:
+            duration = max(duration, d)
+
+    if since_failure is not None:
+        return 0, since_failure, -duration
+    elif no_history:
+        return 1, 0, 0.
+    else:
+        return 2, 0, -duration
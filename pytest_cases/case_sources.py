@@ -0,0 +1,320 @@
+"""
+Built-in case data sources:
+
+ - `cases_from_files`: a case for each data file in a directory, whose contents are exposed as read-only memory maps.
+   The operating system loads the pages of a memory-mapped file when they are read, and keeps them in its page cache:
+   tests and xdist worker processes using the same file share a single copy of its data, instead of each loading their
+   own.
+ - `cases_from_file`: a case for each row of a JSON lines or CSV file. The file is indexed once (the byte offsets of
+   each row), and each row is read and parsed when the data of its case is retrieved.
+"""
+import csv
+import io
+import json
+import mmap
+import os
+from array import array
+from glob import glob
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, List, Optional, Tuple, Union  # noqa
+except ImportError:
+    pass
+
+from pytest_cases.case_funcs import cases_generator
+from pytest_cases.common import lazy_range
+
+
+def load_mmap(path,        # type: str
+              dtype=None,  # type: Any
+              shape=None,  # type: Union[int, Tuple[int, ...]]
+              offset=0     # type: int
+              ):
+    """
+    Returns the contents of a file as a read-only memory map, without reading it: the data is loaded by the operating
+    system when it is accessed.
+
+     - `.npy` files are opened with `numpy.load(path, mmap_mode='r')`: `dtype`, `shape` and `offset` are read from the
+       file header and should not be provided.
+     - other files are raw binary data: they are opened as a `numpy.memmap` of the given `dtype` (default `uint8`) and
+       `shape` (default: the whole file), starting at byte `offset`. If numpy is not installed, a read-only
+       `memoryview` of the file bytes is returned, and `dtype` and `shape` can not be used.
+
+    Writing to the returned array or buffer raises an error.
+
+    :param path: the path of the file
+    :param dtype: the type of the values in a raw binary file
+    :param shape: the shape of the array in a raw binary file
+    :param offset: the position of the first value in a raw binary file, in bytes
+    :return: a read-only `numpy.ndarray` (a `numpy.memmap` for raw files), or a `memoryview` if numpy is not installed
+    """
+    if path.endswith('.npy'):
+        if dtype is not None or shape is not None or offset != 0:
+            raise ValueError("`dtype`, `shape` and `offset` are read from the header of .npy files: they can not be "
+                             "provided for %r" % path)
+        if np is None:
+            raise ImportError("numpy is required to memory-map .npy file %r" % path)
+        return np.load(path, mmap_mode='r')
+
+    if np is not None:
+        return np.memmap(path, dtype=dtype if dtype is not None else np.uint8, mode='r', offset=offset, shape=shape)
+
+    if dtype is not None or shape is not None:
+        raise ImportError("numpy is required to use `dtype` or `shape` to memory-map file %r" % path)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return memoryview(b'')
+        # the memory map stays valid after the file is closed
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))[offset:]
+
+
+def cases_from_files(directory,                   # type: str
+                     pattern='*',                 # type: str
+                     dtype=None,                  # type: Any
+                     shape=None,                  # type: Union[int, Tuple[int, ...]]
+                     offset=0,                    # type: int
+                     name_template='{file_name}'  # type: str
+                     ):
+    # type: (...) -> Callable
+    """
+    Creates a cases generator with one case for each file in `directory` matching the glob `pattern`, in alphabetical
+    order. The case data of each file is `(data, None, None)`, where `data` is the read-only memory map of the file
+    returned by `load_mmap(path, dtype, shape, offset)`. Use it with the `cases` argument of `@cases_data`:
+
+    ```python
+    from pytest_cases import cases_data, cases_from_files
+
+    @cases_data(cases=cases_from_files('data/', '*.npy'))
+    def test_foo(case_data):
+        arr, _, _ = case_data.get()
+        ...
+    ```
+
+    The directory is listed when this function is called, and each case only holds the name of its file: the files
+    are memory-mapped when `case_data.get()` is called. Memory maps do not hold a copy of the data, so there is no need
+    to prefetch or memoize these cases.
+
+    :param directory: the directory containing the data files
+    :param pattern: a glob pattern selecting the files in `directory`, for example '*.npy' or 'inputs_*.bin'
+    :param dtype: the type of the values in raw binary files, see `load_mmap`
+    :param shape: the shape of the arrays in raw binary files, see `load_mmap`
+    :param offset: the position of the first value in raw binary files, in bytes, see `load_mmap`
+    :param name_template: the template of the case names, where '{file_name}' is replaced with the file path relative
+        to `directory`
+    :return: a cases generator function
+    """
+    directory = os.path.abspath(directory)
+    file_names = sorted(os.path.relpath(p, directory) for p in glob(os.path.join(directory, pattern))
+                        if os.path.isfile(p))
+
+    def case_file(file_name):
+        return load_mmap(os.path.join(directory, file_name), dtype=dtype, shape=shape, offset=offset), None, None
+
+    return cases_generator(name_template, file_name=file_names)(case_file)
+
+
+try:  # python 3.3+
+    array('q')
+    _OFFSET_TYPECODE = 'q'
+except ValueError:
+    # python 2: 'l' is 64 bits on most platforms
+    _OFFSET_TYPECODE = 'l'
+
+
+FILE_FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+"""The file formats supported by `cases_from_file`, by file extension"""
+
+
+class _RowsIndex(object):
+    """
+    The index of the rows of a JSON lines or CSV file: the byte offsets of the start and end of each row, stored in
+    compact arrays, and optionally the value of an id field in each row. Empty lines are ignored. In CSV files the
+    first row contains the field names, and rows may span several lines when they contain quoted line breaks.
+    """
+    __slots__ = 'path', 'file_format', 'starts', 'ends', 'field_names', 'ids'
+
+    def __init__(self, path,       # type: str
+                 file_format,      # type: str
+                 id_field=None     # type: str
+                 ):
+        self.path = path
+        self.file_format = file_format
+        self.starts = array(_OFFSET_TYPECODE)
+        self.ends = array(_OFFSET_TYPECODE)
+        self.field_names = None  # type: Optional[List[str]]
+        self.ids = None if id_field is None else []  # type: Optional[List[str]]
+
+        is_csv = file_format == 'csv'
+        id_column = None
+        with open(path, 'rb') as f:
+            position = 0
+            row_start = None
+            row_lines = []
+            in_quotes = False
+            for line in f:
+                line_start, position = position, position + len(line)
+                if row_start is None:
+                    if len(line.strip()) == 0:
+                        continue
+                    row_start = line_start
+                row_lines.append(line)
+                if is_csv:
+                    # a quoted field containing a line break continues on the next line
+                    in_quotes ^= line.count(b'"') % 2 == 1
+                    if in_quotes:
+                        continue
+                    if self.field_names is None:
+                        self.field_names = self._parse(b''.join(row_lines))
+                        if id_field is not None:
+                            try:
+                                id_column = self.field_names.index(id_field)
+                            except ValueError:
+                                raise ValueError("File %r has no field %r" % (path, id_field))
+                        row_start = None
+                        row_lines = []
+                        continue
+                if id_field is not None:
+                    # only the id is kept: for CSV files, a list of values is parsed but no dictionary is created
+                    row = self._parse(b''.join(row_lines))
+                    field = id_column if is_csv else id_field
+                    self.ids.append(str(_get_field(row, field, path, len(self.starts), id_field)))
+                self.starts.append(row_start)
+                self.ends.append(position)
+                row_start = None
+                row_lines = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _parse(self, data  # type: bytes
+               ):
+        """ Parses the bytes of a row: a JSON value, or a list of values (strings) for CSV files """
+        text = data.decode('utf-8')
+        if self.file_format == 'jsonl':
+            return json.loads(text)
+        else:
+            return next(csv.reader(io.StringIO(text)))
+
+    def read_row(self, i):
+        """
+        Reads and parses row `i`: a JSON value, or a dictionary of field values (strings) for CSV files.
+
+        :param i:
+        :return:
+        """
+        start = self.starts[i]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            row = self._parse(f.read(self.ends[i] - start))
+        if self.file_format == 'csv':
+            row = dict(zip(self.field_names, row))
+        return row
+
+
+def _get_field(row, field, path, i, field_name=None):
+    """
+    Returns the value of field `field` in row `i`, with an explicit error message if it does not exist. `field_name`
+    is the name of the field in the message, when `field` is a column index.
+    """
+    try:
+        return row[field]
+    except (KeyError, TypeError, IndexError):
+        raise ValueError("Row %s of file %r has no field %r" % (i, path, field if field_name is None else field_name))
+
+
+def cases_from_file(path,                              # type: str
+                    id_field=None,                     # type: str
+                    given_fields=None,                 # type: Union[str, List[str]]
+                    expected_field=None,               # type: str
+                    file_format=None,                  # type: str
+                    name_template='{file_name}:{row}'  # type: str
+                    ):
+    # type: (...) -> Callable
+    """
+    Creates a cases generator with one case for each row of a JSON lines (one JSON value per line) or CSV file. Use it
+    with the `cases` argument of `@cases_data`:
+
+    ```python
+    from pytest_cases import cases_data, cases_from_file
+
+    @cases_data(cases=cases_from_file('vectors.jsonl', id_field='name', expected_field='result'))
+    def test_foo(case_data):
+        inputs, expected, _ = case_data.get()
+        ...
+    ```
+
+    The file is read once when this function is called, to store the byte offsets of each row. Each row is then read
+    and parsed when the data of its case is retrieved with `case_data.get()`, so that the memory used during
+    collection does not depend on the size of the rows. The file should not be modified during the session.
+
+    Note that the case names are needed during collection: if `id_field` is provided, every row is parsed once when
+    this function is called, to extract the value of this field (the other values are not kept). For large JSON lines
+    files, prefer the default names (`name_template`), that do not require to parse the rows.
+
+    The case data of each row is `(given, expected, None)`, where `expected` is the value of `expected_field` (None if
+    it is not provided), and `given` is the row without its id and expected fields, or the value(s) of `given_fields`.
+    The rows of JSON lines files should be JSON objects, unless `id_field`, `given_fields` and `expected_field` are
+    all None: `given` is then the JSON value of the row. The values of CSV files are strings.
+
+    :param path: the path of the file
+    :param id_field: an optional field containing the case names. By default the cases are named after
+        `name_template`.
+    :param given_fields: an optional field name or list of field names for the `given` part of the case data. If a
+        single field name is provided, `given` is the value of this field, otherwise it is a dictionary.
+    :param expected_field: an optional field containing the expected result
+    :param file_format: 'jsonl' or 'csv'. By default it is determined from the file extension (.jsonl, .ndjson, .csv)
+    :param name_template: the template of the case names when `id_field` is None, where '{file_name}' is replaced with
+        the file name and '{row}' with the index of the row (0-based, not counting the CSV header and empty lines).
+    :return: a cases generator function
+    """
+    if file_format is None:
+        try:
+            file_format = FILE_FORMATS[os.path.splitext(path)[1].lower()]
+        except KeyError:
+            raise ValueError("Unable to determine the format of file %r from its extension, please provide "
+                             "`file_format` ('jsonl' or 'csv')" % path)
+    elif file_format not in ('jsonl', 'csv'):
+        raise ValueError("Invalid `file_format` %r, it should be 'jsonl' or 'csv'" % file_format)
+
+    path = os.path.abspath(path)
+    rows_index = _RowsIndex(path, file_format, id_field)
+
+    if id_field is not None:
+        # the names are needed for collection: they are read with the index, and are the only data stored for each row
+        names = rows_index.ids
+    else:
+        file_name = os.path.basename(path)
+
+        def names(row):
+            return name_template.format(file_name=file_name, row=row)
+
+    excluded_fields = tuple(f for f in (id_field, expected_field) if f is not None)
+
+    def case_row(row):
+        data = rows_index.read_row(row)
+        expected = _get_field(data, expected_field, path, row) if expected_field is not None else None
+        if given_fields is None:
+            if len(excluded_fields) > 0 or file_format == 'csv':
+                given = dict((k, v) for k, v in _get_items(data, path, row) if k not in excluded_fields)
+            else:
+                given = data
+        elif isinstance(given_fields, str):
+            given = _get_field(data, given_fields, path, row)
+        else:
+            given = dict((f, _get_field(data, f, path, row)) for f in given_fields)
+        return given, expected, None
+
+    return cases_generator(names, row=lazy_range(len(rows_index)))(case_row)
+
+
+def _get_items(row, path, i):
+    """ Returns the (field, value) items of row `i`, with an explicit error message if it is not an object """
+    try:
+        return row.items()
+    except AttributeError:
+        raise ValueError("Row %s of file %r is not an object" % (i, path))
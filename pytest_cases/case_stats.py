@@ -0,0 +1,154 @@
+"""
+Run-time statistics about the cases: how many cases each test uses, and how long the case getters take. They are
+enabled by the `--cases-stats` pytest command-line option and displayed in the terminal summary, see `plugin`.
+"""
+try:  # python 3.3+
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, List, Tuple  # noqa
+except ImportError:
+    pass
+
+
+_ENABLED = False
+"""Whether case getters timings are recorded"""
+
+_TIMINGS = dict()  # type: Dict[str, List[Any]]
+"""For each case, a list [number of calls to get(), total time, max time]"""
+
+_TESTS_DURATIONS = dict()  # type: Dict[str, List[Any]]
+"""For each case, a list [number of tests using the case, total duration of these tests]"""
+
+
+def enable_case_stats(enabled=True  # type: bool
+                      ):
+    """
+    Enables or disables the recording of case getters timings. Disabling also clears the recorded timings.
+
+    :param enabled:
+    :return:
+    """
+    global _ENABLED
+    _ENABLED = enabled
+    if not enabled:
+        _TIMINGS.clear()
+        _TESTS_DURATIONS.clear()
+
+
+def is_case_stats_enabled():
+    # type: (...) -> bool
+    """Returns True if case getters timings should be recorded, see `timed_get`"""
+    return _ENABLED
+
+
+def get_case_id(case_getter  # type: Any
+                ):
+    # type: (...) -> str
+    """
+    Returns the identifier of a case in the statistics: '<module of the case function>::<case name>'
+
+    :param case_getter: a `CaseDataFromFunction`
+    :return:
+    """
+    return "%s::%s" % (getattr(case_getter.f, '__module__', None), case_getter)
+
+
+def timed_get(case_id,  # type: str
+              get,      # type: Callable[..., Any]
+              *args,
+              **kwargs):
+    """
+    Calls `get(*args, **kwargs)` and records its duration for case `case_id`, even if it raises an exception.
+
+    :param case_id:
+    :param get:
+    :return:
+    """
+    start = perf_counter()
+    try:
+        return get(*args, **kwargs)
+    finally:
+        duration = perf_counter() - start
+        try:
+            t = _TIMINGS[case_id]
+        except KeyError:
+            _TIMINGS[case_id] = [1, duration, duration]
+        else:
+            t[0] += 1
+            t[1] += duration
+            if duration > t[2]:
+                t[2] = duration
+
+
+def get_slowest_cases(n=None  # type: int
+                      ):
+    # type: (...) -> List[Tuple[str, int, float, float]]
+    """
+    Returns the `n` cases for which the getters took the longest total time, as a list of tuples
+    `(case_id, nb_calls, total_time, max_time)` sorted by decreasing total time.
+
+    :param n: the number of cases to return, or None for all
+    :return:
+    """
+    timings = sorted(((case_id, calls, total, max_t) for case_id, (calls, total, max_t) in _TIMINGS.items()),
+                     key=lambda t: t[2], reverse=True)
+    return timings if n is None else timings[:n]
+
+
+def record_test_duration(case_id,  # type: str
+                         duration  # type: float
+                         ):
+    """
+    Records the duration of a test using case `case_id`.
+
+    :param case_id:
+    :param duration:
+    :return:
+    """
+    try:
+        t = _TESTS_DURATIONS[case_id]
+    except KeyError:
+        _TESTS_DURATIONS[case_id] = [1, duration]
+    else:
+        t[0] += 1
+        t[1] += duration
+
+
+def get_slowest_tested_cases(n=None  # type: int
+                             ):
+    # type: (...) -> List[Tuple[str, int, float]]
+    """
+    Returns the `n` cases for which the tests using them took the longest total time, as a list of tuples
+    `(case_id, nb_tests, total_duration)` sorted by decreasing total duration.
+
+    :param n: the number of cases to return, or None for all
+    :return:
+    """
+    durations = sorted(((case_id, nb, total) for case_id, (nb, total) in _TESTS_DURATIONS.items()),
+                       key=lambda t: t[2], reverse=True)
+    return durations if n is None else durations[:n]
+
+
+class TestCasesStats(object):
+    """
+    The number of cases used by a test function (all its parametrized items): generated ones, created by a
+    `@cases_generator`, and plain ones.
+    """
+    __test__ = False  # not a test class
+    __slots__ = 'test_id', 'generated', 'plain'
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.generated = 0
+        self.plain = 0
+
+    @property
+    def total(self):
+        return self.generated + self.plain
+
+    def to_dict(self):
+        # type: (...) -> Dict[str, Any]
+        return dict(test=self.test_id, cases=self.total, generated=self.generated, plain=self.plain)
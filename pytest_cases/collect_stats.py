@@ -0,0 +1,202 @@
+"""
+Instrumentation of the collection phase: measures the time spent and the objects created by the pytest-cases
+decorators (`@cases_data`, `@cases_fixture`, `@pytest_fixture_plus`, `param_fixtures`), for each decorated test
+function or fixture. It is enabled by the `--cases-collect-stats` pytest command-line option, see `plugin`.
+
+When it is disabled, the only overhead is a test on a global variable in each instrumented function.
+"""
+from functools import wraps
+
+try:  # python 3.3+
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:  # python 3.4+
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, List, Union  # noqa
+except ImportError:
+    pass
+
+
+class CollectStats(object):
+    """
+    The collection statistics of a decorated test function or fixture:
+
+     - `wall_time`: the total time spent in the decorator, in seconds
+     - `getters`: the number of `CaseDataGetter` created
+     - `marks`: the number of parameters that were wrapped again with their pytest marks
+     - `bytes`: the memory allocated by the decorator and still in use once it returns, or None if it can not be
+       measured (`tracemalloc` is not available)
+     - `sections`: for each instrumented function or block, a list [number of calls, total time in seconds]. Note that
+       sections may be nested: for example the time of `extract_cases_from_module` is included in `get_all_cases`.
+    """
+    __slots__ = 'kind', 'name', 'wall_time', 'getters', 'marks', 'bytes', 'sections'
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.wall_time = 0.
+        self.getters = 0
+        self.marks = 0
+        self.bytes = None
+        self.sections = dict()
+
+    def __repr__(self):
+        return "CollectStats(%s %r: %.6fs, %s getters, %s marks, %s bytes)" \
+               % (self.kind, self.name, self.wall_time, self.getters, self.marks, self.bytes)
+
+    def add_section_time(self, section, duration):
+        try:
+            s = self.sections[section]
+        except KeyError:
+            self.sections[section] = [1, duration]
+        else:
+            s[0] += 1
+            s[1] += duration
+
+    def to_dict(self):
+        # type: (...) -> Dict[str, Any]
+        """Returns a json-able representation of these statistics"""
+        return dict(kind=self.kind, name=self.name, wall_time=self.wall_time, getters=self.getters,
+                    marks=self.marks, bytes=self.bytes,
+                    sections=dict((k, dict(calls=n, time=t)) for k, (n, t) in self.sections.items()))
+
+
+_ENABLED = False
+"""Whether statistics are collected"""
+
+_STARTED_TRACEMALLOC = False
+"""Whether tracemalloc was started by `enable_collect_stats`, so that it should be stopped when disabling"""
+
+_STATS = []  # type: List[CollectStats]
+"""The statistics collected so far, in order of creation"""
+
+_CURRENT = []  # type: List[CollectStats]
+"""The statistics being collected (a stack: there is at most one element, see `collect_stats`)"""
+
+
+def enable_collect_stats(enabled=True  # type: bool
+                         ):
+    """
+    Enables or disables the collection statistics. Enabling also starts `tracemalloc` if it is available and not
+    already started, so as to measure the allocated memory.
+
+    :param enabled:
+    :return:
+    """
+    global _ENABLED, _STARTED_TRACEMALLOC
+    _ENABLED = enabled
+    if enabled:
+        if tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _STARTED_TRACEMALLOC = True
+    else:
+        if _STARTED_TRACEMALLOC:
+            tracemalloc.stop()
+            _STARTED_TRACEMALLOC = False
+        del _STATS[:]
+
+
+def get_collect_stats():
+    # type: (...) -> List[CollectStats]
+    """Returns the list of statistics collected so far, one per decorated test function or fixture"""
+    return _STATS
+
+
+def _get_name(f  # type: Callable
+              ):
+    # type: (...) -> str
+    """Returns a unique name for decorated function `f`: '<module>::<qualified name>'"""
+    return "%s::%s" % (getattr(f, '__module__', None), getattr(f, '__qualname__', getattr(f, '__name__', f)))
+
+
+class collect_stats(object):
+    """
+    A context manager used by the decorators to collect statistics about decorated function `f`. It does nothing if
+    statistics are disabled. If statistics are already being collected (for example `param_fixtures` uses
+    `pytest_fixture_plus`), the nested decorator is accounted in the outer one.
+    """
+    __slots__ = 'stats', 'start', 'start_bytes'
+
+    def __init__(self,
+                 kind,  # type: str
+                 f      # type: Union[str, Callable]
+                 ):
+        """
+        :param kind: the kind of decorator, for example 'cases_data'
+        :param f: the decorated function, or the name to use in the statistics
+        """
+        if not _ENABLED or len(_CURRENT) > 0:
+            self.stats = None
+        else:
+            self.stats = CollectStats(kind, f if isinstance(f, str) else _get_name(f))
+
+    def __enter__(self):
+        if self.stats is not None:
+            _CURRENT.append(self.stats)
+            tracing = tracemalloc is not None and tracemalloc.is_tracing()
+            self.start_bytes = tracemalloc.get_traced_memory()[0] if tracing else None
+            self.start = perf_counter()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        stats = self.stats
+        if stats is not None:
+            stats.wall_time = perf_counter() - self.start
+            if self.start_bytes is not None:
+                stats.bytes = tracemalloc.get_traced_memory()[0] - self.start_bytes
+            _CURRENT.pop()
+            _STATS.append(stats)
+
+
+class timed_section(object):
+    """
+    A context manager measuring the time spent in a block, accounted in the current statistics if any.
+    It can also be used as a decorator for a whole function.
+    """
+    __slots__ = 'section', 'start'
+
+    def __init__(self, section  # type: str
+                 ):
+        self.section = section
+
+    def __enter__(self):
+        self.start = perf_counter() if len(_CURRENT) > 0 else None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.start is not None:
+            _CURRENT[-1].add_section_time(self.section, perf_counter() - self.start)
+
+    def __call__(self, f):
+        section = self.section
+
+        @wraps(f)
+        def _timed_f(*args, **kwargs):
+            if len(_CURRENT) == 0:
+                return f(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                _CURRENT[-1].add_section_time(section, perf_counter() - start)
+
+        return _timed_f
+
+
+def count_getters(n  # type: int
+                  ):
+    """Accounts `n` created case getters in the current statistics, if any"""
+    if len(_CURRENT) > 0:
+        _CURRENT[-1].getters += n
+
+
+def count_marks(n  # type: int
+                ):
+    """Accounts `n` parameters wrapped with pytest marks in the current statistics, if any"""
+    if len(_CURRENT) > 0:
+        _CURRENT[-1].marks += n
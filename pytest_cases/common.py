@@ -3,11 +3,43 @@ try:  # python 3.3+
 except ImportError:
     from funcsigs import signature
 
+try:  # python 3.3+
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+try:  # type hints, python 3+
+    from typing import Any, Dict, Iterable, Optional, Tuple  # noqa
+except ImportError:
+    pass
+
+try:  # python 3
+    from sys import intern as intern_str
+except ImportError:
+    intern_str = intern  # noqa
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:  # python 2: a lazy range
+    from __builtin__ import xrange as lazy_range
+except ImportError:
+    lazy_range = range
+
+import sys
+import weakref
 from distutils.version import LooseVersion
+from hashlib import md5
+from itertools import product
+from random import Random
 from warnings import warn
 
 import pytest
 
+from pytest_cases.covering_arrays import CoveringArray
+
 
 # Create a symbol that will work to create a fixture containing 'yield', whatever the pytest version
 # Note: if more prevision is needed, use    if LooseVersion(pytest.__version__) < LooseVersion('3.0.0')
@@ -108,11 +140,173 @@ def get_parametrize_signature():
 
 
 # ---------- test ids utils ---------
+DEFAULT_ID_MAX_LENGTH = 0
+"""The default maximum length of the ids created for parameter values and cases, see `--cases-id-max-length`. 0 means
+no limit, so that the ids are the ones of pytest unless a maximum length is set"""
+
+_ID_MAX_LENGTH = DEFAULT_ID_MAX_LENGTH
+"""The current maximum length of the ids. 0 means no limit"""
+
+_LARGE_OBJECT_SIZE = 10000
+"""When a maximum ids length is set, objects with more elements or bytes than this are not converted to string: their
+id is a content hash"""
+
+_SIMPLE_TYPES = (type(None), bool, int, float, complex) + ((long,) if sys.version_info < (3,) else ())  # noqa
+
+_IDS_CACHE = dict()  # type: Dict[int, Tuple[weakref.ref, str]]
+"""The id of each non-trivial parameter value, by identity: id(value) -> (weak reference to value, id). Entries are
+removed when their value is garbage collected, so that the cache does not keep parameter values alive. See
+`get_id_for_value`"""
+
+
+def set_id_max_length(max_length  # type: int
+                      ):
+    """
+    Sets the maximum length of the ids created for parameter values and cases. 0 means no limit. This also clears the
+    ids cache.
+
+    :param max_length:
+    :return:
+    """
+    global _ID_MAX_LENGTH
+    _ID_MAX_LENGTH = max_length
+    _IDS_CACHE.clear()
+
+
+def get_id_max_length():
+    # type: (...) -> int
+    """Returns the maximum length of the ids created for parameter values and cases, see `set_id_max_length`"""
+    return _ID_MAX_LENGTH
+
+
+def _hash_bytes(data  # type: bytes
+                ):
+    # type: (...) -> str
+    """Returns a short, stable hash of `data`"""
+    return md5(data).hexdigest()[:8]
+
+
+def _content_hash(v):
+    # type: (...) -> Optional[str]
+    """
+    Returns a short hash of the contents of `v`, or None if it can not be computed. The raw data buffer, data type and
+    shape are used for objects supporting it (numpy arrays), otherwise the pickled object.
+    """
+    try:
+        # the same buffer may hold arrays of different data types or shapes
+        data = ("%s%r" % (v.dtype.str, v.shape)).encode('utf-8') + v.tobytes()
+    except Exception:
+        try:
+            data = pickle.dumps(v, protocol=2)
+        except Exception:
+            return None
+    return _hash_bytes(data)
+
+
+def _is_large(v):
+    # type: (...) -> bool
+    """Returns True if `v` is too large to be converted to string for an id"""
+    try:
+        if v.nbytes > _LARGE_OBJECT_SIZE:
+            return True
+    except Exception:
+        pass
+    try:
+        return len(v) > _LARGE_OBJECT_SIZE
+    except Exception:
+        return False
+
+
+def cap_id(id_str  # type: str
+           ):
+    # type: (...) -> str
+    """
+    Returns `id_str` if it is not longer than the maximum ids length (see `--cases-id-max-length`), otherwise its
+    beginning followed by a short hash of the complete string, so that ids remain distinct. The result is interned.
+
+    :param id_str:
+    :return:
+    """
+    if 0 < _ID_MAX_LENGTH < len(id_str):
+        h = _hash_bytes(id_str.encode('utf-8'))
+        id_str = id_str[:max(_ID_MAX_LENGTH - len(h) - 2, 0)] + '..' + h
+    return intern_str(id_str)
+
+
+def _make_id(v):
+    # type: (...) -> str
+    """ Implementation of `get_id_for_value`, without the cache """
+    if _ID_MAX_LENGTH == 0 or not _is_large(v):
+        try:
+            return cap_id(str(v))
+        except Exception:
+            # unprintable object
+            pass
+
+    h = _content_hash(v)
+    return intern_str(type(v).__name__ if h is None else "%s#%s" % (type(v).__name__, h))
+
+
+def get_id_for_value(v):
+    # type: (...) -> str
+    """
+    The id engine used for all parameter values and cases. It returns `str(v)`, except that
+
+     - when a maximum ids length is set (see `--cases-id-max-length`), the id of large objects (more than 10000
+       elements or bytes) is `<type name>#<hash of the contents>`, so that they are never converted to string, and
+       longer ids are truncated, see `cap_id`.
+     - the id of objects that can not be converted to string is `<type name>#<hash of the contents>`.
+     - ids are interned, so that identical ids share memory, and the id of each object is cached (by identity) while
+       the object is alive, if it supports weak references.
+
+    :param v:
+    :return:
+    """
+    t = type(v)
+    if t in _SIMPLE_TYPES:
+        return str(v)
+    elif t is str:
+        return cap_id(v)
+
+    key = id(v)
+    try:
+        v_ref, id_str = _IDS_CACHE[key]
+        if v_ref() is v:
+            return id_str
+    except KeyError:
+        pass
+
+    id_str = _make_id(v)
+    try:
+        _IDS_CACHE[key] = weakref.ref(v, _get_ids_cache_cleaner(key)), id_str
+    except TypeError:
+        # objects that can not be weakly referenced (such as lists or tuples) are not cached, so as not to keep them
+        # alive
+        pass
+    return id_str
+
+
+def _get_ids_cache_cleaner(key  # type: int
+                           ):
+    """ Returns the weak reference callback removing entry `key` from the ids cache when its value is collected """
+    def _remove_entry(v_ref):
+        entry = _IDS_CACHE.get(key, None)
+        if entry is not None and entry[0] is v_ref:
+            del _IDS_CACHE[key]
+    return _remove_entry
+
+
+def clear_ids_cache():
+    """Clears the cache of `get_id_for_value`"""
+    _IDS_CACHE.clear()
+
+
 def get_test_ids_from_param_values(param_names,
                                    param_values,
                                    ):
     """
-    Replicates pytest behaviour to generate the ids when there are several parameters in a single `parametrize`
+    Replicates pytest behaviour to generate the ids when there are several parameters in a single `parametrize`.
+    The id of each value is created with `get_id_for_value`.
 
     :param param_names:
     :param param_values:
@@ -122,14 +316,14 @@ def get_test_ids_from_param_values(param_names,
     if nb_params == 0:
         raise ValueError("empty list provided")
     elif nb_params == 1:
-        paramids = list(str(v) for v in param_values)
+        paramids = list(get_id_for_value(v) for v in param_values)
     else:
         paramids = []
         for vv in param_values:
             if len(vv) != nb_params:
                 raise ValueError("Inconsistent lenghts for parameter names and values: '%s' and '%s'"
                                  "" % (param_names, vv))
-            paramids.append('-'.join([str(v) for v in vv]))
+            paramids.append(cap_id('-'.join([get_id_for_value(v) for v in vv])))
     return paramids
 
 
@@ -208,6 +402,8 @@ try:
     # check if pytest.param exists
     _ = pytest.param
 except AttributeError:
+    HAS_PYTEST_PARAM = False
+
     # if not this is how it was done
     # see e.g. https://docs.pytest.org/en/2.9.2/skipping.html?highlight=mark%20parameter#skip-xfail-with-parametrize
     def make_marked_parameter_value(c, marks):
@@ -220,6 +416,8 @@ except AttributeError:
             # decorate
             return marks_mod[0](c)
 else:
+    HAS_PYTEST_PARAM = True
+
     # Otherwise pytest.param exists, it is easier
     def make_marked_parameter_value(c, marks):
         # get a decorator for each of the markinfo
@@ -264,3 +462,261 @@ def transform_marks_into_decorators(marks):
     except Exception as e:
         warn("Caught exception while trying to mark case: [%s] %s" % (type(e), e))
     return marks_mod
+
+
+# ---- lazy cartesian products ----
+class LazyProduct(Sequence):
+    """
+    A lazy equivalent of `list(itertools.product(*ranges))`: an indexable sequence of combinations where each
+    combination is only created when it is accessed. Combinations are in the same order than with `itertools.product`
+    (the last range varies the fastest) so the index of a combination is a mixed-radix number where each digit is the
+    index of the value in the corresponding range.
+    """
+    __slots__ = 'ranges', 'sizes', '_len'
+
+    def __init__(self, *ranges):
+        # only copy the ranges that can not be indexed (generators, sets...)
+        self.ranges = tuple(r if isinstance(r, Sequence) else tuple(r) for r in ranges)
+        self.sizes = tuple(len(r) for r in self.ranges)
+        self._len = 1
+        for n in self.sizes:
+            self._len *= n
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return product(*self.ranges)
+
+    def get_indices(self, i):
+        """
+        Returns the tuple of indices (one for each range) of the values in combination `i`.
+
+        :param i: the index of a combination, from `0` to `len(self) - 1`
+        :return:
+        """
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("LazyProduct index out of range: %s" % i)
+
+        indices = [0] * len(self.sizes)
+        for k in range(len(self.sizes) - 1, -1, -1):
+            i, indices[k] = divmod(i, self.sizes[k])
+        return tuple(indices)
+
+    def __getitem__(self, i):
+        return tuple(r[j] for r, j in zip(self.ranges, self.get_indices(i)))
+
+
+class SampledProduct(Sequence):
+    """
+    A random sample of `n` combinations of a `LazyProduct`, without replacement. Only the indices of the sampled
+    combinations are stored, and they are sorted so that the combinations are in the same order than in the product.
+    The sample only depends on the `seed`, so it is identical in all runs and on all xdist workers.
+    """
+    __slots__ = 'product', 'indices'
+
+    def __init__(self, ranges,  # type: Iterable[Iterable[Any]]
+                 n,             # type: int
+                 seed=0         # type: Any
+                 ):
+        """
+
+        :param ranges: the ranges of the product
+        :param n: the number of combinations in the sample. If it is greater than the size of the product, all
+            combinations are used.
+        :param seed: the seed of the random generator
+        """
+        self.product = LazyProduct(*ranges)
+        total = len(self.product)
+        if n < 0:
+            raise ValueError("The number of sampled combinations should be positive, found %r" % n)
+        elif n >= total:
+            self.indices = lazy_range(total)
+        else:
+            self.indices = tuple(sorted(Random(seed).sample(lazy_range(total), n)))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.product[i]
+
+    def get_indices(self, i):
+        """
+        Returns the tuple of indices (one for each range) of the values in combination `i`.
+
+        :param i: the index of a combination, from `0` to `len(self) - 1`
+        :return:
+        """
+        return self.product.get_indices(self.indices[i])
+
+    def __getitem__(self, i):
+        return self.product[self.indices[i]]
+
+
+class ColumnTable(Sequence):
+    """
+    An indexable sequence of rows (tuples of values) stored column-wise: a tuple of values per column, instead of a
+    tuple per row. This is the storage used for explicit lists of parameter values combinations, so that a row only
+    exists when it is accessed.
+    """
+    __slots__ = 'columns', '_len'
+
+    def __init__(self, rows,       # type: Iterable[Tuple[Any, ...]]
+                 nb_columns=None   # type: int
+                 ):
+        """
+
+        :param rows: the rows. They should all have the same length
+        :param nb_columns: the number of columns. Only required if `rows` may be empty
+        """
+        if not isinstance(rows, Sequence):
+            rows = tuple(rows)
+        columns = tuple(zip(*rows))
+        if nb_columns is None:
+            nb_columns = len(columns)
+        elif len(rows) > 0 and len(columns) != nb_columns:
+            raise ValueError("Rows should contain %s values, found %s" % (nb_columns, len(columns)))
+        if len(columns) == 0:
+            columns = ((),) * nb_columns
+        self.columns = columns
+        self._len = len(rows)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        if len(self.columns) == 0:
+            return iter([()] * self._len)
+        return iter(zip(*self.columns))
+
+    def __getitem__(self, i):
+        return tuple(c[i] for c in self.columns)
+
+
+class LazyParamsProduct(Sequence):
+    """
+    The lazy sequence of fixture parameters passed to pytest by `@pytest_fixture_plus` when it is parametrized with
+    several `@pytest.mark.parametrize` marks: item `i` is a `pytest.param` containing combination `i` of the cartesian
+    product of the marks values (or of a covering array of the marks values if `strength` is provided), with its id
+    and marks. It is only created when it is accessed, and it is not stored.
+
+    Note that pytest creates the tuple of all parameters of a fixture as soon as it is defined: when the pytest-cases
+    plugin is active, the sequence is only passed to pytest once a test using the fixture is collected (see
+    `plugin.pytest_generate_tests`), so that fixtures that are not used do not create their parameters.
+
+    If there is a single mark, the parameter value is the value itself, not a tuple containing it.
+
+    Note: this requires `pytest.param` (pytest 3.1+)
+    """
+    __slots__ = 'values', 'ids', 'marks'
+
+    def __init__(self, values,  # type: Iterable[Tuple[Any, ...]]
+                 ids,           # type: Iterable[Tuple[Optional[str], ...]]
+                 marks,         # type: Iterable[Tuple[Any, ...]]
+                 strength=None  # type: int
+                 ):
+        """
+
+        :param values: for each parametrize mark, the tuple of its values
+        :param ids: for each parametrize mark, the tuple of the ids of its values
+        :param marks: for each parametrize mark, the tuple of the marks of its values (None for non-marked values)
+        :param strength: an optional strength. If provided, only the combinations of a covering array of this strength
+            are created, see `covering_arrays`. Otherwise, all combinations are created (cartesian product).
+        """
+        self.values = LazyProduct(*values) if strength is None else CoveringArray(values, strength)
+        self.ids = tuple(ids)
+        self.marks = tuple(marks)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_nb_marked(self):
+        # type: (...) -> int
+        """Returns the number of parameters with at least one mark, without creating them"""
+        if not isinstance(self.values, LazyProduct):
+            return sum(1 for indices in (self.values.get_indices(i) for i in range(len(self)))
+                       if any(ms[j] is not None for ms, j in zip(self.marks, indices)))
+        nb_unmarked = 1
+        for marks in self.marks:
+            nb_unmarked *= sum(1 for m in marks if m is None)
+        return len(self) - nb_unmarked
+
+    def __getitem__(self, i):
+        indices = self.values.get_indices(i)
+        if len(indices) == 1:
+            j, = indices
+            value, _id, marks = self.values.ranges[0][j], self.ids[0][j], self.marks[0][j]
+            if _id is not None and not isinstance(_id, str):
+                _id = str(_id)
+        else:
+            value = tuple(r[j] for r, j in zip(self.values.ranges, indices))
+            _id = cap_id('-'.join([get_id_for_value(ids[j]) for ids, j in zip(self.ids, indices)]))
+            marks = [m for ms, j in zip(self.marks, indices) if ms[j] is not None for m in ms[j]]
+
+        return pytest.param(value, id=_id, marks=transform_marks_into_decorators(marks) if marks else ())
+
+
+# ---- access to the current pytest config (set by our pytest plugin, see `pytest_cases.plugin`) ----
+
+_PYTEST_CONFIG = None
+"""The pytest `config` object of the current session, or None if the pytest-cases plugin is not active"""
+
+
+def set_pytest_config(config):
+    """
+    Remembers the pytest `config` object of the current session, so that the decorators (that are executed at
+    collection time, when the test modules are imported) can access the pytest cache and command-line options.
+
+    :param config: a pytest config object, or None to forget it
+    :return:
+    """
+    global _PYTEST_CONFIG
+    _PYTEST_CONFIG = config
+
+
+def get_pytest_config():
+    """
+    Returns the pytest `config` object of the current session, or None if the pytest-cases plugin is not active
+    (for example if the decorators are used outside of a pytest session)
+
+    :return:
+    """
+    return _PYTEST_CONFIG
+
+
+def get_pytest_cache():
+    """
+    Returns the pytest cache (`config.cache`) of the current session, or None if it is not available (plugin not
+    active or `cacheprovider` plugin disabled with `-p no:cacheprovider`).
+
+    :return:
+    """
+    return getattr(_PYTEST_CONFIG, 'cache', None)
+
+
+def get_pytest_option(name,        # type: str
+                      default=None
+                      ):
+    """
+    Returns the value of a pytest command-line option in the current session, or `default` if the pytest-cases plugin
+    is not active.
+
+    :param name: the option destination name, for example 'cases_shard'
+    :param default: the value to return when the option is not available
+    :return:
+    """
+    if _PYTEST_CONFIG is None:
+        return default
+    try:
+        return _PYTEST_CONFIG.getoption(name)
+    except ValueError:
+        # option not registered
+        return default
@@ -0,0 +1,170 @@
+"""
+Covering arrays: small sets of combinations of parameter values such that every combination of values of any `strength`
+parameters appears in at least one of them. They are used as an alternative to the full cartesian product of the
+parameters ("pairwise" or "n-wise" testing), see `pytest_fixture_plus(combine=...)`.
+
+The arrays are built with the IPOG algorithm (In-Parameter-Order-General, Lei et al. 2007). The construction does not
+use any randomness, so the same array is obtained in all runs and on all xdist workers.
+"""
+from itertools import combinations, product
+
+try:  # python 3.3+
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+try:  # type hints, python 3+
+    from typing import Any, Iterable, List, Optional, Tuple  # noqa
+except ImportError:
+    pass
+
+
+COMBINE_STRATEGIES = ('product', 'pairwise', 'nwise')
+"""The possible values of the `combine` argument of `pytest_fixture_plus`"""
+
+
+def get_strength(combine,       # type: str
+                 strength=None  # type: int
+                 ):
+    # type: (...) -> Optional[int]
+    """
+    Validates the `combine` and `strength` arguments, and returns the strength of the covering array to use, or None
+    if the full cartesian product should be used.
+
+    :param combine: one of 'product', 'pairwise' and 'nwise'
+    :param strength: the strength (only for 'nwise')
+    :return:
+    """
+    if combine == 'product':
+        if strength is not None:
+            raise ValueError("`strength` can only be used with 'nwise'")
+        return None
+    elif combine == 'pairwise':
+        if strength not in (None, 2):
+            raise ValueError("'pairwise' has strength 2, use 'nwise' for another strength")
+        return 2
+    elif combine == 'nwise':
+        if strength is None:
+            raise ValueError("`strength` should be provided with 'nwise'")
+        if strength < 1:
+            raise ValueError("`strength` should be a positive integer, found %r" % strength)
+        return strength
+    else:
+        raise ValueError("Invalid `combine` %r, it should be one of %s" % (combine, COMBINE_STRATEGIES))
+
+
+def build_covering_array(sizes,     # type: Tuple[int, ...]
+                         strength   # type: int
+                         ):
+    # type: (...) -> List[Tuple[int, ...]]
+    """
+    Returns a covering array of the given strength for parameters with the given numbers of values: a list of
+    combinations of value indices such that for any `strength` parameters, all combinations of their values appear
+    in at least one combination. If `strength` is greater than or equal to the number of parameters, this is the full
+    cartesian product.
+
+    :param sizes: the number of values of each parameter
+    :param strength:
+    :return: the list of combinations. Each combination is a tuple of indices, one for each parameter
+    """
+    nb_params = len(sizes)
+    if any(s == 0 for s in sizes):
+        return []
+    if strength >= nb_params:
+        return list(product(*(range(s) for s in sizes)))
+
+    # parameters with many values first: this gives smaller arrays. The sort is stable so it is deterministic
+    order = sorted(range(nb_params), key=lambda k: -sizes[k])
+    ordered_sizes = [sizes[k] for k in order]
+
+    # -- the full product of the first `strength` parameters
+    rows = [list(r) for r in product(*(range(s) for s in ordered_sizes[:strength]))]
+
+    for i in range(strength, nb_params):
+        # all combinations of values of parameter i with `strength - 1` of the previous parameters
+        cols_combinations = list(combinations(range(i), strength - 1))
+        uncovered = set((cols, vals, v) for cols in cols_combinations
+                        for vals in product(*(range(ordered_sizes[c]) for c in cols))
+                        for v in range(ordered_sizes[i]))
+
+        # -- horizontal growth: choose the value of parameter i in each existing row
+        for row in rows:
+            best_v, best_covered = None, ()
+            for v in range(ordered_sizes[i]):
+                covered = [t for t in ((cols, tuple(row[c] for c in cols), v) for cols in cols_combinations)
+                           if t in uncovered]
+                if len(covered) > len(best_covered):
+                    best_v, best_covered = v, covered
+            row.append(best_v)
+            uncovered.difference_update(best_covered)
+
+        # -- vertical growth: cover the remaining combinations by filling the free values of rows, or with new rows
+        for cols, vals, v in sorted(uncovered):
+            for row in rows:
+                if row[i] in (None, v) and all(row[c] in (None, val) for c, val in zip(cols, vals)):
+                    break
+            else:
+                row = [None] * (i + 1)
+                rows.append(row)
+            row[i] = v
+            for c, val in zip(cols, vals):
+                row[c] = val
+
+    # fill the remaining free values, restore the parameters order and remove the duplicates
+    result = []
+    seen = set()
+    for j, row in enumerate(rows):
+        row = [(j % s) if x is None else x for x, s in zip(row, ordered_sizes)]
+        indices = [0] * nb_params
+        for k, x in zip(order, row):
+            indices[k] = x
+        indices = tuple(indices)
+        if indices not in seen:
+            seen.add(indices)
+            result.append(indices)
+    return result
+
+
+class CoveringArray(Sequence):
+    """
+    An indexable sequence of combinations of values from several ranges, forming a covering array of the given
+    strength (see `build_covering_array`). It is a lighter equivalent of `LazyProduct`: the combinations are computed
+    when the sequence is first used, and they are stored column-wise as indices in the ranges.
+    """
+    __slots__ = 'ranges', 'strength', '_columns'
+
+    def __init__(self, ranges,  # type: Iterable[Iterable[Any]]
+                 strength       # type: int
+                 ):
+        # only copy the ranges that can not be indexed (generators, sets...)
+        self.ranges = tuple(r if isinstance(r, Sequence) else tuple(r) for r in ranges)
+        self.strength = strength
+        self._columns = None
+
+    def _get_columns(self):
+        # type: (...) -> Tuple[Tuple[int, ...], ...]
+        """Returns the value indices in each range, computing the covering array on first call"""
+        if self._columns is None:
+            rows = build_covering_array(tuple(len(r) for r in self.ranges), self.strength)
+            self._columns = tuple(zip(*rows)) if len(rows) > 0 else ((),) * len(self.ranges)
+        return self._columns
+
+    def __len__(self):
+        columns = self._get_columns()
+        return len(columns[0]) if len(columns) > 0 else 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_indices(self, i):
+        """
+        Returns the tuple of indices (one for each range) of the values in combination `i`.
+
+        :param i: the index of a combination, from `0` to `len(self) - 1`
+        :return:
+        """
+        return tuple(c[i] for c in self._get_columns())
+
+    def __getitem__(self, i):
+        return tuple(r[j] for r, j in zip(self.ranges, self.get_indices(i)))
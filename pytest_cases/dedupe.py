@@ -0,0 +1,216 @@
+"""
+Detection of duplicate cases: cases whose data (the result of `CaseDataGetter.get()`) is identical. When deduplication
+is requested (`@cases_data(dedupe=True)` or the `--cases-dedupe` option), the plugin computes a content digest of the
+data of each case once the tests are collected, and the items of a test function that only differ by duplicate cases
+are executed once: the others are skipped (see `plugin.pytest_collection_modifyitems`).
+
+The data computed to get the digests is not computed again when the tests run: it is stored in the session-wide
+memoization cache if it is enabled (within its memory budget), and otherwise kept here until the first test using it
+retrieves it with `pop_collected_result`.
+"""
+import pickle
+import sys
+from hashlib import md5
+
+from pytest_cases.memoize import get_memoization_cache
+
+try:  # python 3
+    import copyreg
+except ImportError:  # python 2
+    import copy_reg as copyreg
+
+try:  # type hints, python 3+
+    from typing import Any, Dict, Hashable, Iterable, Optional, Set  # noqa
+except ImportError:
+    pass
+
+
+_REQUESTED = set()
+"""The case getters for which deduplication was explicitly requested with `@cases_data(dedupe=True)`"""
+
+_DIGESTS = dict()  # type: Dict[Hashable, Optional[str]]
+"""The digest of the data of each case, by case key (see `CaseDataGetter.get_case_key`)"""
+
+NOT_COLLECTED = object()
+"""Marker returned by `pop_collected_result` when no result was computed for a case during collection"""
+
+_RESULTS = dict()  # type: Dict[Hashable, Any]
+"""The data of the cases computed by `get_case_digest`, by case key, when memoization is disabled"""
+
+_PICKLE_PROTOCOL = min(pickle.HIGHEST_PROTOCOL, 5)
+"""Protocol 5 (python 3.8+) hands the raw data buffers (for example of numpy arrays) to `_HashWriter.buffer`"""
+
+
+def request_dedupe(case_getters  # type: Iterable[Any]
+                   ):
+    """
+    Marks the provided case getters so that the tests using them are deduplicated, even if the `--cases-dedupe`
+    command-line option is not set.
+
+    :param case_getters:
+    :return:
+    """
+    _REQUESTED.update(case_getters)
+
+
+def is_dedupe_requested(case_getter):
+    """Returns True if deduplication was requested for this case getter with `request_dedupe`"""
+    return case_getter in _REQUESTED
+
+
+class _HashWriter(object):
+    """
+    A file-like object receiving the pickled bytes of an object, and feeding them to a hash function as they come, so
+    that the complete pickle is never held in memory.
+    """
+    __slots__ = 'hash',
+
+    def __init__(self):
+        self.hash = md5()
+
+    def write(self, data):
+        self.hash.update(data)
+
+    def buffer(self, pickle_buffer):
+        """`buffer_callback` of the pickler: hashes a raw data buffer in place, without copying it"""
+        try:
+            raw = pickle_buffer.raw()
+        except BufferError:
+            # not contiguous: let the pickler copy it in the stream
+            return True
+        self.hash.update(str(raw.nbytes).encode('ascii'))
+        self.hash.update(raw)
+        return False
+
+
+def _array_from_buffer(dtype, shape, data):
+    """Rebuilds an array reduced by `_reduce_array`. Only referenced by the hashed pickles, never called by them."""
+    import numpy as np
+    return np.frombuffer(data, dtype=dtype).reshape(shape)
+
+
+def _reduce_array(a):
+    """
+    Reduces a numpy array to its dtype, its shape and its C-contiguous data, so that two arrays with the same values
+    have the same pickled bytes whatever their memory layout (strides, views, fortran order).
+    """
+    import numpy as np
+    if a.dtype.hasobject:
+        # no raw buffer: let numpy pickle the objects
+        return a.__reduce__()
+    data = np.ascontiguousarray(a)
+    if _PICKLE_PROTOCOL >= 5:
+        data = pickle.PickleBuffer(data)
+    else:
+        data = data.tobytes()
+    return _array_from_buffer, (a.dtype.str, a.shape, data)
+
+
+def _new_pickler(writer):
+    """Returns a pickler streaming into `writer`, with numpy arrays normalized by `_reduce_array` if numpy is loaded"""
+    if _PICKLE_PROTOCOL >= 5:
+        pickler = pickle.Pickler(writer, protocol=_PICKLE_PROTOCOL, buffer_callback=writer.buffer)
+    else:
+        pickler = pickle.Pickler(writer, protocol=_PICKLE_PROTOCOL)
+
+    np = sys.modules.get('numpy')
+    if np is not None:
+        # an object can only contain numpy arrays if numpy was already imported
+        dispatch_table = copyreg.dispatch_table.copy()
+        dispatch_table[np.ndarray] = _reduce_array
+        pickler.dispatch_table = dispatch_table
+    return pickler
+
+
+def get_content_digest(obj  # type: Any
+                       ):
+    # type: (...) -> Optional[str]
+    """
+    Returns a digest of the contents of `obj`, computed with a streaming hash over its pickled bytes. With python 3.8+,
+    raw data buffers such as the ones of numpy arrays are hashed directly. Numpy arrays are hashed from their dtype,
+    shape and C-contiguous data, so that a view and a copy with the same values have the same digest. Returns None if
+    `obj` can not be pickled.
+
+    Two objects with the same digest are considered equal. Note that equal objects may have different digests, for
+    example dictionaries with a different insertion order: they are then not considered as duplicates.
+
+    :param obj:
+    :return:
+    """
+    writer = _HashWriter()
+    try:
+        _new_pickler(writer).dump(obj)
+    except Exception:
+        return None
+    return writer.hash.hexdigest()
+
+
+def get_case_digest(case_getter):
+    # type: (...) -> Optional[str]
+    """
+    Returns the digest of the data of a case (see `get_content_digest`), computed once per case key. Returns None if
+    the case data can not be shared or pickled, or if the case function raises an exception: the case is then never
+    considered as a duplicate.
+
+    The case data is memoized by `case_getter.get()` if memoization is enabled, and is otherwise kept until it is
+    retrieved with `pop_collected_result` or released with `keep_collected_results`.
+
+    :param case_getter:
+    :return:
+    """
+    case_key = case_getter.get_case_key()
+    if case_key is None:
+        return None
+    try:
+        return _DIGESTS[case_key]
+    except KeyError:
+        try:
+            res = case_getter.get()
+        except Exception:
+            digest = None
+        else:
+            digest = get_content_digest(res)
+            if get_memoization_cache() is None:
+                _RESULTS[case_key] = res
+        _DIGESTS[case_key] = digest
+        return digest
+
+
+def keep_collected_results(case_keys  # type: Set[Hashable]
+                           ):
+    # type: (...) -> int
+    """
+    Releases the case data computed by `get_case_digest` for the cases that are not in `case_keys`, for example the
+    cases only used by skipped duplicate tests.
+
+    :param case_keys:
+    :return: the number of results still kept
+    """
+    for case_key in [k for k in _RESULTS if k not in case_keys]:
+        del _RESULTS[case_key]
+    return len(_RESULTS)
+
+
+def has_collected_result(case_key  # type: Hashable
+                         ):
+    """Returns True if the data of the case with key `case_key` was computed by `get_case_digest` and is still kept"""
+    return case_key in _RESULTS
+
+
+def pop_collected_result(case_key  # type: Hashable
+                         ):
+    """
+    Returns the data of the case with key `case_key` computed by `get_case_digest`, and releases it. Returns
+    `NOT_COLLECTED` if it was not computed or was already retrieved.
+
+    :param case_key:
+    :return:
+    """
+    return _RESULTS.pop(case_key, NOT_COLLECTED)
+
+
+def clear_dedupe():
+    """Forgets the deduplication requests, the digests and the case data computed in this session"""
+    _REQUESTED.clear()
+    _DIGESTS.clear()
+    _RESULTS.clear()
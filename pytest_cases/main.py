@@ -1,11 +1,12 @@
 # Use true division operator always even in old python 2.x (used in `_get_case_getter_s`)
 from __future__ import division
 
+import linecache
 import sys
 from abc import abstractmethod, ABCMeta
 from distutils.version import LooseVersion
-from inspect import getmembers, isgeneratorfunction, getmodule, currentframe
-from itertools import product
+from inspect import isgeneratorfunction, getmodule, currentframe
+from itertools import product, count
 from warnings import warn
 
 from decopatch import function_decorator, DECORATED, with_parenthesis
@@ -32,6 +33,8 @@ try:  # type hints, python 3+
 
     from types import ModuleType
 
+    from pytest_cases.tag_expr import TagExpression  # noqa
+
     # Type hint for the simple functions
     CaseFunc = Callable[[], CaseData]
 
@@ -41,8 +44,21 @@ except ImportError:
     pass
 
 from pytest_cases.case_funcs import _GENERATOR_FIELD, CASE_TAGS_FIELD
+from pytest_cases.case_catalog import select_module_cases
+from pytest_cases.sharding import parse_shard, is_in_shard
+from pytest_cases.covering_arrays import get_strength, build_covering_array, CoveringArray
+from pytest_cases.prefetch import request_prefetch, pop_prefetched_result, discard_prefetched_result, NOT_PREFETCHED
+from pytest_cases.dedupe import request_dedupe, pop_collected_result, NOT_COLLECTED
+from pytest_cases.async_cases import call_case_function, pop_gathered_result, NOT_GATHERED
+from pytest_cases.shared_store import is_shared_store_enabled, get_shared_result
+from pytest_cases.case_stats import is_case_stats_enabled, timed_get, get_case_id
+from pytest_cases.collect_stats import collect_stats, timed_section, count_getters, count_marks
+from pytest_cases.memoize import get_memoized_result, memoize_result, NOT_MEMOIZED, compute_case, store_case_result, \
+    is_results_sharing_enabled
 from pytest_cases.common import yield_fixture, get_pytest_parametrize_marks, get_test_ids_from_param_values, \
-    make_marked_parameter_value, get_pytest_marks_on_function, extract_parameterset_info
+    make_marked_parameter_value, get_pytest_marks_on_function, extract_parameterset_info, get_pytest_option, \
+    LazyProduct, ColumnTable, SampledProduct, LazyParamsProduct, HAS_PYTEST_PARAM, cap_id, lazy_range, \
+    get_pytest_config
 
 
 class CaseDataGetter(six.with_metaclass(ABCMeta)):
@@ -55,6 +71,8 @@ class CaseDataGetter(six.with_metaclass(ABCMeta)):
     The case functions can use the proposed standard `CaseData` type hint and return outputs matching this type hint,
     but this is not mandatory.
     """
+    __slots__ = ()
+
     @abstractmethod
     def get(self, *args, **kwargs):
         # type: (...) -> Union[CaseData, Any]
@@ -94,24 +112,12 @@ class CaseDataGetter(six.with_metaclass(ABCMeta)):
         return ins, outs, err
 
 
-class CaseDataFromFunction(CaseDataGetter):
+class CaseDataFromFunctionBase(CaseDataGetter):
     """
-    A CaseDataGetter relying on a function
+    The behaviour shared by the CaseDataGetters relying on a function: subclasses provide the `f`, `case_name` and
+    `function_kwargs` attributes, with their own `__slots__` (this class has none).
     """
-
-    def __init__(self, data_generator_func,  # type: Union[CaseFunc, GeneratedCaseFunc]
-                 case_name=None,             # type: str
-                 function_kwargs=None        # type: Dict[str, Any]
-                 ):
-        """
-
-        :param data_generator_func:
-        """
-        self.f = data_generator_func
-        self.case_name = case_name
-        if function_kwargs is None:
-            function_kwargs = dict()
-        self.function_kwargs = function_kwargs
+    __slots__ = ()
 
     def __str__(self):
         if self.case_name is not None:
@@ -129,18 +135,201 @@ class CaseDataFromFunction(CaseDataGetter):
         """
         return get_pytest_marks_on_function(self.f)
 
+    def get_case_key(self):
+        # type: (...) -> Optional[Tuple[Callable, Tuple]]
+        """
+        Returns a hashable key identifying the case function and the parameters bound to it, or None if the parameters
+        are not hashable. Two case getters with the same key return the same case data when `get()` is called without
+        arguments.
+        :return:
+        """
+        key = self.f, tuple(sorted(self.function_kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        else:
+            return key
+
     def get(self, *args, **kwargs):
         # type: (...) -> Union[CaseData, Any]
         """
         This implementation relies on the inner function to generate the case data.
+
+        When no arguments are provided, the result may come from the session-wide memoization cache (see the
+        `--cases-memo-budget` option), may have been computed to detect duplicates (see `--cases-dedupe`), may have
+        been prefetched (see `@cases_data(prefetch=True)`) or gathered with the
+        other async cases of the test (see `--cases-async-gather`), may come from the cache of the case function (see
+        `@case_cache`), or may have been computed by another xdist worker (see `--cases-shared-memory`). The result of
+        `async def` case functions is awaited in an event loop.
         :return:
         """
-        kwargs.update(self.function_kwargs)
-        return self.f(*args, **kwargs)
+        if is_case_stats_enabled():
+            # record the time spent, see `--cases-stats`
+            return timed_get(get_case_id(self), self._get, *args, **kwargs)
+        else:
+            return self._get(*args, **kwargs)
+
+    def _get(self, *args, **kwargs):
+        # type: (...) -> Union[CaseData, Any]
+        """ Implementation of `get` """
+        if len(args) > 0 or len(kwargs) > 0:
+            # the result depends on the arguments: it can not be shared
+            kwargs.update(self.function_kwargs)
+            return call_case_function(self.f, *args, **kwargs)
+
+        if not is_results_sharing_enabled():
+            # no memoization, prefetching, async gathering nor shared store in this session
+            return compute_case(self.f, self.function_kwargs)
+
+        case_key = self.get_case_key()
+        if case_key is None:
+            return compute_case(self.f, self.function_kwargs)
+
+        res = get_memoized_result(case_key)
+        if res is NOT_MEMOIZED:
+            res = pop_collected_result(case_key)
+            if res is NOT_COLLECTED:
+                res = pop_gathered_result(case_key)
+                if res is NOT_GATHERED:
+                    res = pop_prefetched_result(case_key)
+                else:
+                    # release the prefetched copy of this result, if any
+                    discard_prefetched_result(case_key)
+                if res is NOT_PREFETCHED:
+                    if is_shared_store_enabled():
+                        # computed once for all xdist workers, see `--cases-shared-memory`
+                        res = get_shared_result(get_case_id(self), lambda: compute_case(self.f, self.function_kwargs))
+                    else:
+                        res = compute_case(self.f, self.function_kwargs)
+                else:
+                    store_case_result(self.f, self.function_kwargs, res)
+            memoize_result(case_key, res)
+        else:
+            # release the prefetched copy of this result, if any
+            discard_prefetched_result(case_key)
+        return res
+
+
+class CaseDataFromFunction(CaseDataFromFunctionBase):
+    """
+    A CaseDataGetter relying on a function
+    """
+    __slots__ = 'f', 'case_name', 'function_kwargs'
+
+    def __init__(self, data_generator_func,  # type: Union[CaseFunc, GeneratedCaseFunc]
+                 case_name=None,             # type: str
+                 function_kwargs=None        # type: Dict[str, Any]
+                 ):
+        """
 
+        :param data_generator_func:
+        """
+        self.f = data_generator_func
+        self.case_name = case_name
+        if function_kwargs is None:
+            function_kwargs = dict()
+        self.function_kwargs = function_kwargs
+
+
+class _GeneratedCases(object):
+    """
+    Information shared by all cases generated by a cases generator function (see `@cases_generator`): the function,
+    the names specification and the table of parameter values combinations. The parameter names are stored once, and
+    the values column-wise (a `LazyProduct`, `CoveringArray` or `SampledProduct` of the parameter ranges, or a
+    `ColumnTable`), so that each generated case only needs its row index in this table.
+    """
+    __slots__ = 'f', 'names', 'param_names', 'param_values', '_names_checked'
+
+    def __init__(self, f, names, param_names, param_values):
+        self.f = f
+        self.param_names = tuple(param_names)
+        if not isinstance(param_values, (LazyProduct, ColumnTable, CoveringArray, SampledProduct)):
+            # an explicit list of combinations: store it column-wise
+            param_values = ColumnTable(param_values, nb_columns=len(self.param_names))
+        self.param_values = param_values
+        self._names_checked = False
+
+        if isinstance(names, str):
+            # then this is a string formatter creating the names
+            _formatter = names
+
+            def names(**params):
+                return _formatter.format(**params)
+
+        elif not callable(names):
+            if len(names) != len(param_values):
+                raise ValueError("An explicit list of names has been provided but it has not the same length (%s) than"
+                                 " the number of cases to be generated (%s)" % (len(names), len(param_values)))
+
+        self.names = names
+
+    def __len__(self):
+        return len(self.param_values)
+
+    def get_kwargs(self, i):
+        """Returns the dictionary of parameters for generated case i"""
+        return dict(zip(self.param_names, self.param_values[i]))
+
+    def get_name(self, i):
+        """Returns the name of generated case i. An error is raised if the names of the cases are not unique"""
+        if not self._names_checked:
+            self._check_unique_names()
+        return self._make_name(i)
+
+    def _make_name(self, i):
+        if callable(self.names):
+            # generate the case name by applying the name template
+            return self.names(**self.get_kwargs(i))
+        else:
+            # an explicit list is provided
+            return self.names[i]
+
+    def _check_unique_names(self):
+        """
+        Checks that all generated names are unique, once, when the first name is requested. The set of names is only
+        used during the check, so that no data is kept per generated case.
+        """
+        used_names = set()
+        for i in lazy_range(len(self)):
+            name = self._make_name(i)
+            if name in used_names:
+                raise ValueError("Generated function names for generator case function {} are not "
+                                 "unique. Please use all parameter names in the string format variables"
+                                 "".format(self.f.__name__))
+            used_names.add(name)
+        self._names_checked = True
+
+
+class GeneratedCaseDataFromFunction(CaseDataFromFunctionBase):
+    """
+    A CaseDataGetter for a case generated by a cases generator function. It only holds a reference to the table shared
+    by all cases of the generator and the index of the case in it: its name and parameters are created when needed.
+    """
+    __slots__ = 'generated_cases', 'index'
+
+    def __init__(self, generated_cases,  # type: _GeneratedCases
+                 index                   # type: int
+                 ):
+        self.generated_cases = generated_cases
+        self.index = index
+
+    @property
+    def f(self):
+        return self.generated_cases.f
+
+    @property
+    def case_name(self):
+        return self.generated_cases.get_name(self.index)
+
+    @property
+    def function_kwargs(self):
+        return self.generated_cases.get_kwargs(self.index)
+
+
+# generated cases are still considered as `CaseDataFromFunction`, without inheriting its slots
+CaseDataFromFunction.register(GeneratedCaseDataFromFunction)
 
-CASE_PREFIX = 'case_'
-"""Prefix used by default to identify case functions within a module"""
 
 THIS_MODULE = object()
 """Marker that can be used instead of a module name to indicate that the module is the current one"""
@@ -200,30 +389,31 @@ def param_fixtures(argnames, argvalues, ids=None):
         i += 1
         root_fixture_name[-1] += str(i)
 
-    @pytest_fixture_plus(name=root_fixture_name)
-    @pytest.mark.parametrize(argnames, argvalues, ids=ids)
-    @with_signature("(%s)" % argnames)
-    def _root_fixture(**kwargs):
-        return tuple(kwargs[k] for k in argnames_lst)
+    with collect_stats('param_fixtures', '%s::%s' % (module.__name__, root_fixture_name)):
+        @pytest_fixture_plus(name=root_fixture_name)
+        @pytest.mark.parametrize(argnames, argvalues, ids=ids)
+        @with_signature("(%s)" % argnames)
+        def _root_fixture(**kwargs):
+            return tuple(kwargs[k] for k in argnames_lst)
 
-    setattr(module, root_fixture_name, _root_fixture)
+        setattr(module, root_fixture_name, _root_fixture)
 
-    # finally create the sub-fixtures
-    for param_idx, argname in enumerate(argnames_lst):
-        # create the fixture
-        # To fix late binding issue with `param_idx` we add an extra layer of scope
-        # See https://stackoverflow.com/questions/3431676/creating-functions-in-a-loop
-        def _create_fixture(param_idx):
-            @pytest_fixture_plus(name=argname)
-            @with_signature("(%s)" % root_fixture_name)
-            def _param_fixture(**kwargs):
-                params = kwargs.pop(root_fixture_name)
-                return params[param_idx] if len(argnames_lst) > 1 else params
-            return _param_fixture
+        # finally create the sub-fixtures
+        for param_idx, argname in enumerate(argnames_lst):
+            # create the fixture
+            # To fix late binding issue with `param_idx` we add an extra layer of scope
+            # See https://stackoverflow.com/questions/3431676/creating-functions-in-a-loop
+            def _create_fixture(param_idx):
+                @pytest_fixture_plus(name=argname)
+                @with_signature("(%s)" % root_fixture_name)
+                def _param_fixture(**kwargs):
+                    params = kwargs.pop(root_fixture_name)
+                    return params[param_idx] if len(argnames_lst) > 1 else params
+                return _param_fixture
 
-        created_fixtures.append(_create_fixture(param_idx))
+            created_fixtures.append(_create_fixture(param_idx))
 
-    return created_fixtures
+        return created_fixtures
 
 
 def _get_callerframe(offset=0):
@@ -242,6 +432,9 @@ def cases_fixture(cases=None,                       # type: Union[Callable[[Any]
                   case_data_argname='case_data',    # type: str
                   has_tag=None,                     # type: Any
                   filter=None,                      # type: Callable[[List[Any]], bool]
+                  shard=None,                       # type: Union[str, Tuple[int, int]]
+                  prefetch=False,                   # type: bool
+                  dedupe=False,                     # type: bool
                   f=DECORATED,
                   **kwargs
                   ):
@@ -295,7 +488,7 @@ def cases_fixture(cases=None,                       # type: Union[Callable[[Any]
         ...
     ```
 
-    Parameters (cases, module, has_tag, filter) can be used to perform explicit listing, or filtering. See
+    Parameters (cases, module, has_tag, filter, shard) can be used to perform explicit listing, or filtering. See
     `get_all_cases()` for details.
 
     :param cases: a single case or a hardcoded list of cases to use. Only one of `cases` and `module` should be set.
@@ -303,16 +496,29 @@ def cases_fixture(cases=None,                       # type: Union[Callable[[Any]
         module is the current one. Only one of `cases` and `module` should be set.
     :param case_data_argname: the optional name of the function parameter that should receive the `CaseDataGetter`
         object. Default is 'case_data'.
-    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. Only
-        cases with the given tag will be selected.
-    :param filter: an optional filtering function taking as an input a list of tags associated with a case, and
-        returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
-        `module`. It both `has_tag` and `filter` are set, both will be applied in sequence.
+    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. It may
+        also be a string containing a boolean expression of tag names, such as "a and not (b or c)".
+    :param filter: an optional filtering function taking as an input a list of tags associated with a case,
+        and returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
+        `module`. It is called once per distinct list of tags in the module. It both `has_tag` and `filter` are set,
+        both will be applied in sequence.
+    :param shard: an optional tuple `(index, count)` or string `'<index>/<count>'` to only select the cases belonging to
+        shard `index` (0-based) among `count` shards. Cases are assigned to shards using a stable hash of their id.
+        If None (default), the value of the `--cases-shard` pytest command-line option is used.
+    :param prefetch: a boolean (default False) indicating if the case data should be computed in a pool of worker
+        processes before the tests run. `case_data.get()` then returns the prefetched result, or raises the exception
+        raised by the case function. Prefetching can also be enabled for all tests with the `--cases-prefetch`
+        pytest command-line option. Only cases that can be pickled, and called without arguments, are prefetched.
+    :param dedupe: a boolean (default False) indicating if tests using cases with identical data should only be
+        executed once. The data of each case is computed once the tests are collected, and identified with a hash of
+        its pickled contents. The tests that only differ by a duplicate case are skipped, with the id of the test that
+        is executed in the skip reason. Deduplication can also be enabled for all tests with the `--cases-dedupe`
+        pytest command-line option.
     :return:
     """
     # apply @cases_data (that will translate to a @pytest.mark.parametrize)
-    parametrized_f = cases_data(cases=cases, module=module,
-                                case_data_argname=case_data_argname, has_tag=has_tag, filter=filter)(f)
+    parametrized_f = cases_data(cases=cases, module=module, case_data_argname=case_data_argname,
+                                has_tag=has_tag, filter=filter, shard=shard, prefetch=prefetch, dedupe=dedupe)(f)
     # apply @pytest_fixture_plus
     return pytest_fixture_plus(**kwargs)(parametrized_f)
 
@@ -321,6 +527,8 @@ def cases_fixture(cases=None,                       # type: Union[Callable[[Any]
 def pytest_fixture_plus(scope="function",
                         autouse=False,
                         name=None,
+                        combine='product',
+                        strength=None,
                         fixture_func=DECORATED,
                         **kwargs):
     """ decorator to mark a fixture factory function.
@@ -342,8 +550,17 @@ def pytest_fixture_plus(scope="function",
                 to resolve this is to name the decorated function
                 ``fixture_<fixturename>`` and then use
                 ``@pytest.fixture(name='<fixturename>')``.
+    :param combine: how the values of several `@pytest.mark.parametrize` marks are combined. 'product' (default)
+                creates all combinations (cartesian product). 'pairwise' only creates enough combinations so that
+                every pair of values of any two marks appears at least once (covering array of strength 2), and
+                'nwise' does the same for every combination of values of any `strength` marks. Covering arrays are
+                computed deterministically, so all runs and all xdist workers get the same combinations.
+    :param strength: the strength of the covering array when `combine='nwise'`.
     :param kwargs: other keyword arguments for `@pytest.fixture`
     """
+    # validate the combination strategy
+    strength = get_strength(combine, strength)
+
     # Compatibility for the 'name' argument
     if LooseVersion(pytest.__version__) >= LooseVersion('3.0.0'):
         # pytest version supports "name" keyword argument
@@ -352,6 +569,26 @@ def pytest_fixture_plus(scope="function",
         # 'name' argument is not supported in this old version, use the __name__ trick.
         fixture_func.__name__ = name
 
+    with collect_stats('pytest_fixture_plus', fixture_func):
+        return _create_fixture_plus(fixture_func, scope, autouse, strength, **kwargs)
+
+
+def _create_fixture_plus(fixture_func,  # type: Callable
+                         scope,         # type: str
+                         autouse,       # type: bool
+                         strength,      # type: Optional[int]
+                         **kwargs):
+    """
+    Internal implementation of `@pytest_fixture_plus`.
+
+    :param fixture_func: the decorated fixture function
+    :param scope:
+    :param autouse:
+    :param strength: the strength of the covering array used to combine the parametrize marks, or None for the
+        cartesian product
+    :param kwargs: other keyword arguments for `@pytest.fixture`, including `name` if supported
+    :return:
+    """
     # (1) Collect all @pytest.mark.parametrize markers (including those created by usage of @cases_data)
     parametrizer_marks = get_pytest_parametrize_marks(fixture_func)
     if len(parametrizer_marks) < 1:
@@ -359,68 +596,56 @@ def pytest_fixture_plus(scope="function",
         fix_creator = pytest.fixture if not isgeneratorfunction(fixture_func) else yield_fixture
         return fix_creator(scope=scope, autouse=autouse, **kwargs)(fixture_func)
 
-    # (2) create the huge "param" containing all params combined
-    # --loop (use the same order to get it right)
-    params_names_or_name_combinations = []
-    params_values = []
-    params_ids = []
-    params_marks = []
-    for pmark in parametrizer_marks:
-        # check number of parameter names in this parameterset
-        if len(pmark.param_names) < 1:
-            raise ValueError("Fixture function '%s' decorated with '@pytest_fixture_plus' has an empty parameter "
-                             "name in a @pytest.mark.parametrize mark")
-
-        # remember
-        params_names_or_name_combinations.append(pmark.param_names)
-
-        # extract all parameters that have a specific configuration (pytest.param())
-        _pids, _pmarks, _pvalues = extract_parameterset_info(pmark.param_names, pmark)
-
-        # Create the proper id for each test
-        if pmark.param_ids is not None:
-            # overridden at global pytest.mark.parametrize level - this takes precedence.
-            try:  # an explicit list of ids ?
-                paramids = list(pmark.param_ids)
-            except TypeError:  # a callable to apply on the values
-                paramids = list(pmark.param_ids(v) for v in _pvalues)
+    with timed_section('pytest_fixture_plus/product'):
+        # (2) create the huge "param" containing all params combined
+        # --loop (use the same order to get it right)
+        params_names_or_name_combinations = []
+        params_values = []
+        params_ids = []
+        params_marks = []
+        for pmark in parametrizer_marks:
+            # check number of parameter names in this parameterset
+            if len(pmark.param_names) < 1:
+                raise ValueError("Fixture function '%s' decorated with '@pytest_fixture_plus' has an empty parameter "
+                                 "name in a @pytest.mark.parametrize mark")
+
+            # remember
+            params_names_or_name_combinations.append(pmark.param_names)
+
+            # extract all parameters that have a specific configuration (pytest.param())
+            _pids, _pmarks, _pvalues = extract_parameterset_info(pmark.param_names, pmark)
+
+            # Create the proper id for each test
+            if pmark.param_ids is not None:
+                # overridden at global pytest.mark.parametrize level - this takes precedence.
+                try:  # an explicit list of ids ?
+                    paramids = list(pmark.param_ids)
+                except TypeError:  # a callable to apply on the values
+                    paramids = list(pmark.param_ids(v) for v in _pvalues)
+            else:
+                # default: values-based...
+                paramids = get_test_ids_from_param_values(pmark.param_names, _pvalues)
+                # ...but local pytest.param takes precedence
+                for i, _id in enumerate(_pids):
+                    if _id is not None:
+                        paramids[i] = _id
+
+            # Finally store the ids, marks, and values for this parameterset
+            params_ids.append(paramids)
+            params_marks.append(tuple(_pmarks))
+            params_values.append(tuple(_pvalues))
+
+        # (3) generate the ids and values, possibly reapplying marks
+        if HAS_PYTEST_PARAM:
+            # a lazy sequence of pytest.param: each combination is created when pytest needs it
+            final_values = LazyParamsProduct(params_values, params_ids, params_marks, strength=strength)
+            final_ids = None
+            count_marks(final_values.get_nb_marked())
         else:
-            # default: values-based...
-            paramids = get_test_ids_from_param_values(pmark.param_names, _pvalues)
-            # ...but local pytest.param takes precedence
-            for i, _id in enumerate(_pids):
-                if _id is not None:
-                    paramids[i] = _id
-
-        # Finally store the ids, marks, and values for this parameterset
-        params_ids.append(paramids)
-        params_marks.append(tuple(_pmarks))
-        params_values.append(tuple(_pvalues))
-
-    # (3) generate the ids and values, possibly reapplying marks
-    if len(params_names_or_name_combinations) == 1:
-        # we can simplify - that will be more readable
-        final_ids = params_ids[0]
-        final_marks = params_marks[0]
-        final_values = list(params_values[0])
-
-        # reapply the marks
-        for i, marks in enumerate(final_marks):
-            if marks is not None:
-                final_values[i] = make_marked_parameter_value(final_values[i], marks=marks)
-    else:
-        final_values = list(product(*params_values))
-        final_ids = get_test_ids_from_param_values(params_names_or_name_combinations, product(*params_ids))
-        final_marks = tuple(product(*params_marks))
-
-        # reapply the marks
-        for i, marks in enumerate(final_marks):
-            ms = [m for mm in marks if mm is not None for m in mm]
-            if len(ms) > 0:
-                final_values[i] = make_marked_parameter_value(final_values[i], marks=ms)
-
-    if len(final_values) != len(final_ids):
-        raise ValueError("Internal error related to fixture parametrization- please report")
+            final_values, final_ids = _get_legacy_fixture_params(params_names_or_name_combinations, params_values,
+                                                                 params_ids, params_marks, strength)
+            if len(final_values) != len(final_ids):
+                raise ValueError("Internal error related to fixture parametrization- please report")
 
     # (4) wrap the fixture function so as to remove the parameter names and add 'request' if needed
     all_param_names = tuple(v for l in params_names_or_name_combinations for v in l)
@@ -439,50 +664,190 @@ def pytest_fixture_plus(scope="function",
     else:
         new_sig = new_sig
 
-    # --common routine used below. Fills kwargs with the appropriate names and values from fixture_params
-    def _get_arguments(*args, **kwargs):
-        # kwargs contains request
-        request = kwargs['request'] if func_needs_request else kwargs.pop('request')
-
-        # populate the parameters
-        if len(params_names_or_name_combinations) == 1:
-            # remove the simplification
-            request.param = [request.param]
-        for p_names, fixture_param_value in zip(params_names_or_name_combinations, request.param):
-            if len(p_names) == 1:
-                # a single parameter for that generated fixture (@pytest.mark.parametrize with a single name)
-                kwargs[p_names[0]] = fixture_param_value
-            else:
-                # several parameters for that generated fixture (@pytest.mark.parametrize with several names)
-                # unpack all of them and inject them in the kwargs
-                for old_p_name, old_p_value in zip(p_names, fixture_param_value):
-                    kwargs[old_p_name] = old_p_value
+    # --Finally create the fixture function, a wrapper of user-provided fixture with the new signature
+    wrapped_fixture_func = _compile_fixture_wrapper(fixture_func, new_sig, params_names_or_name_combinations,
+                                                    func_needs_request)
 
-        return args, kwargs
+    if isinstance(final_values, LazyParamsProduct) and get_pytest_config() is not None:
+        # pytest would create all parameters now: they are only created when a test using the fixture is collected,
+        # see `plugin.pytest_generate_tests`
+        setattr(wrapped_fixture_func, LAZY_PARAMS_FIELD, final_values)
+        final_values = None
 
-    # --Finally create the fixture function, a wrapper of user-provided fixture with the new signature
-    if not isgeneratorfunction(fixture_func):
-        # normal function with return statement
+    # transform the created wrapper into a fixture
+    fix_creator = pytest.fixture if not isgeneratorfunction(fixture_func) else yield_fixture
+    fixture_decorator = fix_creator(scope=scope, params=final_values, autouse=autouse, ids=final_ids, **kwargs)
+    return fixture_decorator(wrapped_fixture_func)
+
+
+LAZY_PARAMS_FIELD = '__fixture_plus_params__'
+"""Internal marker holding the `LazyParamsProduct` of the wrapper of a `@pytest_fixture_plus` fixture, when the
+pytest-cases plugin is active"""
+
+
+def get_lazy_fixture_params(fixture_func  # type: Callable
+                            ):
+    # type: (...) -> Optional[LazyParamsProduct]
+    """
+    Returns the parameters of a `@pytest_fixture_plus` fixture that were not passed to pytest yet, or None.
+
+    :param fixture_func: the function of a pytest fixture definition
+    :return:
+    """
+    return getattr(fixture_func, LAZY_PARAMS_FIELD, None)
+
+
+_WRAPPER_NAMES = '_fixture_func_', '_param_', '_kwargs_'
+"""The global and local names used in the code generated by `_compile_fixture_wrapper`"""
+
+_GENERATED_CODE_IDS = count()
+"""Counter used to create a distinct file name for each generated code, see `_exec_generated_code`"""
+
+
+def _compile_fixture_wrapper(fixture_func,                       # type: Callable
+                             new_sig,                            # type: Signature
+                             params_names_or_name_combinations,  # type: List[Tuple[str, ...]]
+                             func_needs_request                  # type: bool
+                             ):
+    # type: (...) -> Callable
+    """
+    Creates the function wrapping a `@pytest_fixture_plus` fixture function: it has signature `new_sig`, and calls
+    `fixture_func` with the parameter values received in `request.param`. The code of the wrapper is generated for
+    this fixture, with a fixed mapping between parameter names and positions in `request.param`: for example with 3
+    parametrize marks with names 'a', 'b,c' and 'd', `request.param` is unpacked with `a, (b, c), d = request.param`.
+    It does not modify `request.param`.
+
+    When the signature is a plain list of names (the usual case for fixtures) the wrapper directly calls
+    `fixture_func`. Otherwise it is created with `makefun` and the generated code is only used to unpack the
+    parameters.
+
+    :param fixture_func: the decorated fixture function
+    :param new_sig: the signature of the wrapper: the signature of `fixture_func` without the parameters, and with
+        `request`
+    :param params_names_or_name_combinations: for each parametrize mark, the tuple of its parameter names
+    :param func_needs_request: a boolean indicating if `fixture_func` has a `request` argument
+    :return:
+    """
+    # the unpacking target, with a level of parenthesis for marks with several names when there are several marks
+    if len(params_names_or_name_combinations) == 1:
+        target = ', '.join(params_names_or_name_combinations[0])
+    else:
+        target = ', '.join(p_names[0] if len(p_names) == 1 else '(%s)' % ', '.join(p_names)
+                           for p_names in params_names_or_name_combinations)
+    param_names = tuple(name for p_names in params_names_or_name_combinations for name in p_names)
+
+    is_generator = isgeneratorfunction(fixture_func)
+    sig_names = tuple(new_sig.parameters)
+    simple_signature = all(p.kind is Parameter.POSITIONAL_OR_KEYWORD and p.default is Parameter.empty
+                           for p in new_sig.parameters.values()) \
+        and not any(n in _WRAPPER_NAMES for n in sig_names + param_names)
+
+    if simple_signature:
+        # generate the wrapper itself
+        call_args = ', '.join('%s=%s' % (n, n) for n in param_names + tuple(n for n in sig_names
+                                                                            if n != 'request' or func_needs_request))
+        src = "def wrapped_fixture_func(%s):\n" \
+              "    %s = request.param\n" % (', '.join(sig_names), target)
+        if not is_generator:
+            src += "    return _fixture_func_(%s)\n" % call_args
+        else:
+            src += "    for res in _fixture_func_(%s):\n" \
+                   "        yield res\n" % call_args
+        return _exec_generated_code(src, 'wrapped_fixture_func', fixture_func, _fixture_func_=fixture_func)
+
+    # generate the unpacker and use makefun for the signature
+    src = "def unpack_params(_param_, _kwargs_):\n" \
+          "    %s = _param_\n" % target
+    src += ''.join("    _kwargs_['%s'] = %s\n" % (n, n) for n in param_names)
+    unpack_params = _exec_generated_code(src, 'unpack_params', fixture_func)
+
+    if not is_generator:
         @with_signature(new_sig)
         def wrapped_fixture_func(*args, **kwargs):
-            args, kwargs = _get_arguments(*args, **kwargs)
+            request = kwargs['request'] if func_needs_request else kwargs.pop('request')
+            unpack_params(request.param, kwargs)
             return fixture_func(*args, **kwargs)
-
-        # transform the created wrapper into a fixture
-        fixture_decorator = pytest.fixture(scope=scope, params=final_values, autouse=autouse, ids=final_ids, **kwargs)
-        return fixture_decorator(wrapped_fixture_func)
-
     else:
-        # generator function (with a yield statement)
         @with_signature(new_sig)
         def wrapped_fixture_func(*args, **kwargs):
-            args, kwargs = _get_arguments(*args, **kwargs)
+            request = kwargs['request'] if func_needs_request else kwargs.pop('request')
+            unpack_params(request.param, kwargs)
             for res in fixture_func(*args, **kwargs):
                 yield res
 
-        # transform the created wrapper into a fixture
-        fixture_decorator = yield_fixture(scope=scope, params=final_values, autouse=autouse, ids=final_ids, **kwargs)
-        return fixture_decorator(wrapped_fixture_func)
+    return wrapped_fixture_func
+
+
+def _exec_generated_code(src,           # type: str
+                         func_name,     # type: str
+                         fixture_func,  # type: Callable
+                         **namespace):
+    # type: (...) -> Callable
+    """
+    Executes the source code `src` of a function generated for `fixture_func`, and returns the function. The source
+    is registered in `linecache` so that it appears in tracebacks.
+
+    :param src:
+    :param func_name: the name of the function defined in `src`
+    :param fixture_func:
+    :param namespace: the global variables used by the generated code
+    :return:
+    """
+    filename = '<pytest_fixture_plus %s-%s>' % (getattr(fixture_func, '__name__', 'fixture'), next(_GENERATED_CODE_IDS))
+    namespace['__name__'] = getattr(fixture_func, '__module__', None)
+    exec(compile(src, filename, 'exec'), namespace)
+    linecache.cache[filename] = len(src), None, src.splitlines(True), filename
+    return namespace[func_name]
+
+
+def _get_legacy_fixture_params(params_names_or_name_combinations,  # type: List[Tuple[str, ...]]
+                               params_values,                      # type: List[Tuple[Any, ...]]
+                               params_ids,                         # type: List[List[str]]
+                               params_marks,                       # type: List[Tuple[Any, ...]]
+                               strength=None                       # type: int
+                               ):
+    # type: (...) -> Tuple[List[Any], List[str]]
+    """
+    Returns the lists of fixture parameter values (possibly marked) and ids created by `@pytest_fixture_plus`, for
+    old versions of pytest where `pytest.param` does not exist so `LazyParamsProduct` can not be used.
+
+    :return: a tuple (final_values, final_ids)
+    """
+    if strength is None:
+        combine = product
+    else:
+        # only the combinations in the covering array
+        rows = build_covering_array(tuple(len(v) for v in params_values), strength)
+
+        def combine(*seqs):
+            return [tuple(seq[j] for seq, j in zip(seqs, row)) for row in rows]
+
+    nb_marked = 0
+    if len(params_names_or_name_combinations) == 1:
+        # we can simplify - that will be more readable
+        final_ids = params_ids[0]
+        final_marks = params_marks[0]
+        final_values = list(params_values[0])
+
+        # reapply the marks
+        for i, marks in enumerate(final_marks):
+            if marks is not None:
+                final_values[i] = make_marked_parameter_value(final_values[i], marks=marks)
+                nb_marked += 1
+    else:
+        final_values = list(combine(*params_values))
+        final_ids = get_test_ids_from_param_values(params_names_or_name_combinations, combine(*params_ids))
+        final_marks = tuple(combine(*params_marks))
+
+        # reapply the marks
+        for i, marks in enumerate(final_marks):
+            ms = [m for mm in marks if mm is not None for m in mm]
+            if len(ms) > 0:
+                final_values[i] = make_marked_parameter_value(final_values[i], marks=ms)
+                nb_marked += 1
+    count_marks(nb_marked)
+
+    return final_values, final_ids
 
 
 @function_decorator(custom_disambiguator=with_parenthesis)
@@ -491,6 +856,9 @@ def cases_data(cases=None,                       # type: Union[Callable[[Any], A
                case_data_argname='case_data',    # type: str
                has_tag=None,                     # type: Any
                filter=None,                      # type: Callable[[List[Any]], bool]
+               shard=None,                       # type: Union[str, Tuple[int, int]]
+               prefetch=False,                   # type: bool
+               dedupe=False,                     # type: bool
                test_func=DECORATED,
                ):
     """
@@ -532,7 +900,7 @@ def cases_data(cases=None,                       # type: Union[Callable[[Any], A
         ...
     ```
 
-    Parameters (cases, module, has_tag, filter) can be used to perform explicit listing, or filtering. See
+    Parameters (cases, module, has_tag, filter, shard) can be used to perform explicit listing, or filtering. See
     `get_all_cases()` for details.
 
     :param cases: a single case or a hardcoded list of cases to use. Only one of `cases` and `module` should be set.
@@ -540,27 +908,45 @@ def cases_data(cases=None,                       # type: Union[Callable[[Any], A
         module is the current one. Only one of `cases` and `module` should be set.
     :param case_data_argname: the optional name of the function parameter that should receive the `CaseDataGetter`
         object. Default is 'case_data'.
-    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. Only
-        cases with the given tag will be selected.
-    :param filter: an optional filtering function taking as an input a list of tags associated with a case, and
-        returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
-        `module`. It both `has_tag` and `filter` are set, both will be applied in sequence.
+    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. It may
+        also be a string containing a boolean expression of tag names, such as "a and not (b or c)".
+    :param filter: an optional filtering function taking as an input a list of tags associated with a case,
+        and returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
+        `module`. It is called once per distinct list of tags in the module. It both `has_tag` and `filter` are set,
+        both will be applied in sequence.
+    :param shard: an optional tuple `(index, count)` or string `'<index>/<count>'` to only select the cases belonging to
+        shard `index` (0-based) among `count` shards. Cases are assigned to shards using a stable hash of their id.
+        If None (default), the value of the `--cases-shard` pytest command-line option is used.
+    :param prefetch: a boolean (default False) indicating if the case data should be computed in a pool of worker
+        processes before the tests run. `case_data.get()` then returns the prefetched result, or raises the exception
+        raised by the case function. Prefetching can also be enabled for all tests with the `--cases-prefetch`
+        pytest command-line option. Only cases that can be pickled, and called without arguments, are prefetched.
+    :param dedupe: a boolean (default False) indicating if tests using cases with identical data should only be
+        executed once. The data of each case is computed once the tests are collected, and identified with a hash of
+        its pickled contents. The tests that only differ by a duplicate case are skipped, with the id of the test that
+        is executed in the skip reason. Deduplication can also be enabled for all tests with the `--cases-dedupe`
+        pytest command-line option.
     :return:
     """
     # equivalent to @mark.parametrize('case_data', cases) where cases is a tuple containing a CaseDataGetter for
+    with collect_stats('cases_data', test_func):
+        # First list all cases according to user preferences
+        _cases = get_all_cases(cases, module, test_func, has_tag, filter, shard)
+        if prefetch:
+            request_prefetch(_cases)
+        if dedupe:
+            request_dedupe(_cases)
 
-    # First list all cases according to user preferences
-    _cases = get_all_cases(cases, module, test_func, has_tag, filter)
-
-    # Then transform into required arguments for pytest (applying the pytest marks if needed)
-    marked_cases, cases_ids = get_pytest_parametrize_args(_cases)
+        # Then transform into required arguments for pytest (applying the pytest marks if needed)
+        marked_cases, cases_ids = get_pytest_parametrize_args(_cases)
 
-    # Finally create the pytest decorator and apply it
-    parametrizer = pytest.mark.parametrize(case_data_argname, marked_cases, ids=cases_ids)
+        # Finally create the pytest decorator and apply it
+        parametrizer = pytest.mark.parametrize(case_data_argname, marked_cases, ids=cases_ids)
 
-    return parametrizer(test_func)
+        return parametrizer(test_func)
 
 
+@timed_section('get_pytest_parametrize_args')
 def get_pytest_parametrize_args(cases):
     """
     Transforms a list of cases into a tuple containing the arguments to use in `@pytest.mark.parametrize`
@@ -574,20 +960,30 @@ def get_pytest_parametrize_args(cases):
     :return: (marked_cases, ids)
     """
     # hardcode the case ids, as simply passing 'ids=str' would not work when cases are marked cases
-    case_ids = [str(c) for c in cases]
+    case_ids = [cap_id(str(c)) for c in cases]
 
     # create the pytest parameter values with the appropriate pytest marks
-    marked_cases = [c if len(c.get_marks()) == 0 else make_marked_parameter_value(c, marks=c.get_marks())
-                    for c in cases]
+    marked_cases = []
+    nb_marked = 0
+    for c in cases:
+        marks = c.get_marks()
+        if len(marks) == 0:
+            marked_cases.append(c)
+        else:
+            marked_cases.append(make_marked_parameter_value(c, marks=marks))
+            nb_marked += 1
+    count_marks(nb_marked)
 
     return marked_cases, case_ids
 
 
+@timed_section('get_all_cases')
 def get_all_cases(cases=None,               # type: Union[Callable[[Any], Any], Iterable[Callable[[Any], Any]]]
                   module=None,              # type: Union[ModuleType, Iterable[ModuleType]]
                   this_module_object=None,  # type: Any
                   has_tag=None,             # type: Any
-                  filter=None               # type: Callable[[List[Any]], bool]
+                  filter=None,              # type: Callable[[List[Any]], bool]
+                  shard=None                # type: Union[str, Tuple[int, int]]
                   ):
     # type: (...) -> List[CaseDataGetter]
     """
@@ -598,55 +994,57 @@ def get_all_cases(cases=None,               # type: Union[Callable[[Any], Any],
         module is the current one. Only one of `cases` and `module` should be set.
     :param this_module_object: any variable defined in the module of interest, for example a function. It is used to
         find "this module", when `module` contains `THIS_MODULE`.
-    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. Only
-        cases with the given tag will be selected.
-    :param filter: an optional filtering function taking as an input a list of tags associated with a case, and
-        returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
-        `module`. It both `has_tag` and `filter` are set, both will be applied in sequence.
+    :param has_tag: an optional tag used to filter the cases. Only cases with the given tag will be selected. It may
+        also be a string containing a boolean expression of tag names, such as "a and not (b or c)".
+    :param filter: an optional filtering function taking as an input a list of tags associated with a case,
+        and returning a boolean indicating if the case should be selected. It will be used to filter the cases in the
+        `module`. It is called once per distinct list of tags in the module. It both `has_tag` and `filter` are set,
+        both will be applied in sequence.
+    :param shard: an optional tuple `(index, count)` or string `'<index>/<count>'` to only select the cases belonging to
+        shard `index` (0-based) among `count` shards. Cases are assigned to shards using a stable hash of their id.
+        If None (default), the value of the `--cases-shard` pytest command-line option is used, unless
+        `--cases-shard-mode=duration` (the shards are then selected by the plugin once all tests are collected). The
+        shard selection happens before the `CaseDataGetter` are created.
     :return:
     """
+    if shard is None and get_pytest_option('cases_shard_mode', 'hash') == 'hash':
+        shard = get_pytest_option('cases_shard')
+    shard = parse_shard(shard)
+
+    # the tags expression from the `--cases-tags` pytest command-line option, if any
+    tag_expr = get_pytest_option('cases_tags')
+
     if module is not None and cases is not None:
         raise ValueError("Only one of module and cases should be provided")
     elif module is None:
         # Hardcoded sequence of cases, or single case
         if callable(cases):
             # single element
-            _cases = [case_getter for case_getter in _get_case_getter_s(cases)]
-        else:
-            # already a sequence
-            _cases = [case_getter for c in cases for case_getter in _get_case_getter_s(c)]
+            cases = (cases, )
+        if tag_expr is not None:
+            cases = [c for c in cases if tag_expr.matches(getattr(c, CASE_TAGS_FIELD, ()))]
+        _cases = [case_getter for c in cases for case_getter in _get_case_getter_s(c, shard=shard)]
     else:
         # Gather all cases from the reference module(s)
         try:
             _cases = []
             for m in module:
                 m = sys.modules[this_module_object.__module__] if m is THIS_MODULE else m
-                _cases += extract_cases_from_module(m, has_tag=has_tag, filter=filter)
+                _cases += extract_cases_from_module(m, has_tag=has_tag, filter=filter, shard=shard, tag_expr=tag_expr)
         except TypeError:
             # 'module' object is not iterable: a single module was provided
             m = sys.modules[this_module_object.__module__] if module is THIS_MODULE else module
-            _cases = extract_cases_from_module(m, has_tag=has_tag, filter=filter)
+            _cases = extract_cases_from_module(m, has_tag=has_tag, filter=filter, shard=shard, tag_expr=tag_expr)
 
     return _cases
 
 
-def _get_code(f):
-    """
-    Returns the source code associated to function f. It is robust to wrappers such as @lru_cache
-    :param f:
-    :return:
-    """
-    if hasattr(f, '__wrapped__'):
-        return _get_code(f.__wrapped__)
-    elif hasattr(f, '__code__'):
-        return f.__code__
-    else:
-        raise ValueError("Cannot get code information for function " + str(f))
-
-
-def extract_cases_from_module(module,        # type: ModuleType
-                              has_tag=None,  # type: Any
-                              filter=None    # type: Callable[[List[Any]], bool]
+@timed_section('extract_cases_from_module')
+def extract_cases_from_module(module,         # type: ModuleType
+                              has_tag=None,   # type: Any
+                              filter=None,    # type: Callable[[List[Any]], bool]
+                              shard=None,     # type: Tuple[int, int]
+                              tag_expr=None   # type: TagExpression
                               ):
     # type: (...) -> List[CaseDataGetter]
     """
@@ -654,37 +1052,27 @@ def extract_cases_from_module(module,        # type: ModuleType
     See `@cases_data`
 
     :param module:
-    :param has_tag: a tag used to filter the cases. Only cases with the given tag will be selected
-    :param filter: a function taking as an input a list of tags associated with a case, and returning a boolean
-        indicating if the case should be selected
+    :param has_tag: a tag used to filter the cases. Only cases with the given tag will be selected. It may also be
+        a tags expression such as "a and not b", see `tag_expr` module
+    :param filter: a function taking as an input a list of tags associated with a case, and returning a
+        boolean indicating if the case should be selected
+    :param shard: an optional tuple (index, count) as returned by `parse_shard`. Only the cases belonging to this shard
+        will be selected
+    :param tag_expr: an optional compiled tags expression (see `compile_tag_expression`). Only the cases matching it
+        will be selected
     :return:
     """
     if filter is not None and not callable(filter):
         raise ValueError("`filter` should be a callable starting in pytest-cases 0.8.0. If you wish to provide a single"
                          " tag to match, use `has_tag` instead.")
 
-    # First gather all case data providers in the reference module
+    # First gather all case data providers in the reference module (only the functions from the module file, not the
+    # imported ones, starting with prefix 'case_'), with the optional filter/tag. The list of cases and the tags index
+    # are cached, see `select_module_cases`
     cases_dct = dict()
-    for f_name, f in getmembers(module, callable):
-        # only keep the functions
-        #  - from the module file (not the imported ones),
-        #  - starting with prefix 'case_'
-        if f_name.startswith(CASE_PREFIX):
-            code = _get_code(f)
-            # check if the function is actually defined in this module (not imported)
-            if code.co_filename == module.__file__:  # or we could use f.__module__ == module.__name__ ?
-                #  - with the optional filter/tag
-                _tags = getattr(f, CASE_TAGS_FIELD, ())
-
-                selected = True  # by default select the case, then AND the conditions
-                if has_tag is not None:
-                    selected = selected and (has_tag in _tags)
-                if filter is not None:
-                    selected = selected and filter(_tags)
-
-                if selected:
-                    # update the dictionary with the case getters
-                    _get_case_getter_s(f, code, cases_dct)
+    for f_lineno, f_name, f in select_module_cases(module, has_tag=has_tag, filter=filter, tag_expr=tag_expr):
+        # update the dictionary with the case getters
+        _get_case_getter_s(f, f_lineno, cases_dct, shard)
 
     # convert into a list, taking all cases in order of appearance in the code (sort by source code line number)
     cases = [cases_dct[k] for k in sorted(cases_dct.keys())]
@@ -692,9 +1080,11 @@ def extract_cases_from_module(module,        # type: ModuleType
     return cases
 
 
+@timed_section('_get_case_getter_s')
 def _get_case_getter_s(f,
-                       f_code=None,
-                       cases_dct=None):
+                       f_lineno=None,
+                       cases_dct=None,
+                       shard=None):
     # type: (...) -> Optional[List[CaseDataFromFunction]]
     """
     Creates the case function getter or the several cases function getters (in case of a generator) associated with
@@ -702,8 +1092,10 @@ def _get_case_getter_s(f,
     For generated cases, a floating line number is created to preserve order.
 
     :param f:
-    :param f_code: should be provided if cases_dct is provided.
+    :param f_lineno: the line number of the function in its source file. Should be provided if cases_dct is provided.
     :param cases_dct: an optional dictionary where to store the created function wrappers
+    :param shard: an optional tuple (index, count) as returned by `parse_shard`. Only the cases belonging to this shard
+        will be created
     :return:
     """
 
@@ -716,57 +1108,37 @@ def _get_case_getter_s(f,
     # Handle case generators
     gen = getattr(f, _GENERATOR_FIELD, False)
     if gen:
-        already_used_names = []
-
         names, param_ids, all_param_values_combinations = gen
+        generated_cases = _GeneratedCases(f, names, param_ids, all_param_values_combinations)
+        nb_cases_generated = len(generated_cases)
 
-        if isinstance(names, str):
-            # then this is a string formatter creating the names
-            _formatter = names
-            def names(**params):
-                return _formatter.format(**params)
-
-        nb_cases_generated = len(all_param_values_combinations)
-        if not callable(names):
-            if len(names) != nb_cases_generated:
-                raise ValueError("An explicit list of names has been provided but it has not the same length (%s) than"
-                                 " the number of cases to be generated (%s)" % (len(names), nb_cases_generated))
-
-        for gen_case_id, case_params_values in enumerate(all_param_values_combinations):
-            # build the dictionary of parameters for the case functions
-            gen_case_params_dct = dict(zip(param_ids, case_params_values))
-
-            # generate the case name by applying the name template
-            if callable(names):
-                gen_case_name = names(**gen_case_params_dct)
-            else:
-                # an explicit list is provided
-                gen_case_name = names[gen_case_id]
+        nb_created = 0
+        for gen_case_id in range(nb_cases_generated):
+            if shard is not None and not is_in_shard(generated_cases.get_name(gen_case_id), shard):
+                continue
+            nb_created += 1
 
-            if gen_case_name in already_used_names:
-                raise ValueError("Generated function names for generator case function {} are not "
-                                 "unique. Please use all parameter names in the string format variables"
-                                 "".format(f.__name__))
-            else:
-                already_used_names.append(gen_case_name)
-            case_getter = CaseDataFromFunction(f, gen_case_name, gen_case_params_dct)
+            # the name and parameters of the case will be created when needed
+            case_getter = GeneratedCaseDataFromFunction(generated_cases, gen_case_id)
 
             # save the result in the list or the dict
             if cases_dct is None:
                 cases_list.append(case_getter)
             else:
                 # with an artificial floating point line number to keep order in dict
-                gen_line_nb = f_code.co_firstlineno + (gen_case_id / nb_cases_generated)
+                gen_line_nb = f_lineno + (gen_case_id / nb_cases_generated)
                 cases_dct[gen_line_nb] = case_getter
-    else:
+        count_getters(nb_created)
+    elif is_in_shard(f.__name__, shard):
         # single case
         case_getter = CaseDataFromFunction(f)
+        count_getters(1)
 
         # save the result
         if cases_dct is None:
             cases_list.append(case_getter)
         else:
-            cases_dct[f_code.co_firstlineno] = case_getter
+            cases_dct[f_lineno] = case_getter
 
     if cases_dct is None:
         return cases_list
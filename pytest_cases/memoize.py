@@ -0,0 +1,566 @@
+"""
+Memoization of case data:
+
+ - session-wide: the results of `CaseDataGetter.get()` are stored in a LRU cache with a memory budget, so that cases
+   used by several tests are computed only once.
+ - for cases decorated with `@case_cache`: in memory for the whole session, or persisted in the pytest cache directory
+   and reused across sessions.
+"""
+import os
+import sys
+from collections import OrderedDict
+from hashlib import sha1
+from io import BytesIO
+from pickle import Pickler, Unpickler, UnpicklingError, HIGHEST_PROTOCOL, dumps
+from types import FunctionType, MethodType, ModuleType, CodeType
+from warnings import warn
+
+try:  # python 3.3+
+    from os import replace as _replace_file
+except ImportError:
+    from os import rename as _replace_file
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, Hashable, Optional, Tuple  # noqa
+except ImportError:
+    pass
+
+from pytest_cases.async_cases import call_case_function
+from pytest_cases.case_catalog import _get_code
+from pytest_cases.case_funcs import CASE_CACHE_FIELD
+from pytest_cases.common import get_pytest_cache
+
+
+NOT_MEMOIZED = object()
+"""Marker returned by `get_memoized_result` when no result is available for a case"""
+
+
+def get_size(obj):
+    # type: (...) -> int
+    """
+    Returns an estimate of the memory used by `obj`, in bytes. Containers (tuple, list, set, dict) and object
+    attributes are explored recursively (except for modules, classes and functions), and shared objects are only
+    counted once. Objects implementing `__sizeof__` such as numpy arrays report their own size, including their data
+    buffer when they own it.
+
+    :param obj:
+    :return:
+    """
+    seen = set()
+    size = 0
+    to_visit = [obj]
+    while len(to_visit) > 0:
+        o = to_visit.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+
+        if isinstance(o, dict):
+            to_visit.extend(o.keys())
+            to_visit.extend(o.values())
+        elif isinstance(o, (tuple, list, set, frozenset)):
+            to_visit.extend(o)
+        elif hasattr(o, '__dict__') and not isinstance(o, (type, ModuleType, FunctionType, MethodType)):
+            to_visit.append(vars(o))
+    return size
+
+
+class CaseResultsCache(object):
+    """
+    A LRU cache for case results, with a memory budget in bytes. When adding a result would exceed the budget, the
+    least recently used results are evicted. Results larger than the budget are never stored.
+    """
+    __slots__ = 'budget', 'size', 'hits', 'misses', 'evictions', '_entries'
+
+    def __init__(self, budget  # type: int
+                 ):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (result, size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key  # type: Hashable
+            ):
+        """
+        Returns the result stored for `key` and marks it as the most recently used, or `NOT_MEMOIZED`.
+
+        :param key:
+        :return:
+        """
+        try:
+            res, res_size = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return NOT_MEMOIZED
+        else:
+            self.hits += 1
+            self._entries[key] = res, res_size
+            return res
+
+    def put(self, key,  # type: Hashable
+            result      # type: Any
+            ):
+        """
+        Stores `result` for `key`, evicting the least recently used results if needed.
+
+        :param key:
+        :param result:
+        :return:
+        """
+        res_size = get_size(result)
+        if res_size > self.budget:
+            return
+
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        while self.size + res_size > self.budget:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+        self._entries[key] = result, res_size
+        self.size += res_size
+
+    def get_stats(self):
+        # type: (...) -> Dict[str, int]
+        """Returns a dictionary of counters describing the cache usage"""
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, entries=len(self._entries),
+                    size=self.size, budget=self.budget)
+
+
+_CACHE = None
+"""The session-wide cache, if memoization is enabled"""
+
+_RESULTS_SHARING = False
+"""True if case results may come from elsewhere than a call to the case function: the session-wide cache, prefetching,
+async gathering or the xdist shared store. When False, `CaseDataGetter.get()` directly calls the case function."""
+
+
+def enable_results_sharing(enabled=True  # type: bool
+                           ):
+    """
+    Indicates whether case results may be shared in this session (see `_RESULTS_SHARING`). Called by the plugin when
+    one of the features sharing results is active.
+
+    :param enabled:
+    :return:
+    """
+    global _RESULTS_SHARING
+    _RESULTS_SHARING = enabled
+
+
+def is_results_sharing_enabled():
+    """Returns True if case results may be shared in this session, see `enable_results_sharing`"""
+    return _RESULTS_SHARING
+
+
+def enable_memoization(budget  # type: int
+                       ):
+    """
+    Enables session-wide memoization of case results with the given memory budget in bytes. A budget of 0 disables it.
+
+    :param budget:
+    :return:
+    """
+    global _CACHE
+    _CACHE = CaseResultsCache(budget) if budget > 0 else None
+
+
+def get_memoization_cache():
+    """Returns the session-wide `CaseResultsCache`, or None if memoization is disabled"""
+    return _CACHE
+
+
+def get_memoized_result(case_key  # type: Hashable
+                        ):
+    """
+    Returns the memoized result for the case with key `case_key`, or `NOT_MEMOIZED`.
+
+    :param case_key:
+    :return:
+    """
+    if _CACHE is None:
+        return NOT_MEMOIZED
+    return _CACHE.get(case_key)
+
+
+def memoize_result(case_key,  # type: Hashable
+                   result     # type: Any
+                   ):
+    """
+    Stores the result for the case with key `case_key`, if memoization is enabled.
+
+    :param case_key:
+    :param result:
+    :return:
+    """
+    if _CACHE is not None:
+        _CACHE.put(case_key, result)
+
+
+# ---- results of the case functions decorated with @case_cache ----
+
+PERSIST_DIR_NAME = 'pytest_cases_results'
+"""Name of the directory where the persisted results are stored, in the pytest cache directory"""
+
+MMAP_MIN_SIZE = 64 * 1024
+"""Numpy arrays larger than this size (in bytes) are stored in separate files, and memory-mapped when loaded"""
+
+NOT_PERSISTED = object()
+"""Marker returned by `load_persisted_result` when no result is available for a case"""
+
+_CASE_CACHE_RESULTS = dict()
+"""The results of case functions decorated with @case_cache(persist=False)"""
+
+
+def compute_case(f,      # type: Callable
+                 kwargs  # type: Dict[str, Any]
+                 ):
+    """
+    Returns the result of case function `f` called with `kwargs` (awaited if `f` is an `async def` function). If `f`
+    is decorated with `@case_cache`, the cached result is returned if available, and the result is stored in the cache
+    otherwise.
+
+    :param f:
+    :param kwargs:
+    :return:
+    """
+    persist = getattr(f, CASE_CACHE_FIELD, None)
+    if persist is None:
+        return call_case_function(f, **kwargs)
+
+    if persist:
+        location = _get_persist_location(f, kwargs)
+        if location is not None:
+            res = _load_result(location)
+            if res is NOT_PERSISTED:
+                res = call_case_function(f, **kwargs)
+                _persist_result(location, f, res)
+            return res
+        # else the result can not be persisted: keep it in memory
+
+    key = f, tuple(sorted(kwargs.items()))
+    try:
+        return _CASE_CACHE_RESULTS[key]
+    except TypeError:
+        # non-hashable parameters
+        return call_case_function(f, **kwargs)
+    except KeyError:
+        res = _CASE_CACHE_RESULTS[key] = call_case_function(f, **kwargs)
+        return res
+
+
+def clear_case_cache_results():
+    """Forgets the results of the case functions decorated with @case_cache(persist=False), at the end of a session"""
+    _CASE_CACHE_RESULTS.clear()
+
+
+def store_case_result(f,       # type: Callable
+                      kwargs,  # type: Dict[str, Any]
+                      res      # type: Any
+                      ):
+    """
+    Stores a result of case function `f` computed elsewhere (for example prefetched in a worker process) in the cache
+    of `f`, if it is decorated with `@case_cache`.
+
+    :param f:
+    :param kwargs:
+    :param res:
+    :return:
+    """
+    persist = getattr(f, CASE_CACHE_FIELD, None)
+    if persist is None:
+        return
+
+    if persist:
+        location = _get_persist_location(f, kwargs)
+        if location is not None:
+            _persist_result(location, f, res)
+            return
+
+    try:
+        _CASE_CACHE_RESULTS[(f, tuple(sorted(kwargs.items())))] = res
+    except TypeError:
+        # non-hashable parameters
+        pass
+
+
+_REPR_TYPES = (type(None), bool, int, float, complex, str, bytes) + ((long, unicode) if sys.version_info < (3,)  # noqa
+                                                                     else ())
+"""The types whose `repr` is a stable representation of their value"""
+
+
+class UnstableValueError(ValueError):
+    """Raised by `_stable_repr` when a value has no representation that is stable across sessions"""
+
+
+def _stable_repr(o):
+    # type: (...) -> str
+    """
+    A representation of `o` that does not depend on the current python session (memory addresses, hash seed).
+    Functions and code objects are represented by a hash of their code, numpy arrays by a hash of their data, and
+    other objects by a hash of their pickle. Raises `UnstableValueError` if `o` can not be pickled.
+    """
+    if isinstance(o, (FunctionType, CodeType)):
+        h = sha1()
+        _update_hash_with_code(h, o if isinstance(o, CodeType) else o.__code__)
+        return '<code %s>' % h.hexdigest()
+    elif type(o) in _REPR_TYPES:
+        return repr(o)
+    elif isinstance(o, (set, frozenset)):
+        return '%s({%s})' % (type(o).__name__, ', '.join(sorted(_stable_repr(v) for v in o)))
+    elif isinstance(o, (tuple, list)):
+        return '%s(%s)' % (type(o).__name__, ', '.join(_stable_repr(v) for v in o))
+    elif isinstance(o, dict):
+        return 'dict(%s)' % ', '.join(sorted('%s: %s' % (_stable_repr(k), _stable_repr(v)) for k, v in o.items()))
+    elif isinstance(o, type):
+        return '<class %s.%s>' % (o.__module__, getattr(o, '__qualname__', o.__name__))
+    elif isinstance(o, ModuleType):
+        return '<module %s>' % o.__name__
+    elif np is not None and isinstance(o, np.ndarray) and not o.dtype.hasobject:
+        # note: the repr of large arrays is truncated, so it does not change with all values
+        return '<ndarray %s %s %s>' % (o.dtype.str, o.shape, sha1(np.ascontiguousarray(o).tobytes()).hexdigest())
+    else:
+        try:
+            data = dumps(o, protocol=2)
+        except Exception as e:
+            raise UnstableValueError("%s object can not be pickled: [%s] %s" % (type(o).__name__, type(e).__name__, e))
+        return '<%s %s>' % (type(o).__name__, sha1(data).hexdigest())
+
+
+def _update_hash_with_code(h, code):
+    """Updates hash `h` with the contents of code object `code`, including nested code objects"""
+    h.update(code.co_code)
+    h.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode('utf-8'))
+    for c in code.co_consts:
+        h.update(_stable_repr(c).encode('utf-8'))
+
+
+def _get_persisted_file_prefix(f,      # type: Callable
+                               kwargs  # type: Dict[str, Any]
+                               ):
+    # type: (...) -> Tuple[str, str]
+    """
+    Returns a tuple `(function_id, file_prefix)` where `function_id` identifies case function `f`, and `file_prefix` is
+    the prefix of the files where the result of `f(**kwargs)` is stored:
+    `<function_id>-<hash of the code, defaults and closure>-<hash of kwargs>`.
+
+    :param f:
+    :param kwargs:
+    :return:
+    """
+    # unwrap decorators such as @lru_cache to get the actual function
+    inner_f = f
+    while hasattr(inner_f, '__wrapped__'):
+        inner_f = inner_f.__wrapped__
+
+    function_id = sha1(('%s.%s' % (f.__module__, getattr(f, '__qualname__', f.__name__))).encode('utf-8'))
+
+    code_hash = sha1(repr(sys.version_info[:2]).encode('utf-8'))
+    _update_hash_with_code(code_hash, _get_code(f))
+    code_hash.update(_stable_repr(getattr(inner_f, '__defaults__', None)).encode('utf-8'))
+    for cell in getattr(inner_f, '__closure__', None) or ():
+        code_hash.update(_stable_repr(cell.cell_contents).encode('utf-8'))
+
+    kwargs_hash = sha1(_stable_repr(kwargs).encode('utf-8'))
+
+    function_id = function_id.hexdigest()[:16]
+    return function_id, '%s-%s-%s' % (function_id, code_hash.hexdigest()[:16], kwargs_hash.hexdigest()[:16])
+
+
+def _get_persist_dir():
+    # type: (...) -> Optional[str]
+    """Returns the directory where the persisted results are stored, or None if the pytest cache is not available"""
+    cache = get_pytest_cache()
+    if cache is None:
+        return None
+    try:  # pytest 6.1+
+        return str(cache.mkdir(PERSIST_DIR_NAME))
+    except AttributeError:
+        return str(cache.makedir(PERSIST_DIR_NAME))
+
+
+_NOT_PERSISTABLE = set()
+"""The names of the case functions whose results could not be persisted, so that the warning is only issued once"""
+
+
+def _get_persist_location(f,      # type: Callable
+                          kwargs  # type: Dict[str, Any]
+                          ):
+    # type: (...) -> Optional[Tuple[str, str, str]]
+    """
+    Returns a tuple `(persist_dir, function_id, file_prefix)` describing where the result of `f(**kwargs)` is
+    persisted, see `_get_persisted_file_prefix`. Returns None if the pytest cache is not available, or if the default
+    values, closure or parameters of `f` can not be represented in a stable way (a warning is issued): the result is
+    then only kept in memory.
+
+    :param f:
+    :param kwargs:
+    :return:
+    """
+    persist_dir = _get_persist_dir()
+    if persist_dir is None:
+        return None
+
+    try:
+        function_id, file_prefix = _get_persisted_file_prefix(f, kwargs)
+    except UnstableValueError as e:
+        if f.__name__ not in _NOT_PERSISTABLE:
+            _NOT_PERSISTABLE.add(f.__name__)
+            warn("The results of case function %s can not be persisted, they will only be kept in memory: its default "
+                 "values, closure or parameters can not be identified across sessions (%s)" % (f.__name__, e))
+        return None
+
+    return persist_dir, function_id, file_prefix
+
+
+class _ResultPickler(Pickler):
+    """A pickler storing the large numpy arrays aside, so that they can be saved in separate .npy files"""
+
+    def __init__(self, file):
+        Pickler.__init__(self, file, HIGHEST_PROTOCOL)
+        self.arrays = []
+
+    def persistent_id(self, obj):
+        if np is not None and type(obj) is np.ndarray and not obj.dtype.hasobject and obj.nbytes >= MMAP_MIN_SIZE:
+            self.arrays.append(obj)
+            return 'ndarray:%s' % (len(self.arrays) - 1)
+        else:
+            return None
+
+
+class _ResultUnpickler(Unpickler):
+    """An unpickler memory-mapping the numpy arrays stored in separate .npy files by `_ResultPickler`"""
+
+    def __init__(self, file, file_prefix):
+        Unpickler.__init__(self, file)
+        self.file_prefix = file_prefix
+
+    def persistent_load(self, pid):
+        return np.load('%s.%s.npy' % (self.file_prefix, pid.split(':')[1]), mmap_mode='r')
+
+
+def load_persisted_result(f,      # type: Callable
+                          kwargs  # type: Dict[str, Any]
+                          ):
+    """
+    Returns the persisted result of `f(**kwargs)`, or `NOT_PERSISTED` if it is not available. Large numpy arrays are
+    memory-mapped in read-only mode.
+
+    :param f:
+    :param kwargs:
+    :return:
+    """
+    location = _get_persist_location(f, kwargs)
+    if location is None:
+        return NOT_PERSISTED
+    return _load_result(location)
+
+
+def _load_result(location  # type: Tuple[str, str, str]
+                 ):
+    """ Implementation of `load_persisted_result`, from the location returned by `_get_persist_location` """
+    persist_dir, _, file_prefix = location
+    file_prefix = os.path.join(persist_dir, file_prefix)
+    try:
+        with open(file_prefix + '.pkl', 'rb') as file:
+            return _ResultUnpickler(file, file_prefix).load()
+    except (IOError, OSError):
+        # no result or incomplete result
+        return NOT_PERSISTED
+    except (UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+        # truncated or corrupt result, or result referencing a class or module that was renamed or moved: remove it so
+        # that it is computed and persisted again
+        _remove_result(persist_dir, file_prefix)
+        return NOT_PERSISTED
+
+
+def _remove_result(persist_dir,  # type: str
+                   file_prefix   # type: str
+                   ):
+    """Removes the files of a persisted result: its .pkl file and the .npy files of its arrays"""
+    name_prefix = os.path.basename(file_prefix) + '.'
+    for file_name in os.listdir(persist_dir):
+        if file_name.startswith(name_prefix) and file_name.endswith(('.pkl', '.npy')):
+            try:
+                os.remove(os.path.join(persist_dir, file_name))
+            except OSError:
+                pass
+
+
+def has_persisted_result(f,      # type: Callable
+                         kwargs  # type: Dict[str, Any]
+                         ):
+    # type: (...) -> bool
+    """Returns True if the result of `f(**kwargs)` has been persisted"""
+    location = _get_persist_location(f, kwargs)
+    if location is None:
+        return False
+    persist_dir, _, file_prefix = location
+    return os.path.exists(os.path.join(persist_dir, file_prefix + '.pkl'))
+
+
+def persist_result(f,       # type: Callable
+                   kwargs,  # type: Dict[str, Any]
+                   result   # type: Any
+                   ):
+    """
+    Stores the result of `f(**kwargs)` in the pytest cache directory. Results persisted for a previous version of the
+    case function are removed. Nothing is stored if the result can not be persisted, see `_get_persist_location`.
+
+    :param f:
+    :param kwargs:
+    :param result:
+    :return:
+    """
+    location = _get_persist_location(f, kwargs)
+    if location is not None:
+        _persist_result(location, f, result)
+
+
+def _persist_result(location,  # type: Tuple[str, str, str]
+                    f,         # type: Callable
+                    result     # type: Any
+                    ):
+    """ Implementation of `persist_result`, to the location returned by `_get_persist_location` """
+    persist_dir, function_id, file_prefix = location
+    code_prefix = file_prefix.rsplit('-', 1)[0]
+    file_prefix = os.path.join(persist_dir, file_prefix)
+    tmp_file = '%s.%s.tmp' % (file_prefix, os.getpid())
+    try:
+        buffer = BytesIO()
+        pickler = _ResultPickler(buffer)
+        pickler.dump(result)
+
+        # write the arrays first, so that the .pkl file is only visible once all files are ready
+        for i, arr in enumerate(pickler.arrays):
+            with open(tmp_file, 'wb') as file:
+                np.save(file, arr)
+            _replace_file(tmp_file, '%s.%s.npy' % (file_prefix, i))
+
+        with open(tmp_file, 'wb') as file:
+            file.write(buffer.getvalue())
+        _replace_file(tmp_file, file_prefix + '.pkl')
+
+    except Exception as e:
+        warn("Unable to persist the result of case function %s: [%s] %s" % (f.__name__, type(e).__name__, e))
+        return
+
+    # remove the results persisted for previous versions of the case function
+    for file_name in os.listdir(persist_dir):
+        if file_name.startswith(function_id) and not file_name.startswith(code_prefix):
+            try:
+                os.remove(os.path.join(persist_dir, file_name))
+            except OSError:
+                pass
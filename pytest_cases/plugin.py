@@ -0,0 +1,721 @@
+"""
+The pytest plugin of pytest-cases. It is automatically registered by pytest through the `pytest11` entry point declared
+in `setup.py`.
+
+It gives the decorators (that are executed at collection time, when the test modules are imported) access to the
+current pytest session configuration: cache directory and command-line options.
+
+It also provides the hooks required by the features that need to see all collected tests, such as prefetching:
+the case getters used by each test item are indexed once the items are collected (`pytest_collection_modifyitems`),
+see `get_case_getters`.
+"""
+import json
+import os
+from argparse import ArgumentTypeError
+from warnings import warn
+
+import pytest
+
+from pytest_cases.common import set_pytest_config, set_id_max_length, DEFAULT_ID_MAX_LENGTH
+from pytest_cases.main import CaseDataFromFunctionBase, GeneratedCaseDataFromFunction, get_lazy_fixture_params
+from pytest_cases.case_stats import enable_case_stats, is_case_stats_enabled, get_case_id, record_test_duration, \
+    get_slowest_cases, get_slowest_tested_cases, TestCasesStats
+from pytest_cases.case_funcs import CASE_CACHE_FIELD
+from pytest_cases.collect_stats import enable_collect_stats, get_collect_stats
+from pytest_cases.case_history import enable_history, is_history_enabled, load_history, save_history, \
+    record_case_result, get_history_sort_key, get_case_total_duration, get_next_run
+from pytest_cases.async_cases import is_async_case_function, register_async_cases, gather_test_cases, \
+    clear_async_cases
+from pytest_cases.dedupe import is_dedupe_requested, get_case_digest, clear_dedupe, keep_collected_results, \
+    has_collected_result
+from pytest_cases.memoize import enable_memoization, get_memoization_cache, has_persisted_result, \
+    enable_results_sharing, clear_case_cache_results
+from pytest_cases.prefetch import is_prefetch_requested, start_prefetch, stop_prefetch, start_lookahead, \
+    advance_lookahead, release_lookahead
+from pytest_cases.shared_store import is_shared_store_supported, create_store_dir, enable_shared_store, \
+    is_shared_store_enabled, remove_store_dir
+from pytest_cases.sharding import parse_shard, balance_shards, extend_shard_assignment, read_shard_manifest, \
+    write_shard_manifest
+from pytest_cases.tag_expr import compile_tag_expression
+
+
+def _shard_option(value):
+    """argparse `type` for the --cases-shard option"""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
+
+
+def _tag_expression_option(value):
+    """argparse `type` for the --cases-tags option"""
+    try:
+        return compile_tag_expression(value)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
+
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def _size_option(value):
+    """argparse `type` for memory sizes such as '1024', '500K', '256M' or '2G'"""
+    value = value.strip().upper()
+    if value.endswith('B'):
+        value = value[:-1]
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ''
+    try:
+        return int(float(value[:len(value) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ArgumentTypeError("Invalid size %r: it should be a number of bytes, optionally followed by K, M or G"
+                                % value)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cases', 'pytest-cases')
+    group.addoption('--cases-shard', action='store', dest='cases_shard', type=_shard_option, default=None,
+                    metavar='INDEX/COUNT',
+                    help="only collect the cases belonging to shard INDEX (0-based) among COUNT shards, in all tests "
+                         "parametrized with @cases_data. Cases are assigned to shards using a stable hash of their "
+                         "id (see --cases-shard-mode), so all nodes compute the same partition.")
+    group.addoption('--cases-shard-mode', action='store', dest='cases_shard_mode', choices=('hash', 'duration'),
+                    default='hash',
+                    help="how cases are assigned to shards with --cases-shard. 'hash' (default) uses a stable hash of "
+                         "the case id. 'duration' collects all cases, and assigns them so that the shards have "
+                         "roughly the same total duration, based on the durations recorded in the pytest cache. "
+                         "Cases without history are given the mean duration of the other cases.")
+    group.addoption('--cases-shard-manifest', action='store', dest='cases_shard_manifest', default=None,
+                    metavar='PATH',
+                    help="with --cases-shard-mode=duration, read the shard of each case from json file PATH if it "
+                         "exists, or write it there otherwise. Computing the manifest once and sharing it with all "
+                         "nodes ensures that they use the same partition, even if their caches differ. Cases that "
+                         "are not in the manifest are assigned to the least loaded shards.")
+    group.addoption('--cases-tags', action='store', dest='cases_tags', type=_tag_expression_option, default=None,
+                    metavar='EXPRESSION',
+                    help="only collect the cases whose tags match EXPRESSION, in all tests parametrized with "
+                         "@cases_data. EXPRESSION is a boolean expression of tag names with 'and', 'or', 'not' and "
+                         "parenthesis, for example 'fast and not (slow or flaky)'.")
+    group.addoption('--cases-prefetch', action='store', dest='cases_prefetch', type=int, default=0, metavar='N',
+                    help="compute the data of all cases in a pool of N worker processes before the tests run. "
+                         "Default 0 (only cases from tests decorated with @cases_data(prefetch=True) are prefetched, "
+                         "with one worker process per processor).")
+    group.addoption('--cases-prefetch-lookahead', action='store', dest='cases_prefetch_lookahead', type=int,
+                    default=0, metavar='K',
+                    help="while each test runs, compute the data of the cases used by the next K tests in a pool of K "
+                         "threads, so that I/O such as reading files overlaps with the tests execution. Each result "
+                         "is released once used. Default 0 (disabled). Not supported with pytest-xdist.")
+    group.addoption('--cases-async-gather', action='store', dest='cases_async_gather', type=int, default=None,
+                    metavar='N',
+                    help="await the data of all the `async def` cases used by a test function at once with "
+                         "asyncio.gather, with at most N cases awaited at the same time (0 for no limit), before its "
+                         "first test runs. By default each async case is awaited when its data is retrieved.")
+    group.addoption('--cases-memo-budget', action='store', dest='cases_memo_budget', type=_size_option, default=0,
+                    metavar='SIZE',
+                    help="memoize the case data returned by `case_data.get()` during the whole session, so that cases "
+                         "used by several tests are computed once. SIZE is the memory budget, for example 500M or 2G: "
+                         "least recently used results are evicted when it is exceeded. Default 0 (disabled).")
+    group.addoption('--cases-shared-memory', action='store_true', dest='cases_shared_memory', default=False,
+                    help="with pytest-xdist, compute the data of each case in a single worker process, and share it "
+                         "with the other workers through shared memory: numpy arrays and other buffers are used in "
+                         "place, without copies. Requires python 3.8+ and a POSIX system.")
+    group.addoption('--cases-id-max-length', action='store', dest='cases_id_max_length', type=int,
+                    default=DEFAULT_ID_MAX_LENGTH, metavar='N',
+                    help="maximum length of the test ids created by pytest-cases for the cases and parameter values. "
+                         "Longer ids are truncated and end with a hash of the complete id, and values with more than "
+                         "10000 elements or bytes are identified by a hash of their contents. Default 0 (no limit).")
+    group.addoption('--cases-order', action='store', dest='cases_order', choices=('source', 'history'),
+                    default='source',
+                    help="order of the parametrized items of each test function using cases. 'source' (default) "
+                         "keeps the order of the cases in the source code. 'history' runs first the items using "
+                         "cases that failed recently, then the items using cases without history, then the others "
+                         "longest first, based on the durations and outcomes recorded in the pytest cache.")
+    group.addoption('--cases-dedupe', action='store_true', dest='cases_dedupe', default=False,
+                    help="execute only once the tests that only differ by cases returning identical data, in all "
+                         "tests using cases. The data of each case is computed after collection and identified with "
+                         "a hash of its pickled contents. The duplicate tests are skipped, and listed in the terminal "
+                         "summary.")
+    group.addoption('--cases-stats', action='store_true', dest='cases_stats', default=False,
+                    help="display statistics about the cases in the terminal summary: number of cases used by each "
+                         "test function (generated and plain), slowest case getters, and cases with the slowest "
+                         "tests.")
+    group.addoption('--cases-collect-stats', action='store_true', dest='cases_collect_stats', default=False,
+                    help="measure the time spent and the objects created by the pytest-cases decorators during "
+                         "collection, for each decorated test function or fixture, and display the slowest ones in "
+                         "the terminal summary.")
+    group.addoption('--cases-collect-stats-json', action='store', dest='cases_collect_stats_json', default=None,
+                    metavar='PATH',
+                    help="same as --cases-collect-stats, and also export the statistics of all decorated test "
+                         "functions and fixtures in json file PATH.")
+
+
+def pytest_configure(config):
+    # remember the config so that the decorators can access it
+    set_pytest_config(config)
+
+    enable_memoization(config.getoption('cases_memo_budget'))
+    set_id_max_length(config.getoption('cases_id_max_length'))
+
+    # note: the test modules are imported after this hook, so the statistics will cover all decorators
+    if config.getoption('cases_collect_stats') or config.getoption('cases_collect_stats_json') is not None:
+        enable_collect_stats()
+
+    if config.getoption('cases_stats'):
+        enable_case_stats()
+
+    if config.getoption('cases_order') == 'history' or config.getoption('cases_shard_mode') == 'duration':
+        # the durations and outcomes of the cases in previous sessions
+        enable_history()
+        load_history(getattr(config, 'cache', None))
+
+    if config.getoption('cases_shared_memory'):
+        workerinput = getattr(config, 'workerinput', None)
+        if workerinput is not None:
+            # an xdist worker: use the directory created by the controller, see `pytest_configure_node`
+            enable_shared_store(workerinput.get('cases_shared_store', None))
+        elif not is_shared_store_supported():
+            warn("--cases-shared-memory requires python 3.8+ and a POSIX system. It will be disabled")
+
+    # the case getters only look for shared results if a feature provides them, see `CaseDataFromFunctionBase._get`
+    enable_results_sharing(get_memoization_cache() is not None or is_shared_store_enabled())
+
+    if config.getoption('cases_shard_mode') == 'duration' and config.getoption('cases_shard') is None:
+        raise pytest.UsageError("--cases-shard-mode=duration requires --cases-shard")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_generate_tests(metafunc):
+    """
+    Passes their parameters to the `@pytest_fixture_plus` fixtures used by this test function, if they were not passed
+    yet (see `main.get_lazy_fixture_params`), before pytest parametrizes the test with them.
+    """
+    arg2fixturedefs = getattr(metafunc, '_arg2fixturedefs', {})
+    for argname in metafunc.fixturenames:
+        for fixturedef in arg2fixturedefs.get(argname, ()):
+            if fixturedef.params is None:
+                lazy_params = get_lazy_fixture_params(fixturedef.func)
+                if lazy_params is not None:
+                    fixturedef.params = tuple(lazy_params)
+    yield
+
+
+_CASE_GETTERS = dict()
+"""The case getters used by each collected test item, by node id. See `pytest_collection_modifyitems`"""
+
+_CASES_PER_TEST = []
+"""The number of cases used by each test function, when --cases-stats is set. See `pytest_collection_finish`"""
+
+
+_SHARED_STORE_DIR = []
+"""The directory used by the xdist workers to coordinate through the shared store, see `pytest_configure_node`"""
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    pytest-xdist hook, called on the controller for each worker: passes the number of the session in the cases history
+    (the workers record the history, see `pytest_sessionfinish`), and the shared store directory
+    """
+    config = node.config
+    node.workerinput['cases_history_run'] = get_next_run()
+    if config.getoption('cases_shared_memory') and is_shared_store_supported():
+        if len(_SHARED_STORE_DIR) == 0:
+            _SHARED_STORE_DIR.append(create_store_dir())
+        node.workerinput['cases_shared_store'] = _SHARED_STORE_DIR[0]
+
+
+def get_case_getters(item):
+    """
+    Returns the list of case getters used by a test item, through `@cases_data` or fixtures parametrized with it.
+
+    :param item:
+    :return:
+    """
+    try:
+        return _CASE_GETTERS[item.nodeid]
+    except KeyError:
+        return _find_case_getters(item)
+
+
+def _find_case_getters(item):
+    """ Implementation of `get_case_getters`, without the index """
+    callspec = getattr(item, 'callspec', None)
+    if callspec is None:
+        return []
+
+    # old pytest versions store direct parameters in `funcargs` and fixture parameters in `params`
+    params = list(getattr(callspec, 'funcargs', {}).values())
+    params += callspec.params.values()
+    return [p for p in params if isinstance(p, CaseDataFromFunctionBase)]
+
+
+def get_test_id(item):
+    """
+    Returns the id of the test function of a test item: its node id without the parameters.
+
+    :param item:
+    :return:
+    """
+    return item.nodeid.split('[', 1)[0]
+
+
+def pytest_collection_modifyitems(session, config, items):
+    # index the case getters used by each item, for the features that need them (prefetch, statistics...)
+    for item in items:
+        _CASE_GETTERS[item.nodeid] = _find_case_getters(item)
+
+    shard = config.getoption('cases_shard')
+    if shard is not None and config.getoption('cases_shard_mode') == 'duration':
+        # the xdist controller does not collect: the manifest is written by the first worker only
+        selected, deselected = _select_balanced_shard(items, shard, config.getoption('cases_shard_manifest'),
+                                                      write_manifest=_is_first_process(config))
+        if len(deselected) > 0:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    if not config.option.collectonly:
+        _skip_duplicate_items(items, config.getoption('cases_dedupe'))
+
+    if config.getoption('cases_order') == 'history':
+        items[:] = _sort_items_by_history(items)
+
+
+def _is_first_process(config):
+    """ Returns True if this process is not an xdist worker, or if it is the first xdist worker """
+    workerinput = getattr(config, 'workerinput', None)
+    return workerinput is None or workerinput.get('workerid', None) == 'gw0'
+
+
+DEFAULT_CASE_DURATION = 1.
+"""The estimated duration of a case without history, when no case has history"""
+
+
+def _get_item_shard_key(item):
+    """ Returns the id of the case that determines the shard of an item, or None if it does not use cases """
+    case_getters = get_case_getters(item)
+    return get_case_id(case_getters[0]) if len(case_getters) > 0 else None
+
+
+def _select_balanced_shard(items, shard, manifest_path=None, write_manifest=True):
+    """
+    Implementation of `--cases-shard-mode=duration`: assigns the cases used by `items` to shards so that the shards
+    have roughly the same total duration (see `sharding.balance_shards`), and selects the items of shard `shard`.
+
+    The weight of each case is its total duration in the history (see `get_case_total_duration`), or the mean weight
+    of the cases with history if it has none. An item using several cases goes with its first case. Items that do not
+    use any case are selected in all shards, as with the hash-based sharding.
+
+    :param items:
+    :param shard: a tuple (index, count)
+    :param manifest_path: an optional path to a shard manifest, that is read if it exists, and written otherwise
+    :param write_manifest: False to never write the shard manifest
+    :return: a tuple (selected items, deselected items)
+    """
+    index, count = shard
+    case_ids = set(_get_item_shard_key(item) for item in items)
+    case_ids.discard(None)
+
+    known = dict((case_id, get_case_total_duration(case_id)) for case_id in case_ids)
+    known = dict((case_id, d) for case_id, d in known.items() if d is not None)
+    default = (sum(known.values()) / len(known)) if len(known) > 0 else DEFAULT_CASE_DURATION
+    weights = dict((case_id, known.get(case_id, default)) for case_id in case_ids)
+
+    if manifest_path is not None and os.path.exists(manifest_path):
+        try:
+            assignment, loads = read_shard_manifest(manifest_path)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+        if len(loads) != count:
+            raise pytest.UsageError("The shard manifest %r contains %s shards, but --cases-shard requires %s"
+                                    % (manifest_path, len(loads), count))
+        extend_shard_assignment(assignment, loads, weights)
+    else:
+        assignment, loads = balance_shards(weights, count)
+        if manifest_path is not None and write_manifest:
+            write_shard_manifest(manifest_path, assignment, loads)
+
+    selected, deselected = [], []
+    for item in items:
+        case_id = _get_item_shard_key(item)
+        (selected if case_id is None or assignment[case_id] == index else deselected).append(item)
+    return selected, deselected
+
+
+_DUPLICATES = []
+"""The items skipped because they duplicate another one, see `_skip_duplicate_items`: a list of (nodeid, nodeid of
+the item that is executed)"""
+
+
+def _get_dedupe_key(item, dedupe_all):
+    """
+    Returns the key identifying the tests that are duplicates of `item`, or None if `item` should not be deduplicated:
+    its test function, the digests of the data of its cases, and the values of its other parameters.
+    """
+    case_getters = get_case_getters(item)
+    if len(case_getters) == 0 or not (dedupe_all or any(is_dedupe_requested(c) for c in case_getters)):
+        return None
+
+    digests = tuple(get_case_digest(c) for c in case_getters)
+    if None in digests:
+        return None
+
+    other_params = tuple(sorted((name, _get_param_key(v)) for name, v in item.callspec.params.items()
+                                if not isinstance(v, CaseDataFromFunctionBase)))
+    return get_test_id(item), digests, other_params
+
+
+def _get_param_key(value):
+    """ Returns a key identifying a parameter value: the value itself if it is hashable, otherwise the object """
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    else:
+        # 1, 1.0 and True are equal but are different parameters
+        return type(value).__name__, value
+
+
+def _skip_duplicate_items(items, dedupe_all=False):
+    """
+    Implementation of `--cases-dedupe` and `@cases_data(dedupe=True)`: the items of the same test function using cases
+    with identical data (see `dedupe.get_case_digest`), and the same other parameters, are only executed once. The
+    first one is kept, the others are marked as skipped and recorded in `_DUPLICATES`.
+
+    The case data computed to get the digests is kept for the tests that run (see `dedupe.get_case_digest`), so that
+    it is not computed twice.
+
+    :param items:
+    :param dedupe_all: True to deduplicate all items, False to only deduplicate the items using cases for which
+        deduplication was requested
+    :return:
+    """
+    first_items = dict()
+    for item in items:
+        key = _get_dedupe_key(item, dedupe_all)
+        if key is None:
+            continue
+        first = first_items.setdefault(key, item)
+        if first is not item:
+            item.add_marker(pytest.mark.skip(reason="pytest-cases: same case data as %s" % first.nodeid))
+            _DUPLICATES.append((item.nodeid, first.nodeid))
+
+    # release the data of the cases only used by skipped items
+    skipped = set(nodeid for nodeid, _ in _DUPLICATES)
+    used = set(c.get_case_key() for item in items if item.nodeid not in skipped for c in get_case_getters(item))
+    if keep_collected_results(used) > 0:
+        # the tests retrieve it, see `CaseDataFromFunctionBase._get`
+        enable_results_sharing()
+
+
+def _sort_items_by_history(items):
+    """
+    Sorts the items of each test function according to the history of their cases, see `get_history_sort_key`. Only
+    consecutive items of the same test function are reordered, so that the order of the test functions, and therefore
+    the setup and teardown of module or class-scoped fixtures, is not modified.
+
+    :param items:
+    :return: the new list of items
+    """
+    sorted_items = []
+    group, group_test_id = [], None
+    for item in items:
+        test_id = get_test_id(item)
+        if test_id != group_test_id:
+            sorted_items += _sort_group_by_history(group)
+            group, group_test_id = [], test_id
+        group.append(item)
+    sorted_items += _sort_group_by_history(group)
+    return sorted_items
+
+
+def _sort_group_by_history(group):
+    """ Sorts the items of a test function, see `_sort_items_by_history` """
+    if len(group) < 2:
+        return group
+    keys = dict((item.nodeid, get_history_sort_key(get_case_id(c) for c in get_case_getters(item)))
+                for item in group)
+    return sorted(group, key=lambda item: keys[item.nodeid])
+
+
+def _count_cases_per_test(items):
+    """
+    Counts the cases used by each test function.
+
+    :param items:
+    :return: a list of `TestCasesStats`, one per test function using cases, in order of appearance
+    """
+    per_test = dict()
+    for item in items:
+        case_getters = get_case_getters(item)
+        if len(case_getters) == 0:
+            continue
+        test_id = get_test_id(item)
+        try:
+            stats = per_test[test_id]
+        except KeyError:
+            stats = per_test[test_id] = TestCasesStats(test_id)
+            _CASES_PER_TEST.append(stats)
+        for case_getter in case_getters:
+            if isinstance(case_getter, GeneratedCaseDataFromFunction):
+                stats.generated += 1
+            else:
+                stats.plain += 1
+
+
+def pytest_collection_finish(session):
+    if is_case_stats_enabled():
+        _count_cases_per_test(session.items)
+
+    if session.config.option.collectonly:
+        return
+
+    # prefetch the data of the cases used by the tests to run
+    nb_workers = session.config.getoption('cases_prefetch')
+    lookahead = session.config.getoption('cases_prefetch_lookahead')
+    if lookahead > 0 and getattr(session.config, 'workerinput', None) is not None:
+        # an xdist worker only runs the items sent by the controller, in an order that is not known in advance: the
+        # positions in `session.items` would prefetch (and never release) the cases of the items run by other workers
+        if _is_first_process(session.config):
+            warn("--cases-prefetch-lookahead is not supported with pytest-xdist. It will be disabled")
+        lookahead = 0
+    gather_async = session.config.getoption('cases_async_gather') is not None
+    to_prefetch = []
+    to_lookahead = []
+    for item in session.items:
+        item_lookahead = []
+        for case_getter in get_case_getters(item):
+            if gather_async and is_async_case_function(case_getter.f):
+                # awaited with the other async cases of the test, see `_register_async_cases`
+                continue
+            if nb_workers > 0 or is_prefetch_requested(case_getter):
+                case = _get_case_to_compute(case_getter)
+                if case is not None:
+                    to_prefetch.append(case)
+            elif lookahead > 0:
+                case = _get_case_to_compute(case_getter)
+                if case is not None:
+                    item_lookahead.append(case)
+        to_lookahead.append(item_lookahead)
+
+    if len(to_prefetch) > 0 or lookahead > 0 or gather_async:
+        enable_results_sharing()
+
+    if len(to_prefetch) > 0:
+        start_prefetch(to_prefetch, max_workers=nb_workers if nb_workers > 0 else None)
+
+    if lookahead > 0:
+        _LOOKAHEAD_POSITIONS.update((item.nodeid, i) for i, item in enumerate(session.items))
+        start_lookahead(to_lookahead, lookahead)
+
+    if gather_async:
+        _register_async_cases(session.items)
+
+
+def _get_case_to_compute(case_getter):
+    """
+    Returns a tuple (case key, case function, case kwargs) describing the computation of the data of a case, in order to
+    prefetch it, or None if it can not be shared or if its result will be loaded from the disk anyway.
+
+    :param case_getter:
+    :return:
+    """
+    case_key = case_getter.get_case_key()
+    if case_key is None:
+        return None
+    f, kwargs = case_getter.f, case_getter.function_kwargs
+    if getattr(f, CASE_CACHE_FIELD, False) and has_persisted_result(f, kwargs):
+        # no need to compute it again, the result will be loaded from the disk
+        return None
+    if has_collected_result(case_key):
+        # already computed to detect duplicates
+        return None
+    return case_key, f, kwargs
+
+
+_LOOKAHEAD_POSITIONS = dict()
+"""The position of each item in execution order, when --cases-prefetch-lookahead is set"""
+
+
+def _register_async_cases(items):
+    """
+    Registers the async cases used by the items of each test function, so that they are gathered before the first item
+    runs, see `pytest_runtest_setup`.
+
+    :param items:
+    :return:
+    """
+    for item in items:
+        cases = []
+        for case_getter in get_case_getters(item):
+            if is_async_case_function(case_getter.f):
+                case = _get_case_to_compute(case_getter)
+                if case is not None:
+                    cases.append(case)
+        if len(cases) > 0:
+            register_async_cases(get_test_id(item), cases)
+
+
+def pytest_runtest_setup(item):
+    max_concurrency = item.config.getoption('cases_async_gather')
+    if max_concurrency is not None:
+        # the first item of each test function awaits the async cases of all its items (nothing for the next ones)
+        gather_test_cases(get_test_id(item), max_concurrency)
+
+    position = _LOOKAHEAD_POSITIONS.get(item.nodeid, None)
+    if position is not None:
+        # compute the data of the cases of the next items while this one runs
+        advance_lookahead(position)
+
+
+def pytest_runtest_teardown(item):
+    position = _LOOKAHEAD_POSITIONS.get(item.nodeid, None)
+    if position is not None:
+        release_lookahead(position)
+
+
+def pytest_runtest_logreport(report):
+    case_getters = _CASE_GETTERS.get(report.nodeid, ())
+    if len(case_getters) == 0:
+        return
+
+    is_call = report.when == 'call'
+    for case_getter in case_getters:
+        case_id = get_case_id(case_getter)
+        if is_history_enabled():
+            # the history of durations and outcomes, see --cases-order
+            record_case_result(case_id, report.duration if is_call else 0, report.failed)
+        if is_call and is_case_stats_enabled():
+            # accumulate the duration of the test for all cases that it uses
+            record_test_duration(case_id, report.duration)
+
+
+def get_collect_stats_summary():
+    """
+    Returns a json-able summary of the collection statistics: the totals and the statistics of each decorated test
+    function or fixture, see `CollectStats`.
+
+    :return:
+    """
+    all_stats = get_collect_stats()
+    total_bytes = [s.bytes for s in all_stats if s.bytes is not None]
+    return {
+        'total': dict(count=len(all_stats),
+                      wall_time=sum(s.wall_time for s in all_stats),
+                      getters=sum(s.getters for s in all_stats),
+                      marks=sum(s.marks for s in all_stats),
+                      bytes=sum(total_bytes) if len(total_bytes) > 0 else None),
+        'entries': [s.to_dict() for s in all_stats]
+    }
+
+
+def pytest_sessionfinish(session):
+    # store the history of this session. On xdist workers the controller does not know the case getters used by the
+    # reports that it receives, so each worker merges the results of its own tests under the same session number
+    if is_history_enabled():
+        workerinput = getattr(session.config, 'workerinput', None)
+        run = workerinput.get('cases_history_run', None) if workerinput is not None else None
+        save_history(getattr(session.config, 'cache', None), run=run)
+
+    json_path = session.config.getoption('cases_collect_stats_json')
+    if json_path is not None:
+        with open(json_path, 'w') as f:
+            json.dump(get_collect_stats_summary(), f, indent=2)
+
+
+_COLLECT_STATS_DISPLAYED = 20
+"""The number of decorated functions displayed in the collection statistics terminal summary"""
+
+
+def _write_collect_stats(terminalreporter):
+    summary = get_collect_stats_summary()
+    terminalreporter.write_sep('-', 'pytest-cases collection statistics')
+    terminalreporter.write_line("%(count)s decorated test functions and fixtures, %(wall_time).3fs, %(getters)s case "
+                                "getters, %(marks)s marked parameters, %(bytes)s bytes" % summary['total'])
+
+    all_stats = sorted(get_collect_stats(), key=lambda s: s.wall_time, reverse=True)
+    if len(all_stats) > _COLLECT_STATS_DISPLAYED:
+        terminalreporter.write_line("slowest %s:" % _COLLECT_STATS_DISPLAYED)
+    terminalreporter.write_line("%9s %8s %6s %10s  %s" % ('time (s)', 'getters', 'marks', 'bytes', 'decorated'))
+    for s in all_stats[:_COLLECT_STATS_DISPLAYED]:
+        terminalreporter.write_line("%9.4f %8s %6s %10s  %s (%s)"
+                                    % (s.wall_time, s.getters, s.marks, s.bytes, s.name, s.kind))
+
+
+_CASES_STATS_DISPLAYED = 10
+"""The number of lines displayed in each table of the cases statistics terminal summary"""
+
+
+def _write_cases_stats(terminalreporter):
+    write_line = terminalreporter.write_line
+    terminalreporter.write_sep('-', 'pytest-cases statistics')
+
+    nb_generated = sum(s.generated for s in _CASES_PER_TEST)
+    nb_plain = sum(s.plain for s in _CASES_PER_TEST)
+    write_line("%s test functions use cases: %s case usages (%s generated, %s plain)"
+               % (len(_CASES_PER_TEST), nb_generated + nb_plain, nb_generated, nb_plain))
+    if len(_CASES_PER_TEST) > 0:
+        write_line("")
+        write_line("test functions with the most cases:")
+        write_line("%8s %10s %8s  %s" % ('cases', 'generated', 'plain', 'test'))
+        for s in sorted(_CASES_PER_TEST, key=lambda s: s.total, reverse=True)[:_CASES_STATS_DISPLAYED]:
+            write_line("%8s %10s %8s  %s" % (s.total, s.generated, s.plain, s.test_id))
+
+    slowest_getters = get_slowest_cases(_CASES_STATS_DISPLAYED)
+    if len(slowest_getters) > 0:
+        write_line("")
+        write_line("slowest case getters:")
+        write_line("%10s %8s %10s  %s" % ('total (s)', 'calls', 'max (s)', 'case'))
+        for case_id, calls, total, max_t in slowest_getters:
+            write_line("%10.4f %8s %10.4f  %s" % (total, calls, max_t, case_id))
+
+    slowest_cases = get_slowest_tested_cases(_CASES_STATS_DISPLAYED)
+    if len(slowest_cases) > 0:
+        write_line("")
+        write_line("cases with the slowest tests:")
+        write_line("%10s %8s  %s" % ('total (s)', 'tests', 'case'))
+        for case_id, nb_tests, total in slowest_cases:
+            write_line("%10.4f %8s  %s" % (total, nb_tests, case_id))
+
+
+def pytest_terminal_summary(terminalreporter):
+    config = terminalreporter.config
+    if is_case_stats_enabled():
+        _write_cases_stats(terminalreporter)
+
+    if config.getoption('cases_collect_stats') or config.getoption('cases_collect_stats_json') is not None:
+        _write_collect_stats(terminalreporter)
+
+    if len(_DUPLICATES) > 0:
+        terminalreporter.write_sep('-', 'pytest-cases duplicates')
+        terminalreporter.write_line("%s tests skipped because their cases have the same data as another test:"
+                                    % len(_DUPLICATES))
+        for nodeid, first_nodeid in _DUPLICATES:
+            terminalreporter.write_line("%s (same as %s)" % (nodeid, first_nodeid))
+
+    memo_cache = get_memoization_cache()
+    if memo_cache is not None:
+        terminalreporter.write_sep('-', 'pytest-cases memoization')
+        terminalreporter.write_line("hits: %(hits)s, misses: %(misses)s, evictions: %(evictions)s, "
+                                    "entries: %(entries)s, size: %(size)s bytes (budget: %(budget)s bytes)"
+                                    % memo_cache.get_stats())
+
+
+def pytest_unconfigure(config):
+    _CASE_GETTERS.clear()
+    _LOOKAHEAD_POSITIONS.clear()
+    del _CASES_PER_TEST[:]
+    del _DUPLICATES[:]
+    clear_dedupe()
+    enable_case_stats(False)
+    enable_collect_stats(False)
+    enable_memoization(0)
+    enable_results_sharing(False)
+    clear_case_cache_results()
+    enable_history(False)
+    set_id_max_length(DEFAULT_ID_MAX_LENGTH)
+    stop_prefetch()
+    clear_async_cases()
+    enable_shared_store(None)
+    if len(_SHARED_STORE_DIR) > 0:
+        # the controller removes the shared memory segments, now that all workers are done
+        remove_store_dir(_SHARED_STORE_DIR.pop())
+    set_pytest_config(None)
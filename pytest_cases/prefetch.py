@@ -0,0 +1,288 @@
+"""
+Prefetching of case data: the results of the case functions are computed ahead of time, and handed over to
+`CaseDataGetter.get()` through a result map. They are either all computed in a pool of worker processes before the tests
+run (`start_prefetch`), or computed in a pool of threads while the previous tests run (`start_lookahead`), which suits
+cases that mostly wait for I/O such as reading files.
+"""
+from pickle import dumps, HIGHEST_PROTOCOL
+from warnings import warn
+
+from pytest_cases.async_cases import call_case_function
+
+try:  # python 3.3+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, CancelledError
+    from concurrent.futures.process import BrokenProcessPool
+except ImportError:
+    ProcessPoolExecutor = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple  # noqa
+except ImportError:
+    pass
+
+
+NOT_PREFETCHED = object()
+"""Marker returned by `pop_prefetched_result` when no result was prefetched for a case"""
+
+_REQUESTED = set()
+"""The case getters for which prefetching was explicitly requested with `@cases_data(prefetch=True)`"""
+
+_PREFETCHED = dict()
+"""The prefetched results: for each case key, a list [future, number of remaining users]"""
+
+_EXECUTOR = None
+"""The pool of worker processes, while prefetching is active"""
+
+_THREAD_EXECUTOR = None
+"""The pool of threads, while lookahead prefetching is active"""
+
+_LOOKAHEAD_CASES = []  # type: List[List[Tuple[Hashable, Callable, Dict[str, Any]]]]
+"""The cases to prefetch with lookahead, for each test in execution order. See `start_lookahead`"""
+
+_LOOKAHEAD_DEPTH = 0
+"""The number of tests after the current one whose cases are prefetched"""
+
+_LOOKAHEAD_SUBMITTED = 0
+"""The number of tests whose cases have been submitted to the pool of threads"""
+
+
+def request_prefetch(case_getters  # type: Iterable[Any]
+                     ):
+    """
+    Marks the provided case getters so that their result is prefetched before the tests run, even if the
+    `--cases-prefetch` command-line option is not set.
+
+    :param case_getters:
+    :return:
+    """
+    _REQUESTED.update(case_getters)
+
+
+def is_prefetch_requested(case_getter):
+    """Returns True if prefetching was requested for this case getter with `request_prefetch`"""
+    return case_getter in _REQUESTED
+
+
+def _can_pickle(o):
+    """Returns True if `o` can be sent to another process"""
+    try:
+        dumps(o, HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    else:
+        return True
+
+
+def _compute_case(f,      # type: Callable
+                  kwargs  # type: Dict[str, Any]
+                  ):
+    """
+    Executed in the worker processes: computes the result of a case function. Returns a tuple (available, result).
+    `available` is False if the result can not be sent back to the main process: in that case it will be computed
+    again in the main process. Exceptions raised by the case function are propagated, so that they are raised again in
+    the main process when the result is retrieved.
+
+    :param f:
+    :param kwargs:
+    :return:
+    """
+    try:
+        res = call_case_function(f, **kwargs)
+    except Exception as e:
+        if not _can_pickle(e):
+            return False, None
+        raise
+
+    if not _can_pickle(res):
+        return False, None
+    return True, res
+
+
+def start_prefetch(cases,           # type: Iterable[Tuple[Hashable, Callable, Dict[str, Any]]]
+                   max_workers=None  # type: int
+                   ):
+    """
+    Starts computing the results of the provided cases in a pool of worker processes. `cases` should contain a tuple
+    `(case_key, case_function, case_kwargs)` for each usage of a case in the tests to run: the prefetched result is
+    released once it has been retrieved as many times as it appears in `cases`.
+
+    Cases that can not be sent to the worker processes (for example if the case function can not be pickled) are
+    ignored: they will be computed as usual when `get()` is called.
+
+    :param cases:
+    :param max_workers: the maximum number of worker processes. If None, the number of processors on the machine.
+    :return:
+    """
+    global _EXECUTOR
+    if ProcessPoolExecutor is None:
+        warn("Case data prefetching requires `concurrent.futures` (python 3.2+). It will be disabled")
+        return
+
+    for case_key, f, kwargs in cases:
+        entry = _PREFETCHED.get(case_key, None)
+        if entry is not None:
+            # already submitted: one more user
+            entry[1] += 1
+            continue
+
+        if not _can_pickle((f, kwargs)):
+            # this case can not be sent to the worker processes
+            continue
+
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=max_workers)
+        _PREFETCHED[case_key] = [_EXECUTOR.submit(_compute_case, f, kwargs), 1]
+
+
+def _compute_case_in_thread(f,      # type: Callable
+                            kwargs  # type: Dict[str, Any]
+                            ):
+    """ Executed in the pool of threads: computes the result of a case function, see `_compute_case` """
+    return True, call_case_function(f, **kwargs)
+
+
+def start_lookahead(cases,  # type: List[List[Tuple[Hashable, Callable, Dict[str, Any]]]]
+                    depth   # type: int
+                    ):
+    """
+    Starts prefetching with lookahead: when test `i` is about to run (see `advance_lookahead`), the results of the
+    cases used by tests `i` to `i + depth` are computed in a pool of `depth` threads, so that reading data from the
+    disk or the network overlaps with the execution of the previous tests. Each result is released once all the tests
+    that use it in the lookahead window have retrieved it, or have finished (see `release_lookahead`): at most
+    `depth + 1` tests have their case data in memory.
+
+    :param cases: for each test, in execution order, a list containing a tuple `(case_key, case_function, case_kwargs)`
+        for each case that it uses
+    :param depth: the number of tests after the current one whose cases are prefetched
+    :return:
+    """
+    global _THREAD_EXECUTOR, _LOOKAHEAD_DEPTH, _LOOKAHEAD_SUBMITTED
+    if ProcessPoolExecutor is None:
+        warn("Case data prefetching requires `concurrent.futures` (python 3.2+). It will be disabled")
+        return
+
+    _LOOKAHEAD_CASES[:] = cases
+    _LOOKAHEAD_DEPTH = depth
+    _LOOKAHEAD_SUBMITTED = 0
+    _THREAD_EXECUTOR = ThreadPoolExecutor(max_workers=depth)
+
+
+def advance_lookahead(position  # type: int
+                      ):
+    """
+    Submits the cases of the tests from `position` to `position + depth` that were not submitted yet to the pool of
+    threads. Called when the test at `position` (in execution order) is about to run.
+
+    :param position:
+    :return:
+    """
+    global _LOOKAHEAD_SUBMITTED
+    if _THREAD_EXECUTOR is None:
+        return
+
+    # tests that did not run (for example after a failure with -x) are not prefetched
+    _LOOKAHEAD_SUBMITTED = max(_LOOKAHEAD_SUBMITTED, position)
+    end = min(position + _LOOKAHEAD_DEPTH + 1, len(_LOOKAHEAD_CASES))
+    while _LOOKAHEAD_SUBMITTED < end:
+        for case_key, f, kwargs in _LOOKAHEAD_CASES[_LOOKAHEAD_SUBMITTED]:
+            entry = _PREFETCHED.get(case_key, None)
+            if entry is None:
+                _PREFETCHED[case_key] = [_THREAD_EXECUTOR.submit(_compute_case_in_thread, f, kwargs), 1]
+            else:
+                # already submitted for another test in the window: one more user
+                entry[1] += 1
+        _LOOKAHEAD_SUBMITTED += 1
+
+
+def release_lookahead(position  # type: int
+                      ):
+    """
+    Releases the results of the cases of the test at `position`, once it has finished, except if they are used by the
+    next tests already submitted. This ensures that results that were not retrieved (for example if the test was
+    skipped) do not stay in memory.
+
+    :param position:
+    :return:
+    """
+    if _THREAD_EXECUTOR is None or position >= len(_LOOKAHEAD_CASES):
+        return
+
+    for case_key in set(case_key for case_key, _, _ in _LOOKAHEAD_CASES[position]):
+        entry = _PREFETCHED.get(case_key, None)
+        if entry is None:
+            continue
+        remaining = sum(1 for p in range(position + 1, _LOOKAHEAD_SUBMITTED)
+                        for k, _, _ in _LOOKAHEAD_CASES[p] if k == case_key)
+        if remaining == 0:
+            entry[0].cancel()
+            del _PREFETCHED[case_key]
+        else:
+            entry[1] = remaining
+
+
+def pop_prefetched_result(case_key  # type: Hashable
+                          ):
+    """
+    Returns the prefetched result for the case with key `case_key`, waiting for it if it is not ready yet, or raises
+    the exception raised by the case function. Returns `NOT_PREFETCHED` if no result was prefetched for this case.
+
+    :param case_key:
+    :return:
+    """
+    entry = _PREFETCHED.get(case_key, None)
+    if entry is None:
+        return NOT_PREFETCHED
+
+    # release the result once all users have retrieved it
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del _PREFETCHED[case_key]
+
+    try:
+        available, res = entry[0].result()
+    except (BrokenProcessPool, CancelledError):
+        # the worker process failed (for example it was killed): compute the case in the main process
+        return NOT_PREFETCHED
+
+    # note: if the case function raised an exception, it has been raised again by `result()` above
+    return res if available else NOT_PREFETCHED
+
+
+def discard_prefetched_result(case_key  # type: Hashable
+                              ):
+    """
+    Counts one more user of the prefetched result for the case with key `case_key`, without retrieving it. Called when
+    the result was obtained elsewhere (for example memoized with `--cases-memo-budget`), so that the prefetched result
+    is still released once all users are done with it.
+
+    :param case_key:
+    :return:
+    """
+    entry = _PREFETCHED.get(case_key, None)
+    if entry is None:
+        return
+
+    entry[1] -= 1
+    if entry[1] <= 0:
+        entry[0].cancel()
+        del _PREFETCHED[case_key]
+
+
+def stop_prefetch():
+    """
+    Stops the pools of worker processes and threads, and releases all prefetched results that were not used.
+
+    :return:
+    """
+    global _EXECUTOR, _THREAD_EXECUTOR
+    for future, _ in _PREFETCHED.values():
+        future.cancel()
+    _PREFETCHED.clear()
+    _REQUESTED.clear()
+    del _LOOKAHEAD_CASES[:]
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=True)
+        _EXECUTOR = None
+    if _THREAD_EXECUTOR is not None:
+        _THREAD_EXECUTOR.shutdown(wait=True)
+        _THREAD_EXECUTOR = None
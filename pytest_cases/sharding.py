@@ -0,0 +1,164 @@
+import json
+import os
+from heapq import heappop, heappush
+from zlib import crc32
+
+try:  # python 3.3+
+    from os import replace as _replace_file
+except ImportError:
+    from os import rename as _replace_file
+
+try:  # type hints, python 3+
+    from typing import Dict, List, Tuple, Union, Optional  # noqa
+
+    # Type hint for a shard specification: (index, count)
+    Shard = Tuple[int, int]
+except ImportError:
+    pass
+
+
+def parse_shard(shard  # type: Union[str, Tuple[int, int]]
+                ):
+    # type: (...) -> Optional[Shard]
+    """
+    Validates a shard specification. It can be a tuple `(index, count)` or a string `'<index>/<count>'`, where `index`
+    is the 0-based index of the shard to select, and `count` is the total number of shards.
+
+    :param shard: the shard specification, or None
+    :return: a tuple (index, count), or None if `shard` is None
+    """
+    if shard is None:
+        return None
+
+    try:
+        if isinstance(shard, str):
+            index, count = shard.split('/')
+        else:
+            index, count = shard
+        index, count = int(index), int(count)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid shard specification %r: it should be a tuple (index, count) or a string "
+                         "'<index>/<count>'" % (shard, ))
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError("Invalid shard specification %r: count should be strictly positive and index should be "
+                         "between 0 and count - 1" % (shard, ))
+
+    return index, count
+
+
+def get_shard_index(case_id,  # type: str
+                    count     # type: int
+                    ):
+    # type: (...) -> int
+    """
+    Returns the index of the shard that a case belongs to, among `count` shards. This relies on a stable hash of the
+    case id, so that all nodes compute the same partition, whatever the python hash seed.
+
+    :param case_id: the case id, for example `str(case_getter)`
+    :param count: the total number of shards
+    :return:
+    """
+    return (crc32(case_id.encode('utf-8')) & 0xffffffff) % count
+
+
+def is_in_shard(case_id,  # type: str
+                shard     # type: Optional[Shard]
+                ):
+    # type: (...) -> bool
+    """
+    Returns True if the case with id `case_id` belongs to the shard `shard`, or if `shard` is None.
+
+    :param case_id: the case id, for example `str(case_getter)`
+    :param shard: a tuple (index, count) as returned by `parse_shard`, or None
+    :return:
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return get_shard_index(case_id, count) == index
+
+
+def balance_shards(weights,  # type: Dict[str, float]
+                   count     # type: int
+                   ):
+    # type: (...) -> Tuple[Dict[str, int], List[float]]
+    """
+    Assigns cases to `count` shards so that the total weight (expected duration) of the shards is as equal as possible,
+    using the Longest Processing Time first heuristic: cases are considered by decreasing weight, and each one is
+    assigned to the shard with the lowest total weight so far. Ties are broken with the case id and the shard index,
+    so that the result only depends on `weights`.
+
+    :param weights: the weight of each case, by case id
+    :param count: the number of shards
+    :return: a tuple (assignment, loads) where assignment is a dictionary case id -> shard index and loads is the list
+        of the total weight of each shard
+    """
+    loads = [0.] * count
+    heap = [(0., i) for i in range(count)]
+    assignment = dict()
+    for case_id, weight in sorted(weights.items(), key=lambda cw: (-cw[1], cw[0])):
+        load, i = heappop(heap)
+        assignment[case_id] = i
+        loads[i] = load + weight
+        heappush(heap, (loads[i], i))
+    return assignment, loads
+
+
+def write_shard_manifest(path,        # type: str
+                         assignment,  # type: Dict[str, int]
+                         loads        # type: List[float]
+                         ):
+    """
+    Writes a shard manifest: a json file containing the number of shards, the expected duration of each shard and the
+    shard index of each case. See `read_shard_manifest`.
+
+    The file is written atomically, so that other processes never read a partially written manifest.
+
+    :param path:
+    :param assignment: a dictionary case id -> shard index
+    :param loads: the expected total duration of each shard
+    :return:
+    """
+    tmp_path = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump({'count': len(loads), 'loads': loads, 'shards': assignment}, f, indent=1, sort_keys=True)
+    _replace_file(tmp_path, path)
+
+
+def read_shard_manifest(path  # type: str
+                        ):
+    # type: (...) -> Tuple[Dict[str, int], List[float]]
+    """
+    Reads a shard manifest written by `write_shard_manifest`.
+
+    :param path:
+    :return: a tuple (assignment, loads), see `balance_shards`
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    try:
+        return dict((case_id, int(i)) for case_id, i in manifest['shards'].items()), \
+            [float(load) for load in manifest['loads']]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError("Invalid shard manifest %r" % path)
+
+
+def extend_shard_assignment(assignment,  # type: Dict[str, int]
+                            loads,       # type: List[float]
+                            weights      # type: Dict[str, float]
+                            ):
+    """
+    Assigns the cases of `weights` that are not in `assignment` yet (for example new cases, that were not in the shard
+    manifest) to the least loaded shards, as in `balance_shards`. `assignment` and `loads` are modified in place.
+
+    :param assignment: a dictionary case id -> shard index
+    :param loads: the total weight of each shard
+    :param weights: the weight of each case, by case id
+    :return:
+    """
+    new_weights = dict((case_id, w) for case_id, w in weights.items() if case_id not in assignment)
+    for case_id, w in sorted(new_weights.items(), key=lambda cw: (-cw[1], cw[0])):
+        i = min(range(len(loads)), key=lambda k: (loads[k], k))
+        assignment[case_id] = i
+        loads[i] += w
@@ -0,0 +1,257 @@
+"""
+Store of case results shared by the pytest-xdist worker processes (`--cases-shared-memory`). The first worker needing a
+case computes its result and publishes it in a `multiprocessing.shared_memory` segment: the pickled object, followed by
+its raw data buffers such as the ones of numpy arrays (pickle protocol 5 out-of-band buffers). The other workers attach
+to the segment and unpickle the object from it: the arrays are rebuilt on top of the shared buffers, without copying
+them, so each result is computed once and kept in memory once, whatever the number of workers.
+
+The workers coordinate through files in a directory created by the xdist controller (see
+`plugin.pytest_configure_node`): a lock file per case ensures that a single worker computes it, a `.ready` file
+indicates that its segment is complete, and a `.none` file that it can not be shared (the result can not be pickled, or
+the case function raised an exception), so that each worker computes it on its own. The controller removes the
+segments and the directory at the end of the session. Requires python 3.8+ and a POSIX system (`fcntl`).
+"""
+import os
+import pickle
+import shutil
+import struct
+from contextlib import contextmanager
+from hashlib import md5
+
+try:  # python 3.8+
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+try:  # POSIX
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Dict, Optional  # noqa
+except ImportError:
+    pass
+
+
+NOT_SHARED = object()
+"""Marker returned by `_attach` when no result is available in shared memory"""
+
+_STORE_DIR = None  # type: Optional[str]
+"""The directory used to coordinate the workers, while the store is enabled"""
+
+_ATTACHED = dict()  # type: Dict[str, Any]
+"""The shared memory segments opened by this process, by name. They are kept open so that the unpickled objects can
+keep using their buffers"""
+
+_HEADER = struct.Struct('<QQ')
+"""Header of a segment: the size of the pickle stream and the number of out-of-band buffers"""
+
+_BUFFER_ENTRY = struct.Struct('<QQ')
+"""Position and size of each out-of-band buffer, after the header"""
+
+_ALIGNMENT = 64
+"""The out-of-band buffers are aligned on this number of bytes, as numpy does for its own allocations"""
+
+
+def is_shared_store_supported():
+    """Returns True if the shared store can be used on this platform"""
+    return shared_memory is not None and fcntl is not None and pickle.HIGHEST_PROTOCOL >= 5
+
+
+def create_store_dir():
+    # type: (...) -> str
+    """Creates the directory used to coordinate the workers, see `enable_shared_store`"""
+    import tempfile
+    return tempfile.mkdtemp(prefix='pytest-cases-shm-')
+
+
+def enable_shared_store(store_dir  # type: Optional[str]
+                        ):
+    """
+    Enables the shared store in this process, using the coordination directory `store_dir` (see `create_store_dir`),
+    or disables it if `store_dir` is None. The segments opened by this process are closed when it is disabled.
+
+    :param store_dir:
+    :return:
+    """
+    global _STORE_DIR
+    _STORE_DIR = store_dir
+    if store_dir is None:
+        for shm in _ATTACHED.values():
+            try:
+                shm.close()
+            except BufferError:
+                # some unpickled objects still use it: the memory map will be released with them
+                pass
+        _ATTACHED.clear()
+
+
+def is_shared_store_enabled():
+    """Returns True if the shared store is enabled in this process"""
+    return _STORE_DIR is not None
+
+
+def _open_segment(name,          # type: str
+                  size=0,        # type: int
+                  create=False   # type: bool
+                  ):
+    """
+    Opens or creates a shared memory segment, that is not tracked by the `multiprocessing` resource tracker of this
+    process: it should not be removed when this process ends, but by the controller at the end of the session.
+    """
+    try:  # python 3.13+
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _get_segment_name(case_id  # type: str
+                      ):
+    # type: (...) -> str
+    """ Returns the name of the segment of a case. Names are short, as some systems limit their length to 31 """
+    return 'pc' + md5((_STORE_DIR + '::' + case_id).encode('utf-8')).hexdigest()[:24]
+
+
+def _align(position):
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _publish(name,  # type: str
+             obj    # type: Any
+             ):
+    # type: (...) -> bool
+    """
+    Pickles `obj` in a new shared memory segment named `name`. Returns False if `obj` can not be pickled.
+    """
+    buffers = []
+    try:
+        stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        raws = [b.raw() for b in buffers]
+    except Exception:
+        return False
+
+    position = _align(_HEADER.size + _BUFFER_ENTRY.size * len(raws) + len(stream))
+    entries = []
+    for raw in raws:
+        entries.append((position, raw.nbytes))
+        position = _align(position + raw.nbytes)
+
+    shm = _open_segment(name, size=max(position, 1), create=True)
+    buf = shm.buf
+    _HEADER.pack_into(buf, 0, len(stream), len(raws))
+    offset = _HEADER.size
+    for entry in entries:
+        _BUFFER_ENTRY.pack_into(buf, offset, *entry)
+        offset += _BUFFER_ENTRY.size
+    buf[offset:offset + len(stream)] = stream
+    for (start, size), raw in zip(entries, raws):
+        buf[start:start + size] = raw
+    del buf
+    _ATTACHED[name] = shm
+    return True
+
+
+def _attach(name  # type: str
+            ):
+    """
+    Unpickles the object stored in segment `name`. Its out-of-band buffers are read-only views of the segment. Returns
+    `NOT_SHARED` if the segment is not ready.
+    """
+    shm = _ATTACHED.get(name, None)
+    if shm is None:
+        if not os.path.exists(os.path.join(_STORE_DIR, name + '.ready')):
+            return NOT_SHARED
+        shm = _ATTACHED[name] = _open_segment(name)
+
+    buf = shm.buf.toreadonly()
+    stream_size, nb_buffers = _HEADER.unpack_from(buf, 0)
+    offset = _HEADER.size
+    buffers = []
+    for _ in range(nb_buffers):
+        start, size = _BUFFER_ENTRY.unpack_from(buf, offset)
+        buffers.append(buf[start:start + size])
+        offset += _BUFFER_ENTRY.size
+    return pickle.loads(buf[offset:offset + stream_size], buffers=buffers)
+
+
+def _touch(path):
+    with open(path, 'w'):
+        pass
+
+
+@contextmanager
+def _case_lock(name):
+    """ An exclusive lock shared by all workers. It is released by the system if the worker holding it dies """
+    with open(os.path.join(_STORE_DIR, name + '.lock'), 'w') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def get_shared_result(case_id,  # type: str
+                      compute   # type: Callable[[], Any]
+                      ):
+    """
+    Returns the result of case `case_id` from the shared store if another worker has published it. Otherwise computes
+    it with `compute()` (only one worker at a time does it for a given case), and publishes it.
+
+    :param case_id: the case id, see `case_stats.get_case_id`
+    :param compute: a function computing the result of the case
+    :return:
+    """
+    name = _get_segment_name(case_id)
+    res = _attach(name)
+    if res is not NOT_SHARED:
+        return res
+
+    not_shareable = os.path.join(_STORE_DIR, name + '.none')
+    if os.path.exists(not_shareable):
+        return compute()
+
+    with _case_lock(name):
+        # another worker may have published it while we were waiting for the lock
+        res = _attach(name)
+        if res is not NOT_SHARED:
+            return res
+        if not os.path.exists(not_shareable):
+            try:
+                res = compute()
+            except Exception:
+                # let each worker raise the exception on its own
+                _touch(not_shareable)
+                raise
+            if not _publish(name, res):
+                _touch(not_shareable)
+                return res
+            _touch(os.path.join(_STORE_DIR, name + '.ready'))
+            # use the shared copy, so that this process does not keep its own copy either
+            return _attach(name)
+
+    return compute()
+
+
+def remove_store_dir(store_dir  # type: str
+                     ):
+    """
+    Removes the segments published by the workers, and the coordination directory. Called by the controller at the end
+    of the session.
+
+    :param store_dir:
+    :return:
+    """
+    for file_name in os.listdir(store_dir):
+        if file_name.endswith('.ready'):
+            try:
+                # note: not `_open_segment`, so that `unlink` is consistent with the resource tracker
+                shm = shared_memory.SharedMemory(name=file_name[:-len('.ready')])
+            except FileNotFoundError:
+                continue
+            shm.close()
+            shm.unlink()
+    shutil.rmtree(store_dir, ignore_errors=True)
@@ -0,0 +1,225 @@
+"""
+A small boolean language to select cases according to their tags, for example `"fast and not (slow or flaky)"`.
+
+Expressions are made of tag names, the `and`, `or` and `not` operators, and parenthesis. A tag name is any sequence of
+characters without whitespace or parenthesis, that is not one of the operators. Only string tags can therefore be used
+in expressions.
+
+Expressions are compiled once into a tree of functions. The same compiled expression can be evaluated on a single set
+of tags (`TagExpression.matches`), or on the bitsets of a module tags index (`TagExpression.get_bits`) so that all
+cases in a module are selected at once.
+"""
+import re
+
+try:  # python 2
+    string_types = basestring  # noqa
+except NameError:
+    string_types = str
+
+try:  # type hints, python 3+
+    from typing import Any, Callable, Iterable, List  # noqa
+
+    # Type hint for a compiled expression node: (tag -> bitset of cases having the tag, bitset of all cases) -> bitset
+    Node = Callable[[Callable[[str], int], int], int]
+except ImportError:
+    pass
+
+
+OPERATORS = ('and', 'or', 'not')
+"""The operators of the tags expressions language"""
+
+_TOKENS = re.compile(r'\s*([()]|[^\s()]+)')
+
+_EXPRESSION_TOKENS = frozenset(OPERATORS + ('(', ')'))
+"""The tokens that make a string a tags expression, see `is_tag_expression`"""
+
+
+def _tokenize(source  # type: str
+              ):
+    # type: (...) -> List[str]
+    """
+    Splits a tags expression into tokens: parenthesis, operators and tag names.
+
+    :param source:
+    :return:
+    """
+    tokens = []
+    pos = 0
+    end = len(source.rstrip())
+    while pos < end:
+        match = _TOKENS.match(source, pos)
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+def _tag_node(tag):
+    def node(get_tag_bits, all_bits):
+        return get_tag_bits(tag)
+    return node
+
+
+def _not_node(operand):
+    def node(get_tag_bits, all_bits):
+        return all_bits & ~operand(get_tag_bits, all_bits)
+    return node
+
+
+def _and_node(left, right):
+    def node(get_tag_bits, all_bits):
+        bits = left(get_tag_bits, all_bits)
+        # short-circuit
+        return bits & right(get_tag_bits, all_bits) if bits else 0
+    return node
+
+
+def _or_node(left, right):
+    def node(get_tag_bits, all_bits):
+        bits = left(get_tag_bits, all_bits)
+        # short-circuit
+        return bits | right(get_tag_bits, all_bits) if bits != all_bits else bits
+    return node
+
+
+class _Parser(object):
+    """
+    A recursive descent parser for the tags expressions. The grammar is the following, by increasing precedence:
+
+        or_expr  := and_expr ('or' and_expr)*
+        and_expr := not_expr ('and' not_expr)*
+        not_expr := 'not' not_expr | atom
+        atom     := '(' or_expr ')' | tag
+    """
+    __slots__ = 'source', 'tokens', 'pos'
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.pos = 0
+
+    def parse(self):
+        # type: (...) -> Node
+        if len(self.tokens) == 0:
+            raise ValueError("Invalid tags expression %r: it is empty" % self.source)
+        node = self.or_expr()
+        if self.pos < len(self.tokens):
+            self.error("unexpected %r" % self.tokens[self.pos])
+        return node
+
+    def error(self, msg):
+        raise ValueError("Invalid tags expression %r: %s at token %s" % (self.source, msg, self.pos + 1))
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.peek() == 'or':
+            self.pos += 1
+            node = _or_node(node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.peek() == 'and':
+            self.pos += 1
+            node = _and_node(node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.peek() == 'not':
+            self.pos += 1
+            return _not_node(self.not_expr())
+        return self.atom()
+
+    def atom(self):
+        token = self.peek()
+        if token is None:
+            self.error("unexpected end of expression")
+        elif token == '(':
+            self.pos += 1
+            node = self.or_expr()
+            if self.peek() != ')':
+                self.error("missing ')'")
+            self.pos += 1
+            return node
+        elif token == ')' or token in OPERATORS:
+            self.error("unexpected %r" % token)
+
+        self.pos += 1
+        return _tag_node(token)
+
+
+class TagExpression(object):
+    """
+    A compiled tags expression. Use `compile_tag_expression` to create it.
+    """
+    __slots__ = 'source', '_root'
+
+    def __init__(self, source  # type: str
+                 ):
+        self.source = source
+        self._root = _Parser(source).parse()
+
+    def __repr__(self):
+        return "TagExpression(%r)" % self.source
+
+    def get_bits(self,
+                 get_tag_bits,  # type: Callable[[str], int]
+                 all_bits       # type: int
+                 ):
+        # type: (...) -> int
+        """
+        Evaluates this expression on bitsets representing a collection of cases: bit i represents case i.
+
+        :param get_tag_bits: a function returning the bitset of the cases having a given tag
+        :param all_bits: the bitset of all cases
+        :return: the bitset of the cases matching the expression
+        """
+        return self._root(get_tag_bits, all_bits)
+
+    def matches(self, tags  # type: Iterable[Any]
+                ):
+        # type: (...) -> bool
+        """
+        Returns True if a case with the given tags matches this expression
+
+        :param tags:
+        :return:
+        """
+        return self._root(lambda tag: 1 if tag in tags else 0, 1) == 1
+
+
+_COMPILED = dict()
+"""The expressions compiled so far, by source"""
+
+
+def compile_tag_expression(source  # type: str
+                           ):
+    # type: (...) -> TagExpression
+    """
+    Compiles a tags expression such as `"a and not (b or c)"`, or returns the already compiled expression.
+    Raises a `ValueError` if the expression is invalid.
+
+    :param source:
+    :return:
+    """
+    try:
+        return _COMPILED[source]
+    except KeyError:
+        expr = _COMPILED[source] = TagExpression(source)
+        return expr
+
+
+def is_tag_expression(tag  # type: Any
+                      ):
+    # type: (...) -> bool
+    """
+    Returns True if `tag` is a string that should be interpreted as a tags expression rather than as a single tag
+    name, that is, if it contains an operator (`and`, `or`, `not`) or a parenthesis. Other strings such as "my tag" or
+    "a-b" are tag names.
+
+    :param tag:
+    :return:
+    """
+    return isinstance(tag, string_types) and any(t in _EXPRESSION_TOKENS for t in _tokenize(tag))
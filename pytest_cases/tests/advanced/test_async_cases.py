@@ -0,0 +1,79 @@
+import asyncio
+from time import perf_counter
+
+import pytest
+
+from pytest_cases import cases_data, cases_generator, THIS_MODULE, CaseDataGetter, get_all_cases
+from pytest_cases.async_cases import register_async_cases, gather_test_cases, pop_gathered_result, NOT_GATHERED
+
+DELAY = 0.05
+
+
+async def case_async():
+    await asyncio.sleep(DELAY)
+    return 1, 2, None
+
+
+@cases_generator("async gen i={i}", i=range(5))
+async def case_async_gen(i):
+    await asyncio.sleep(DELAY)
+    return i, i + 1, None
+
+
+def case_sync():
+    return 0, 1, None
+
+
+@cases_data(module=THIS_MODULE)
+def test_async_cases(case_data  # type: CaseDataGetter
+                     ):
+    i, expected, _ = case_data.get()
+    assert i + 1 == expected
+
+
+async def case_with_args(a, b=0):
+    return a + b
+
+
+def test_get_with_args():
+    c, = get_all_cases(cases=case_with_args)
+    assert c.get(1, b=2) == 3
+
+
+def test_get_in_running_loop():
+    """ get() can be called from code that runs in an event loop """
+    c, = get_all_cases(cases=case_async)
+
+    async def get_in_loop():
+        return c.get()
+
+    assert asyncio.run(get_in_loop()) == (1, 2, None)
+
+
+async def case_failing(i):
+    await asyncio.sleep(DELAY)
+    if i == 1:
+        raise ValueError(i)
+    return i
+
+
+def test_gather_concurrently():
+    cases = [(('k', i), case_failing, {'i': i}) for i in range(6)]
+    register_async_cases('t.py::test_foo', cases)
+
+    start = perf_counter()
+    gather_test_cases('t.py::test_foo', max_concurrency=3)
+    # 6 cases, 3 at a time: the duration of 2 cases, not 6
+    assert perf_counter() - start < 5 * DELAY
+
+    assert pop_gathered_result(('k', 0)) == 0
+    with pytest.raises(ValueError):
+        pop_gathered_result(('k', 1))
+    # each result is released once it has been retrieved
+    assert pop_gathered_result(('k', 0)) is NOT_GATHERED
+    for i in range(2, 6):
+        assert pop_gathered_result(('k', i)) == i
+
+    # nothing left to gather
+    gather_test_cases('t.py::test_foo')
+    assert pop_gathered_result(('k', 2)) is NOT_GATHERED
@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from pytest_cases import case_cache, cases_generator, get_all_cases
+from pytest_cases import memoize
+from pytest_cases.memoize import load_persisted_result, NOT_PERSISTED
+
+
+calls = []
+
+
+@case_cache
+def case_in_memory():
+    calls.append('in_memory')
+    return 1, None, None
+
+
+@case_cache(persist=True)
+@cases_generator("persisted i={i}", i=range(2))
+def case_persisted(i):
+    calls.append('persisted %s' % i)
+    return dict(i=i, data=list(range(100))), None, None
+
+
+def test_case_cache_in_memory():
+    c1, = get_all_cases(cases=case_in_memory)
+    c2, = get_all_cases(cases=case_in_memory)
+    assert c1.get() == c2.get()
+    assert calls.count('in_memory') == 1
+
+
+def test_case_cache_persisted(tmpdir, monkeypatch):
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+
+    c1, c2 = get_all_cases(cases=case_persisted)
+    assert load_persisted_result(case_persisted, dict(i=1)) is NOT_PERSISTED
+    assert c2.get()[0]['i'] == 1
+    assert calls.count('persisted 1') == 1
+    assert len(os.listdir(str(tmpdir))) == 1
+
+    # a new session would load it from the disk
+    assert load_persisted_result(case_persisted, dict(i=1)) == c2.get()
+    assert calls.count('persisted 1') == 1
+
+
+def test_case_cache_invalidation(tmpdir, monkeypatch):
+    """ The results persisted for a previous version of a case function are removed """
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+
+    def create_case(value):
+        @case_cache(persist=True)
+        def case_versioned():
+            return value
+        return case_versioned
+
+    v1, v2 = create_case(1), create_case(2)
+    memoize.compute_case(v1, dict())
+    assert load_persisted_result(v1, dict()) == 1
+    assert load_persisted_result(v2, dict()) is NOT_PERSISTED
+    memoize.compute_case(v2, dict())
+    assert load_persisted_result(v2, dict()) == 2
+    assert load_persisted_result(v1, dict()) is NOT_PERSISTED
+
+
+def test_case_cache_corrupt(tmpdir, monkeypatch):
+    """ A truncated persisted result is removed and computed again """
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+
+    @case_cache(persist=True)
+    def case_truncated():
+        calls.append('truncated')
+        return list(range(100))
+
+    memoize.compute_case(case_truncated, dict())
+    pkl_file, = [os.path.join(str(tmpdir), f) for f in os.listdir(str(tmpdir))]
+    with open(pkl_file, 'rb') as file:
+        data = file.read()
+    with open(pkl_file, 'wb') as file:
+        file.write(data[:len(data) // 2])
+
+    assert load_persisted_result(case_truncated, dict()) is NOT_PERSISTED
+    assert not os.path.exists(pkl_file)
+    assert memoize.compute_case(case_truncated, dict()) == list(range(100))
+    assert calls.count('truncated') == 2
+    assert load_persisted_result(case_truncated, dict()) == list(range(100))
+
+
+class RenamedResult(object):
+    pass
+
+
+def test_case_cache_renamed_class(tmpdir, monkeypatch):
+    """ A persisted result whose class was renamed or moved is removed and computed again """
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+
+    @case_cache(persist=True)
+    def case_renamed():
+        calls.append('renamed')
+        return RenamedResult()
+
+    memoize.compute_case(case_renamed, dict())
+    pkl_file, = [os.path.join(str(tmpdir), f) for f in os.listdir(str(tmpdir))]
+
+    this_module = sys.modules[__name__]
+    result_class = RenamedResult
+    monkeypatch.delattr(this_module, 'RenamedResult')
+    assert load_persisted_result(case_renamed, dict()) is NOT_PERSISTED
+    assert not os.path.exists(pkl_file)
+
+    monkeypatch.setattr(this_module, 'RenamedResult', result_class, raising=False)
+    assert isinstance(memoize.compute_case(case_renamed, dict()), RenamedResult)
+    assert calls.count('renamed') == 2
+
+
+def test_case_cache_numpy(tmpdir, monkeypatch):
+    """ Large numpy arrays are memory-mapped """
+    np = pytest.importorskip('numpy')
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+
+    @case_cache(persist=True)
+    def case_array():
+        return np.arange(100000), np.arange(10), None
+
+    memoize.compute_case(case_array, dict())
+    big, small, _ = load_persisted_result(case_array, dict())
+    assert isinstance(big, np.memmap) and not big.flags.writeable
+    assert (big == np.arange(100000)).all()
+    assert not isinstance(small, np.memmap)
+
+
+class Settings(object):
+    def __init__(self, size):
+        self.size = size
+
+
+def _create_closure_case(value):
+    @case_cache(persist=True)
+    def case_closure():
+        return value
+    return case_closure
+
+
+def test_case_cache_stable_key():
+    """ Objects in the closure are identified by their contents, not by their memory address """
+    v1, v2 = _create_closure_case(Settings(1)), _create_closure_case(Settings(1))
+    assert memoize._get_persisted_file_prefix(v1, dict()) == memoize._get_persisted_file_prefix(v2, dict())
+
+    v3 = _create_closure_case(Settings(2))
+    assert memoize._get_persisted_file_prefix(v1, dict()) != memoize._get_persisted_file_prefix(v3, dict())
+
+
+def test_case_cache_not_persistable(tmpdir, monkeypatch):
+    """ Results of case functions that can not be identified across sessions are only kept in memory """
+    monkeypatch.setattr(memoize, '_get_persist_dir', lambda: str(tmpdir))
+    lock_calls = []
+
+    @case_cache(persist=True)
+    def case_lock(lock=threading.Lock()):
+        lock_calls.append(None)
+        return 1
+
+    with pytest.warns(UserWarning, match="only be kept in memory"):
+        assert memoize.compute_case(case_lock, dict()) == 1
+    assert memoize.compute_case(case_lock, dict()) == 1
+    assert len(lock_calls) == 1
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_case_cache_numpy_key():
+    """ A change in the contents of a large array in the defaults changes the key, even if its repr does not """
+    np = pytest.importorskip('numpy')
+    a1 = np.zeros(10000)
+    a2 = a1.copy()
+    a2[5000] = 1
+    assert repr(a1) == repr(a2)
+    v1, v2 = _create_closure_case(a1), _create_closure_case(a2)
+    assert memoize._get_persisted_file_prefix(v1, dict()) != memoize._get_persisted_file_prefix(v2, dict())
@@ -0,0 +1,160 @@
+from pytest_cases.case_history import enable_history, load_history, save_history, clear_history, \
+    record_case_result, get_case_mean_duration, get_case_total_duration, get_runs_since_failure, \
+    get_history_sort_key, get_next_run, HISTORY_CACHE_KEY, RECENT_RUNS, MAX_UNSEEN_RUNS
+from pytest_cases.plugin import _sort_items_by_history, pytest_configure_node, pytest_sessionfinish
+from pytest_cases.tests.utils import FakeCache, FakeConfig, FakeItem, get_fake_case_getters
+
+
+def load_fake_history(run, cases):
+    """ Loads the history of `cases` recorded up to session `run` """
+    cache = FakeCache()
+    cache.set(HISTORY_CACHE_KEY, {'run': run, 'cases': cases})
+    clear_history()
+    load_history(cache)
+
+
+def test_history(empty_history):
+    cache = FakeCache()
+    load_history(cache)
+
+    # session 1: a fails, b passes
+    record_case_result('a', 0, False)  # setup
+    record_case_result('a', 2., True)
+    record_case_result('a', 1., False)
+    record_case_result('b', 0.5, False)
+    save_history(cache)
+
+    assert cache.get(HISTORY_CACHE_KEY, None)['run'] == 1
+    assert get_case_total_duration('a') == 3.
+    assert get_case_mean_duration('a') == 1.5
+    assert get_runs_since_failure('a') == 0
+    assert get_runs_since_failure('b') is None
+    assert get_case_mean_duration('c', default=-1) == -1
+
+    # session 2, loaded from the cache: only b is used, a keeps its history
+    clear_history()
+    load_history(cache)
+    record_case_result('b', 0.25, False)
+    save_history(cache)
+    assert cache.get(HISTORY_CACHE_KEY, None)['run'] == 2
+    assert get_runs_since_failure('a') == 1
+    assert get_case_mean_duration('b') == 0.25
+
+    # nothing recorded: the history is not modified
+    save_history(cache)
+    assert cache.get(HISTORY_CACHE_KEY, None)['run'] == 2
+
+
+class FakeCacheDir(FakeCache):
+    """ A fake pytest cache with a directory, so that the history lock is used """
+    def __init__(self, directory):
+        super(FakeCacheDir, self).__init__()
+        self.directory = directory
+
+    def mkdir(self, name):
+        return self.directory.ensure_dir(name)
+
+
+class FakeSession(object):
+    def __init__(self, config):
+        self.config = config
+
+
+class FakeNode(object):
+    def __init__(self, config):
+        self.config = config
+        self.workerinput = dict()
+
+
+def test_xdist_history(empty_history, tmpdir):
+    """ The xdist workers merge their results in the history, under the session number chosen by the controller """
+    cache = FakeCacheDir(tmpdir)
+    cache.set(HISTORY_CACHE_KEY, {'run': 3, 'cases': {'a': [1., 1, None, 3], 'old': [1., 1, None, 2]}})
+
+    # the controller
+    load_history(cache)
+    node = FakeNode(FakeConfig(cache))
+    pytest_configure_node(node)
+    workerinput = node.workerinput
+    assert workerinput['cases_history_run'] == 4
+
+    # two workers, that both use case a
+    for results in ([('a', 2., True), ('b', 1., False)], [('a', 1., False), ('c', 0.5, False)]):
+        clear_history()
+        load_history(cache)
+        for case_id, duration, failed in results:
+            record_case_result(case_id, duration, failed)
+        pytest_sessionfinish(FakeSession(FakeConfig(cache, workerinput)))
+
+    # the controller has nothing to save
+    pytest_sessionfinish(FakeSession(FakeConfig(cache)))
+
+    clear_history()
+    load_history(cache)
+    assert cache.get(HISTORY_CACHE_KEY, None)['run'] == 4
+    assert get_case_total_duration('a') == 3.
+    assert get_case_mean_duration('a') == 1.5
+    assert get_runs_since_failure('a') == 0
+    assert get_case_total_duration('b') == 1.
+    assert get_case_total_duration('c') == 0.5
+    assert get_runs_since_failure('old') is None
+    assert get_case_total_duration('old') == 1.
+
+
+def test_history_disabled(empty_history):
+    """ Nothing is saved when no option uses the history """
+    cache = FakeCache()
+    enable_history(False)
+    record_case_result('a', 1., False)
+    pytest_sessionfinish(FakeSession(FakeConfig(cache)))
+    assert cache.get(HISTORY_CACHE_KEY, None) is None
+
+
+def test_history_unseen(empty_history):
+    """ The cases that were not used in the last MAX_UNSEEN_RUNS sessions are removed """
+    cache = FakeCache()
+    cache.set(HISTORY_CACHE_KEY, {'run': MAX_UNSEEN_RUNS, 'cases': {'a': [1., 1, None, 1], 'b': [1., 1, None, 2]}})
+    load_history(cache)
+    record_case_result('c', 1., False)
+    save_history(cache)
+    assert get_case_total_duration('a') is None
+    assert get_case_total_duration('b') == 1.
+    assert get_case_total_duration('c') == 1.
+
+
+def test_corrupted_history(empty_history):
+    cache = FakeCache()
+    cache.set(HISTORY_CACHE_KEY, {'foo': 1})
+    load_history(cache)
+    assert get_next_run() == 1
+    assert get_case_mean_duration('a') is None
+
+
+def test_sort_key(empty_history):
+    load_fake_history(10, {
+        'failed_now': [1., 1, 10, 10],
+        'failed_before': [5., 1, 8, 10],
+        'failed_long_ago': [3., 1, 10 - RECENT_RUNS, 10],
+        'fast': [1., 2, None, 10],
+        'slow': [10., 2, None, 10],
+    })
+    order = sorted(['fast', 'failed_long_ago', 'new', 'slow', 'failed_before', 'failed_now'],
+                   key=lambda c: get_history_sort_key([c]))
+    assert order == ['failed_now', 'failed_before', 'new', 'slow', 'failed_long_ago', 'fast']
+
+    # a test using several cases
+    assert get_history_sort_key(['fast', 'failed_before']) == get_history_sort_key(['failed_before'])
+
+
+def test_sort_items(empty_history, monkeypatch):
+    """ Only the items of each test function are reordered """
+    load_fake_history(1, {'None::slow': [10., 1, None, 1], 'None::fast': [1., 1, None, 1],
+                          'None::failed': [1., 1, 1, 1]})
+
+    items = [FakeItem(i) for i in ('t.py::other', 't.py::test_a[fast]', 't.py::test_a[slow]', 't.py::test_a[failed]',
+                                   't.py::test_b[fast]', 't.py::test_b[slow]')]
+    monkeypatch.setattr('pytest_cases.plugin._CASE_GETTERS', get_fake_case_getters(items))
+
+    sorted_ids = [item.nodeid for item in _sort_items_by_history(items)]
+    assert sorted_ids == ['t.py::other', 't.py::test_a[failed]', 't.py::test_a[slow]', 't.py::test_a[fast]',
+                          't.py::test_b[slow]', 't.py::test_b[fast]']
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from pytest_cases import cases_data, cases_from_files, cases_from_file, load_mmap, get_all_cases, CaseDataGetter
+from pytest_cases.case_sources import _RowsIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'case_sources_data')
+"""A directory containing raw binary files: input_<i>.bin contains the bytes i to i + 7"""
+
+
+@cases_data(cases=cases_from_files(DATA_DIR, 'input_*.bin'))
+def test_raw_files(case_data  # type: CaseDataGetter
+                   ):
+    data, _, _ = case_data.get()
+    assert len(data) == 8
+    assert data[1] == data[0] + 1
+
+    # read-only
+    with pytest.raises((TypeError, ValueError)):
+        data[0] = 0
+
+
+def test_cases_from_files():
+    cases = get_all_cases(cases=cases_from_files(DATA_DIR, 'input_*.bin', name_template='file {file_name}'))
+    assert [str(c) for c in cases] == ['file input_0.bin', 'file input_1.bin', 'file input_2.bin']
+
+    assert get_all_cases(cases=cases_from_files(DATA_DIR, '*.txt')) == []
+
+
+def test_raw_offset():
+    data = load_mmap(os.path.join(DATA_DIR, 'input_2.bin'), offset=4)
+    assert list(data) == [6, 7, 8, 9]
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_npy(tmpdir):
+    np.save(str(tmpdir.join('a.npy')), np.arange(12).reshape((3, 4)))
+    np.save(str(tmpdir.join('b.npy')), np.ones(5))
+
+    cases = get_all_cases(cases=cases_from_files(str(tmpdir), '*.npy'))
+    a, _, _ = cases[0].get()
+    assert isinstance(a, np.memmap)
+    assert a.shape == (3, 4) and a[2, 3] == 11
+    assert not a.flags.writeable
+
+    raw = load_mmap(os.path.join(DATA_DIR, 'input_1.bin'), dtype=np.uint16, shape=(2, 2))
+    assert raw.shape == (2, 2)
+
+    with pytest.raises(ValueError):
+        load_mmap(str(tmpdir.join('a.npy')), dtype=np.uint16)
+
+
+@cases_data(cases=cases_from_file(os.path.join(DATA_DIR, 'vectors.jsonl'), id_field='name', expected_field='result'))
+def test_jsonl_rows(case_data  # type: CaseDataGetter
+                    ):
+    given, expected, _ = case_data.get()
+    assert given['a'] + given['b'] == expected
+
+
+@cases_data(cases=cases_from_file(os.path.join(DATA_DIR, 'vectors.csv'), given_fields=['a', 'b'],
+                                  expected_field='result'))
+def test_csv_rows(case_data  # type: CaseDataGetter
+                  ):
+    given, expected, _ = case_data.get()
+    assert int(given['a']) + int(given['b']) == int(expected)
+
+
+def test_rows_synthesis(request):
+    items = [item.name for item in request.session.items if item.name.startswith(('test_jsonl_rows',
+                                                                                  'test_csv_rows'))]
+    assert items == ['test_jsonl_rows[add]', 'test_jsonl_rows[add_negative]', 'test_jsonl_rows[add_zero]',
+                     'test_csv_rows[vectors.csv:0]', 'test_csv_rows[vectors.csv:1]']
+
+
+def test_rows_index(tmpdir):
+    """ Rows are read from their offsets, and CSV rows may contain quoted line breaks """
+    f = tmpdir.join('data.csv')
+    f.write_text(u'id,text\nx,"multi\nline, with ""quotes"""\ny,é\n', encoding='utf-8')
+    cases = get_all_cases(cases=cases_from_file(str(f), id_field='id', given_fields='text'))
+    assert [str(c) for c in cases] == ['x', 'y']
+    assert [c.get()[0] for c in cases] == [u'multi\nline, with "quotes"', u'é']
+
+    f = tmpdir.join('values.txt')
+    f.write('[1, 2]\n"a"\n')
+    cases = get_all_cases(cases=cases_from_file(str(f), file_format='jsonl', name_template='v{row}'))
+    assert [str(c) for c in cases] == ['v0', 'v1']
+    assert cases[0].get() == ([1, 2], None, None)
+
+    with pytest.raises(ValueError):
+        cases_from_file(str(f))
+    with pytest.raises(ValueError):
+        cases_from_file(str(f), file_format='jsonl', id_field='name')
+
+
+def test_rows_index_ids(tmpdir):
+    """ The ids are extracted while indexing the file, and the offsets are stored as integers """
+    f = tmpdir.join('ids.csv')
+    f.write_text(u'text,id\na,x\n\nb,y\n', encoding='utf-8')
+    rows_index = _RowsIndex(str(f), 'csv', 'id')
+    assert rows_index.ids == ['x', 'y']
+    assert rows_index.starts.typecode in ('q', 'l') and list(rows_index.starts) == [8, 13]
+    assert rows_index.read_row(1) == {'text': 'b', 'id': 'y'}
+
+    with pytest.raises(ValueError, match="has no field 'name'"):
+        _RowsIndex(str(f), 'csv', 'name')
+    f.write_text(u'text,id\na,x\nb\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="Row 1 .* has no field 'id'"):
+        _RowsIndex(str(f), 'csv', 'id')
@@ -0,0 +1,98 @@
+import pytest
+
+from pytest_cases import cases_data, CaseDataGetter, THIS_MODULE, cases_generator
+from pytest_cases.case_stats import enable_case_stats, get_slowest_cases, get_case_id, record_test_duration, \
+    get_slowest_tested_cases
+from pytest_cases.common import get_pytest_config
+from pytest_cases.main import CaseDataFromFunction
+
+
+def case_plain():
+    return 1, None, None
+
+
+@cases_generator("gen i={i}", i=range(2))
+def case_gen(i):
+    return i, None, None
+
+
+@pytest.fixture
+def enabled_stats():
+    """ Empty statistics, enabled during the test only """
+    enable_case_stats(False)
+    enable_case_stats()
+    yield
+    enable_case_stats(False)
+
+
+def test_getters_timings(enabled_stats):
+    case_data = CaseDataFromFunction(case_plain)
+    case_data.get()
+    case_data.get()
+
+    (case_id, calls, total, max_t), = get_slowest_cases()
+    assert case_id == get_case_id(case_data) == __name__ + '::case_plain'
+    assert calls == 2
+    assert 0 <= max_t <= total
+
+
+def test_tests_durations(enabled_stats):
+    record_test_duration('a', 1.)
+    record_test_duration('b', 3.)
+    record_test_duration('a', 1.5)
+    assert get_slowest_tested_cases() == [('b', 1, 3.), ('a', 2, 2.5)]
+    assert get_slowest_tested_cases(1) == [('b', 1, 3.)]
+
+
+@cases_data(module=THIS_MODULE)
+def test_case_getters_index(case_data,  # type: CaseDataGetter
+                            request):
+    """ The plugin indexes the case getters used by each item """
+    if get_pytest_config() is None:
+        pytest.skip("the pytest-cases plugin is not active")
+
+    from pytest_cases.plugin import get_case_getters, get_test_id
+    assert get_case_getters(request.node) == [case_data]
+    assert get_test_id(request.node).endswith('test_case_stats.py::test_case_getters_index')
+
+
+def test_cases_stats_summary(cases_pytester):
+    """ The cases statistics are displayed in the terminal summary """
+    cases_pytester.makepyfile("""
+        from pytest_cases import cases_data, cases_generator, THIS_MODULE
+
+        def case_plain():
+            return 1, None, None
+
+        @cases_generator("gen i={i}", i=range(2))
+        def case_gen(i):
+            return i, None, None
+
+        @cases_data(module=THIS_MODULE)
+        def test_foo(case_data):
+            case_data.get()
+    """)
+    result = cases_pytester.runpytest_subprocess('--cases-stats')
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines([
+        '*- pytest-cases statistics -*',
+        '1 test functions use cases: 3 case usages (2 generated, 1 plain)',
+        '',
+        'test functions with the most cases:',
+        '   cases  generated    plain  test',
+        '       3          2        1  test_cases_stats_summary.py::test_foo',
+        '',
+        'slowest case getters:',
+        ' total (s)    calls    max (s)  case',
+        '*        1 * test_cases_stats_summary::*',
+        '*',
+        '*',
+        '',
+        'cases with the slowest tests:',
+        ' total (s)    tests  case',
+        '*        1  test_cases_stats_summary::*',
+    ])
+    # each case is listed in both tables
+    output = result.stdout.str()
+    for case_id in ('case_plain', 'gen i=0', 'gen i=1'):
+        assert output.count('  test_cases_stats_summary::%s\n' % case_id) == 2
@@ -0,0 +1,117 @@
+import json
+import sys
+
+import pytest
+
+from pytest_cases import cases_data, pytest_fixture_plus, param_fixtures
+from pytest_cases.collect_stats import enable_collect_stats, get_collect_stats
+
+
+def case_a():
+    return 1, None, None
+
+
+@pytest.mark.skip
+def case_b():
+    return 2, None, None
+
+
+@pytest.fixture
+def enabled_stats():
+    """ Empty statistics, enabled during the test only """
+    enable_collect_stats(False)
+    enable_collect_stats()
+    yield
+    enable_collect_stats(False)
+
+
+def test_cases_data_stats(enabled_stats):
+    def test_foo(case_data):
+        pass
+
+    cases_data(module=sys.modules[__name__])(test_foo)
+
+    s, = get_collect_stats()
+    assert s.kind == 'cases_data'
+    assert s.name.endswith('test_foo')
+    assert s.getters == 2
+    assert s.marks == 1
+    assert s.wall_time > 0
+    assert set(s.sections) == {'get_all_cases', 'extract_cases_from_module', '_get_case_getter_s',
+                               'get_pytest_parametrize_args'}
+    assert s.sections['_get_case_getter_s'][0] == 2
+    assert s.to_dict()['sections']['get_all_cases']['calls'] == 1
+
+
+def test_fixture_stats(enabled_stats):
+    @pytest.mark.parametrize('a', [1, pytest.param(2, marks=pytest.mark.skip)])
+    @pytest.mark.parametrize('b', [1, 2])
+    def my_fixture(a, b):
+        pass
+
+    pytest_fixture_plus(my_fixture)
+
+    # param_fixtures uses pytest_fixture_plus: everything is accounted in a single entry
+    param_fixtures('my_arg1, my_arg2', [(1, 2), (3, 4)])
+
+    s1, s2 = get_collect_stats()
+    assert s1.kind == 'pytest_fixture_plus'
+    assert s1.marks == 2
+    assert s1.sections['pytest_fixture_plus/product'][0] == 1
+    assert s2.kind == 'param_fixtures'
+    assert s2.name.endswith('param_fixtures_root__my_arg1_my_arg2')
+    assert s2.sections['pytest_fixture_plus/product'][0] == 1
+
+
+def test_disabled():
+    enable_collect_stats(False)
+
+    @cases_data(cases=case_a)
+    def test_foo(case_data):
+        pass
+
+    assert get_collect_stats() == []
+
+
+CASES_MODULE = """
+import pytest
+from pytest_cases import cases_data, cases_generator, THIS_MODULE
+
+def case_a():
+    return 1, None, None
+
+@pytest.mark.skip
+def case_b():
+    return 2, None, None
+
+@cases_generator("gen i={i}", i=range(3))
+def case_gen(i):
+    return i, None, None
+
+@cases_data(module=THIS_MODULE)
+def test_foo(case_data):
+    case_data.get()
+"""
+
+
+def test_collect_stats_summary(cases_pytester):
+    """ The collection statistics are displayed in the terminal summary and written in the json file """
+    cases_pytester.makepyfile(CASES_MODULE)
+    result = cases_pytester.runpytest_subprocess('--cases-collect-stats', '--cases-collect-stats-json=stats.json')
+    result.assert_outcomes(passed=4, skipped=1)
+    result.stdout.fnmatch_lines([
+        '*- pytest-cases collection statistics -*',
+        '1 decorated test functions and fixtures, *s, 5 case getters, 1 marked parameters, * bytes',
+        ' time (s)  getters  marks      bytes  decorated',
+        '*       5      1 * test_collect_stats_summary::test_foo (cases_data)',
+    ])
+
+    with open(str(cases_pytester.path / 'stats.json')) as f:
+        summary = json.load(f)
+    assert summary['total']['count'] == 1
+    assert summary['total']['getters'] == 5
+    assert summary['total']['marks'] == 1
+    entry, = summary['entries']
+    assert entry['kind'] == 'cases_data'
+    assert entry['name'] == 'test_collect_stats_summary::test_foo'
+    assert entry['sections']['_get_case_getter_s']['calls'] == 3
@@ -0,0 +1,96 @@
+import sys
+
+import pytest
+
+from pytest_cases import cases_generator, get_all_cases, get_pytest_parametrize_args
+from pytest_cases.common import ColumnTable
+from pytest_cases.main import CaseDataFromFunction, GeneratedCaseDataFromFunction, _GeneratedCases
+
+
+def test_column_table():
+    """ ColumnTable behaves like the list of rows it was created from """
+    rows = [(1, 'a', None), (2, 'b', True), (3, 'c', False)]
+    table = ColumnTable(iter(rows), nb_columns=3)
+
+    assert len(table) == 3
+    assert table.columns == ((1, 2, 3), ('a', 'b', 'c'), (None, True, False))
+    assert list(table) == rows
+    assert [table[i] for i in range(3)] == rows
+    assert table[-1] == rows[-1]
+
+    assert len(ColumnTable([], nb_columns=2)) == 0
+    assert list(ColumnTable([(), ()])) == [(), ()]
+    with pytest.raises(ValueError):
+        ColumnTable(rows, nb_columns=2)
+
+
+@cases_generator("i={i},j={j}", i=range(100), j=range(100))
+def case_gen(i, j):
+    return i * j, None, None
+
+
+def case_plain():
+    return 1, None, None
+
+
+def test_no_instance_dict():
+    """ Case getters do not have an instance dictionary, generated ones only reference the shared table """
+    cases = get_all_cases(cases=[case_gen, case_plain])
+    assert len(cases) == 10001
+
+    plain = cases[-1]
+    assert type(plain) is CaseDataFromFunction
+    assert not hasattr(plain, '__dict__')
+
+    generated = cases[:-1]
+    assert all(type(c) is GeneratedCaseDataFromFunction and not hasattr(c, '__dict__') for c in generated)
+    assert len(set(id(c.generated_cases) for c in generated)) == 1
+
+    # generated getters only have their own 2 slots, and are still considered as `CaseDataFromFunction`
+    assert sys.getsizeof(generated[0]) < sys.getsizeof(plain)
+    assert isinstance(generated[0], CaseDataFromFunction)
+
+    with pytest.raises(AttributeError):
+        plain.foo = 1
+
+
+def test_generated_api():
+    """ Generated getters have the same API than regular ones """
+    cases = get_all_cases(cases=case_gen)
+    c = cases[205]
+    assert str(c) == 'i=2,j=5'
+    assert c.f is case_gen
+    assert c.function_kwargs == dict(i=2, j=5)
+    assert c.get() == (10, None, None)
+    assert c.get_marks() == []
+    assert get_pytest_parametrize_args(cases[:3])[1] == ['i=0,j=0', 'i=0,j=1', 'i=0,j=2']
+
+
+def test_explicit_rows():
+    """ An explicit list of combinations is stored column-wise """
+    def case_f(a, b):
+        return a + b, None, None
+
+    generated_cases = _GeneratedCases(case_f, "{a}-{b}", ('a', 'b'), [(1, 2), (3, 4)])
+    assert isinstance(generated_cases.param_values, ColumnTable)
+    assert generated_cases.param_values.columns == ((1, 3), (2, 4))
+
+    c = GeneratedCaseDataFromFunction(generated_cases, 1)
+    assert str(c) == '3-4'
+    assert c.get() == (7, None, None)
+
+
+@cases_generator("i={i}", i=range(3), j=range(2))
+def case_duplicate_names(i, j):
+    return i, j, None
+
+
+def test_generated_names_checked_once():
+    """ Generated names are checked for uniqueness once, without keeping per-case data in the shared table """
+    c = get_all_cases(cases=case_gen)[0]
+    assert str(c) == 'i=0,j=0'
+    assert c.generated_cases._names_checked
+    assert not hasattr(c.generated_cases, '__dict__')
+
+    with pytest.raises(ValueError, match="not unique"):
+        str(get_all_cases(cases=case_duplicate_names)[0])
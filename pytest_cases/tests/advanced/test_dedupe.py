@@ -0,0 +1,90 @@
+import pytest
+
+from pytest_cases import cases_data, cases_generator, THIS_MODULE, CaseDataGetter
+from pytest_cases.dedupe import get_content_digest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def case_a():
+    return [1, 2, 3], None, None
+
+
+def case_a_again():
+    """ a duplicate of case_a """
+    return [1, 2, 3], None, None
+
+
+def case_b():
+    return [1, 2], None, None
+
+
+@cases_generator("gen i={i}", i=range(4))
+def case_gen(i):
+    """ gen i=0 and gen i=1 are duplicates of case_b, gen i=3 of case_a """
+    return ([1, 2] if i < 2 else [1, 2, i]), None, None
+
+
+def case_unpicklable():
+    return (lambda: 1), None, None
+
+
+@cases_data(module=THIS_MODULE, dedupe=True)
+@pytest.mark.parametrize('x', [0, 1])
+def test_dedupe(case_data,  # type: CaseDataGetter
+                x):
+    ins, _, _ = case_data.get()
+    assert ins
+
+
+@cases_data(module=THIS_MODULE)
+def test_no_dedupe(case_data  # type: CaseDataGetter
+                   ):
+    ins, _, _ = case_data.get()
+    assert ins
+
+
+_CALLS = []
+
+
+def counted_case():
+    _CALLS.append(1)
+    return [4, 5], None, None
+
+
+@cases_data(cases=counted_case, dedupe=True)
+def test_dedupe_computed_once(case_data  # type: CaseDataGetter
+                              ):
+    ins, _, _ = case_data.get()
+    assert ins == [4, 5]
+    # the data computed to detect duplicates is reused
+    assert len(_CALLS) == 1
+
+
+def test_synthesis(request):
+    def skipped(prefix):
+        items = [item for item in request.session.items if item.name.startswith(prefix)]
+        return [item.name for item in items if item.get_closest_marker('skip') is not None]
+
+    assert set(skipped('test_dedupe[')) == set('test_dedupe[%s-%s]' % (x, c) for x in (0, 1)
+                                               for c in ('case_a_again', 'gen i=0', 'gen i=1', 'gen i=3'))
+    if not request.config.getoption('cases_dedupe'):
+        assert skipped('test_no_dedupe[') == []
+
+
+def test_content_digest():
+    assert get_content_digest([1, 2, 3]) == get_content_digest([1, 2, 3])
+    assert get_content_digest([1, 2, 3]) != get_content_digest([1, 2])
+    assert get_content_digest((1, 2)) != get_content_digest([1, 2])
+    assert get_content_digest(lambda: 1) is None
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_content_digest_array():
+    a = np.arange(100000)
+    assert get_content_digest(a) == get_content_digest(np.arange(100000))
+    assert get_content_digest(a) != get_content_digest(a.reshape((1000, 100)))
+    assert get_content_digest(a[::2]) == get_content_digest(np.arange(0, 100000, 2))
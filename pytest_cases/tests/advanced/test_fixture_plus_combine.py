@@ -0,0 +1,78 @@
+from itertools import combinations, product
+
+import pytest
+
+from pytest_cases import pytest_fixture_plus
+from pytest_cases.covering_arrays import build_covering_array, CoveringArray
+
+
+def assert_covers(rows, sizes, strength):
+    """ Asserts that `rows` is a covering array of the given strength """
+    for cols in combinations(range(len(sizes)), strength):
+        expected = set(product(*(range(sizes[c]) for c in cols)))
+        assert set(tuple(r[c] for c in cols) for r in rows) == expected
+
+
+@pytest.mark.parametrize('sizes, strength, max_rows', [((5, 8, 6, 4), 2, 50),
+                                                       ((3,) * 13, 2, 25),
+                                                       ((4,) * 6, 3, 120),
+                                                       ((2, 3, 4), 1, 4),
+                                                       ((2, 3), 2, 6),
+                                                       ((2, 3), 5, 6)])
+def test_covering_array(sizes, strength, max_rows):
+    rows = build_covering_array(sizes, strength)
+    assert_covers(rows, sizes, strength)
+    assert len(rows) <= max_rows
+
+    # deterministic
+    assert build_covering_array(sizes, strength) == rows
+
+
+def test_covering_array_sequence():
+    ranges = (range(5), 'abcdefgh', [True, False, None, 1, 2, 3], (i for i in range(4)))
+    ca = CoveringArray(ranges, 2)
+    assert len(ca) == 50
+    assert_covers([ca.get_indices(i) for i in range(len(ca))], (5, 8, 6, 4), 2)
+    assert list(ca)[3] == ca[3]
+    assert ca[3][1] in 'abcdefgh'
+
+    assert len(CoveringArray((range(3), ()), 2)) == 0
+
+
+def test_invalid_combine():
+    def my_fix(a, b):
+        pass
+
+    with pytest.raises(ValueError):
+        pytest_fixture_plus(combine='pairwise', strength=3)(my_fix)
+    with pytest.raises(ValueError):
+        pytest_fixture_plus(combine='nwise')(my_fix)
+    with pytest.raises(ValueError):
+        pytest_fixture_plus(strength=2)(my_fix)
+    with pytest.raises(ValueError):
+        pytest_fixture_plus(combine='random')(my_fix)
+
+
+@pytest_fixture_plus(combine='pairwise')
+@pytest.mark.parametrize('a', range(5))
+@pytest.mark.parametrize('b', range(8))
+@pytest.mark.parametrize('c', [pytest.param(0, marks=pytest.mark.skip)] + list(range(1, 6)))
+@pytest.mark.parametrize('d', range(4), ids=['d0', 'd1', 'd2', 'd3'])
+def config(a, b, c, d):
+    return a, b, c, d
+
+
+def test_pairwise_fixture(config, request):
+    a, b, c, d = config
+    assert c != 0
+    # the parametrize marks are listed from the closest to the function to the farthest
+    assert request.node.callspec.id == 'd%s-%s-%s-%s' % (d, c, b, a)
+
+
+def test_synthesis(request):
+    items = [item for item in request.session.items if item.name.startswith('test_pairwise_fixture')]
+    assert len(items) == 50
+
+    combinations_ = set(tuple(item.callspec.params['config']) for item in items)
+    assert len(combinations_) == 50
+    assert_covers([(a, b, c, d) for d, c, b, a in combinations_], (5, 8, 6, 4), 2)
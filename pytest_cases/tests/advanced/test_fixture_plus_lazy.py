@@ -0,0 +1,84 @@
+from itertools import product
+
+import pytest
+
+from pytest_cases import pytest_fixture_plus
+from pytest_cases.common import LazyParamsProduct, HAS_PYTEST_PARAM, get_marked_parameter_values, \
+    get_marked_parameter_id, get_marked_parameter_marks, get_pytest_config
+
+
+pytestmark = pytest.mark.skipif(not HAS_PYTEST_PARAM, reason="pytest.param is not available in this version of pytest")
+
+
+def test_lazy_params_product():
+    """ LazyParamsProduct creates the same combinations, ids and marks than the full cartesian product """
+    skip = pytest.mark.skip.mark
+    values = [(1, 2), ('a', 'b', 'c'), ((0, 0), (1, 1))]
+    ids = [('1', '2'), ('a', None, 'c'), ('x', 'y')]
+    marks = [(None, (skip,)), (None, None, None), (None, (skip,))]
+    params = LazyParamsProduct(values, ids, marks)
+
+    assert len(params) == 12
+    assert params.get_nb_marked() == 9
+    assert [get_marked_parameter_values(p)[0] for p in params] == list(product(*values))
+
+    p = params[5]
+    assert get_marked_parameter_values(p) == ((1, 'c', (1, 1)),)
+    assert get_marked_parameter_id(p) == '1-c-y'
+    assert len(get_marked_parameter_marks(p)) == 1
+    assert get_marked_parameter_id(params[2]) == '1-None-x'
+    assert len(get_marked_parameter_marks(params[-1])) == 2
+
+    with pytest.raises(IndexError):
+        params[12]
+
+
+def test_lazy_params_single():
+    """ With a single parametrize mark, the values are not wrapped in a tuple """
+    params = LazyParamsProduct([(1, 2)], [('one', 2)], [(None, None)])
+    assert get_marked_parameter_values(params[0]) == (1,)
+    assert get_marked_parameter_id(params[0]) == 'one'
+    assert get_marked_parameter_id(params[1]) == '2'
+    assert params.get_nb_marked() == 0
+
+
+@pytest_fixture_plus
+@pytest.mark.parametrize('a', [1, 2])
+@pytest.mark.parametrize('b', [1, 2])
+@pytest.mark.parametrize('c', [1, pytest.param(2, marks=pytest.mark.skip)])
+@pytest.mark.parametrize('d', [1, 2], ids=['d1', 'd2'])
+@pytest.mark.parametrize('e', [1, 2])
+@pytest.mark.parametrize('f', [pytest.param(1, id='f1'), 2])
+def six_marks(a, b, c, d, e, f):
+    return a, b, c, d, e, f
+
+
+def test_six_marks(six_marks, request):
+    a, b, c, d, e, f = six_marks
+    assert c == 1
+    # the parametrize marks are listed from the closest to the function to the farthest
+    assert request.node.callspec.id == '%s-%s-d%s-%s-%s-%s' % ('f1' if f == 1 else f, e, d, c, b, a)
+
+
+def test_synthesis(request):
+    results_dct = dict()
+    for item in request.session.items:
+        if item.name.startswith('test_six_marks'):
+            results_dct[item.name] = item
+    assert len(results_dct) == 64
+
+
+@pytest_fixture_plus
+@pytest.mark.parametrize('a', range(30))
+@pytest.mark.parametrize('b', range(30))
+def unused_fixture(a, b):
+    return a, b
+
+
+def test_unused_fixture_params(request):
+    """ The parameters of a fixture are only created when a test using it is collected """
+    if get_pytest_config() is None:
+        pytest.skip("the pytest-cases plugin is not active")
+    fixturedefs = request._fixturemanager._arg2fixturedefs
+    assert fixturedefs['unused_fixture'][-1].params is None
+    assert len(fixturedefs['six_marks'][-1].params) == 64
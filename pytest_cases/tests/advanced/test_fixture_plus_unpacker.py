@@ -0,0 +1,89 @@
+import linecache
+
+import pytest
+
+from pytest_cases import pytest_fixture_plus
+
+
+class FakeRequest(object):
+    """ A minimal `request` object, with read-only `param` """
+    __slots__ = '_param',
+
+    def __init__(self, param):
+        self._param = param
+
+    @property
+    def param(self):
+        return self._param
+
+
+def get_wrapped_function(fixture):
+    """ Returns the function wrapped by a pytest fixture object, whatever the pytest version """
+    get_wrapped = getattr(fixture, '_get_wrapped_function', None)
+    if get_wrapped is not None:
+        return get_wrapped()
+    pytest_wrapped = getattr(fixture, '__pytest_wrapped__', None)
+    return fixture if pytest_wrapped is None else pytest_wrapped.obj
+
+
+def test_unpacker_mixed_marks():
+    """ Marks with one or several names, and an argument which is another fixture """
+    @pytest.mark.parametrize('a', [1])
+    @pytest.mark.parametrize('b, c', [(2, 3)])
+    @pytest.mark.parametrize('d', [4])
+    def my_fix(other, a, b, c, d):
+        return other, a, b, c, d
+
+    wrapped = get_wrapped_function(pytest_fixture_plus(my_fix))
+    # marks are listed from the closest to the function
+    request = FakeRequest((4, (2, 3), 1))
+    assert wrapped(request=request, other=0) == (0, 1, 2, 3, 4)
+
+    # request.param is not modified: the wrapper can be called again
+    assert request.param == (4, (2, 3), 1)
+    assert wrapped(request=request, other=5) == (5, 1, 2, 3, 4)
+
+
+def test_unpacker_single_mark():
+    @pytest.mark.parametrize('a, b', [(1, 2)])
+    def my_fix(a, b, request):
+        return a, b, request
+
+    wrapped = get_wrapped_function(pytest_fixture_plus(my_fix))
+    request = FakeRequest((1, 2))
+    assert wrapped(request=request) == (1, 2, request)
+    assert wrapped(request=request) == (1, 2, request)
+
+
+def test_unpacker_generator():
+    @pytest.mark.parametrize('a', [1])
+    @pytest.mark.parametrize('b', [2])
+    def my_fix(a, b):
+        yield a + b
+
+    wrapped = get_wrapped_function(pytest_fixture_plus(my_fix))
+    assert list(wrapped(request=FakeRequest((2, 1)))) == [3]
+
+
+def test_unpacker_complex_signature():
+    """ Signatures that are not a plain list of names use the makefun wrapper """
+    @pytest.mark.parametrize('a', [1])
+    def my_fix(a, b=10):
+        return a, b
+
+    wrapped = get_wrapped_function(pytest_fixture_plus(my_fix))
+    assert wrapped(request=FakeRequest(1)) == (1, 10)
+
+
+def test_generated_source():
+    """ The generated code is available for tracebacks """
+    @pytest.mark.parametrize('a', [1])
+    def my_fix(a):
+        return 1 / 0
+
+    wrapped = get_wrapped_function(pytest_fixture_plus(my_fix))
+    filename = wrapped.__code__.co_filename
+    assert linecache.getline(filename, 2).strip() == 'a = request.param'
+    assert wrapped.__module__ == __name__
+    with pytest.raises(ZeroDivisionError):
+        wrapped(request=FakeRequest(1))
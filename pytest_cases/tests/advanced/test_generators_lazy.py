@@ -0,0 +1,50 @@
+from itertools import product
+
+import pytest
+
+from pytest_cases import cases_generator, get_all_cases, get_pytest_parametrize_args
+from pytest_cases.case_funcs import _GENERATOR_FIELD
+from pytest_cases.common import LazyProduct
+
+
+def test_lazy_product():
+    """ LazyProduct behaves like the list of all combinations created by itertools.product """
+    ranges = (range(3), 'ab', [True, False, None], (i for i in range(2)))
+    ref = list(product(range(3), 'ab', [True, False, None], range(2)))
+    lazy = LazyProduct(*ranges)
+
+    assert len(lazy) == len(ref)
+    assert list(lazy) == ref
+    assert [lazy[i] for i in range(len(lazy))] == ref
+    assert lazy[-1] == ref[-1]
+    assert lazy.get_indices(len(ref) - 1) == (2, 1, 2, 1)
+    with pytest.raises(IndexError):
+        lazy[len(ref)]
+
+
+@cases_generator("{a}-{b}-{c}-{d}-{e}", a=range(20), b=range(20), c=range(20), d=range(20), e=range(20))
+def case_huge(a, b, c, d, e):
+    return a + b + c + d + e, None, None
+
+
+def test_huge_generator():
+    """ The 3.2M combinations are not created when the decorator is applied """
+    _, _, combinations = getattr(case_huge, _GENERATOR_FIELD)
+    assert len(combinations) == 20 ** 5
+    assert combinations[20 ** 5 - 2] == (19, 19, 19, 19, 18)
+
+
+@cases_generator("{i}", i=range(3), j=range(2))
+def case_non_unique_names(i, j):
+    return i, None, None
+
+
+def test_generated_names():
+    cases = get_all_cases(cases=case_non_unique_names)
+    assert len(cases) == 6
+    assert cases[3].function_kwargs == dict(i=1, j=1)
+    assert cases[3].get() == (1, None, None)
+
+    # names are only created when needed, and non-unique names are still detected
+    with pytest.raises(ValueError):
+        get_pytest_parametrize_args(cases)
@@ -0,0 +1,102 @@
+from itertools import combinations, product
+
+import pytest
+
+from pytest_cases import cases_generator, cases_data, get_all_cases, get_pytest_parametrize_args
+from pytest_cases.case_funcs import _GENERATOR_FIELD
+from pytest_cases.common import SampledProduct, LazyProduct
+
+
+@cases_generator("a={a},b={b},c={c},d={d}", strategy='pairwise', a=range(5), b=range(8), c=range(6), d=range(4))
+def case_pairwise(a, b, c, d):
+    return (a, b, c, d), None, None
+
+
+@cases_generator("{a}{b}{c}{d}{e}", strategy='nwise', strategy_options=dict(strength=3),
+                 a='ab', b='cd', c='ef', d='gh', e='ij')
+def case_3wise(a, b, c, d, e):
+    return a + b + c + d + e, None, None
+
+
+@cases_generator("{i}-{j}-{k}", strategy='sample', strategy_options=dict(n=20, seed=1),
+                 i=range(100), j=range(100), k=range(100))
+def case_sampled(i, j, k):
+    return (i, j, k), None, None
+
+
+@cases_generator("{n}-{seed}-{strength}", strategy='sample', strategy_options=dict(n=4, seed=0),
+                 n=range(2), seed=range(3), strength=range(2))
+def case_strategy_names_as_params(n, seed, strength):
+    """ the options of the strategy are separate from the parameter ranges, that can have the same names """
+    return (n, seed, strength), None, None
+
+
+def test_pairwise():
+    cases = get_all_cases(cases=case_pairwise)
+    assert len(cases) == 50
+    rows = [c.get()[0] for c in cases]
+    for cols in combinations(range(4), 2):
+        expected = set(product(*(range((5, 8, 6, 4)[c]) for c in cols)))
+        assert set(tuple(r[c] for c in cols) for r in rows) == expected
+
+    # names are unique and deterministic
+    ids = get_pytest_parametrize_args(cases)[1]
+    assert len(set(ids)) == 50
+    assert get_pytest_parametrize_args(get_all_cases(cases=case_pairwise))[1] == ids
+
+
+def test_nwise():
+    cases = get_all_cases(cases=case_3wise)
+    assert len(cases) < 2 ** 5
+    values = [c.get()[0] for c in cases]
+    for cols in combinations(range(5), 3):
+        assert len(set(tuple(v[c] for c in cols) for v in values)) == 8
+
+
+def test_sample():
+    cases = get_all_cases(cases=case_sampled)
+    assert len(cases) == 20
+    values = [c.get()[0] for c in cases]
+    assert values == sorted(set(values))
+
+    # the combinations are stored as indices only, and only depend on the seed
+    _, _, sample = getattr(case_sampled, _GENERATOR_FIELD)
+    assert isinstance(sample, SampledProduct)
+    assert list(SampledProduct([range(100)] * 3, 20, seed=1)) == values
+    assert list(SampledProduct([range(100)] * 3, 20, seed=2)) != values
+
+    # more samples than combinations: the full product
+    assert list(SampledProduct(['ab', 'cd'], 10)) == list(LazyProduct('ab', 'cd'))
+
+
+def test_strategy_names_as_params():
+    cases = get_all_cases(cases=case_strategy_names_as_params)
+    assert len(cases) == 4
+    assert all(sorted(c.function_kwargs) == ['n', 'seed', 'strength'] for c in cases)
+
+
+def test_invalid_strategy():
+    def case_foo(a):
+        pass
+
+    with pytest.raises(ValueError):
+        cases_generator(strategy='random', a=range(3))(case_foo)
+    with pytest.raises(ValueError):
+        cases_generator(strategy='sample', a=range(3))(case_foo)
+    with pytest.raises(ValueError):
+        cases_generator(strategy='nwise', a=range(3))(case_foo)
+    with pytest.raises(ValueError):
+        cases_generator(strategy='pairwise', strategy_options=dict(n=2), a=range(3))(case_foo)
+    with pytest.raises(ValueError):
+        cases_generator(strategy_options=dict(strength=2), a=range(3))(case_foo)
+
+
+@cases_data(cases=[case_pairwise, case_sampled])
+def test_with_cases_data(case_data):
+    ins, _, _ = case_data.get()
+    assert len(ins) in (3, 4)
+
+
+def test_synthesis(request):
+    items = [item for item in request.session.items if item.name.startswith('test_with_cases_data')]
+    assert len(items) == 70
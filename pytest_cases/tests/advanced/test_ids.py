@@ -0,0 +1,146 @@
+import gc
+import weakref
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pytest_cases import pytest_fixture_plus, param_fixtures, cases_data, cases_generator, THIS_MODULE
+from pytest_cases import common
+from pytest_cases.common import get_id_for_value, get_test_ids_from_param_values, cap_id, set_id_max_length, \
+    get_id_max_length
+
+
+class Unprintable(object):
+    def __str__(self):
+        raise ValueError("can not be printed")
+
+
+class CountingStr(object):
+    def __init__(self):
+        self.nb_calls = 0
+
+    def __str__(self):
+        self.nb_calls += 1
+        return 'counting'
+
+
+@pytest.fixture
+def max_length_20():
+    """ A maximum ids length of 20 during the test only """
+    previous = get_id_max_length()
+    set_id_max_length(20)
+    yield
+    set_id_max_length(previous)
+
+
+def test_simple_values():
+    """ Small values ids are identical to str() """
+    assert get_test_ids_from_param_values('a', [1, 2.5, None, True, 'hello', (1, 2)]) \
+        == ['1', '2.5', 'None', 'True', 'hello', '(1, 2)']
+    assert get_test_ids_from_param_values(('a', 'b'), [(1, 'x'), (None, 3)]) == ['1-x', 'None-3']
+
+
+def test_truncation(max_length_20):
+    """ Long ids are truncated and end with a hash of the complete id """
+    long_1 = 'a' * 50
+    long_2 = 'a' * 49 + 'b'
+    id_1, id_2 = get_test_ids_from_param_values('s', [long_1, long_2])
+    assert len(id_1) == len(id_2) == 20
+    assert id_1.startswith('a' * 10)
+    assert id_1 != id_2
+    assert cap_id(long_1) == id_1
+
+    # the combination of several values is also truncated
+    combined, = get_test_ids_from_param_values(('a', 'b'), [('x' * 15, 'y' * 15)])
+    assert len(combined) == 20
+
+
+def test_large_and_unprintable(max_length_20):
+    """ Large or unprintable objects are identified by their type and a hash of their contents """
+    large_id = get_id_for_value(list(range(100000)))
+    assert large_id.startswith('list#') and len(large_id) == 13
+    assert get_id_for_value(list(range(100000))) == large_id
+    assert get_id_for_value(list(range(1, 100001))) != large_id
+
+    assert get_id_for_value(Unprintable()).startswith('Unprintable#')
+
+    # not picklable and not printable: only the type name
+    unprintable = Unprintable()
+    unprintable.f = lambda: None
+    assert get_id_for_value(unprintable) == 'Unprintable'
+
+
+def test_no_max_length():
+    """ By default the ids are neither truncated nor hashed """
+    assert get_id_for_value('a' * 500) == 'a' * 500
+    assert get_id_for_value(list(range(100000))) == str(list(range(100000)))
+    assert get_id_for_value(Unprintable()).startswith('Unprintable#')
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_content_hash_numpy():
+    """ Arrays with the same buffer but different data types or shapes have different hashes """
+    hashes = {common._content_hash(np.zeros(8, dtype='int8')),
+              common._content_hash(np.zeros((2, 4), dtype='int8')),
+              common._content_hash(np.zeros(2, dtype='int32'))}
+    assert len(hashes) == 3
+
+
+def test_cache():
+    """ The id of each object is only computed once """
+    o = CountingStr()
+    assert get_id_for_value(o) == 'counting'
+    assert get_id_for_value(o) == 'counting'
+    assert o.nb_calls == 1
+
+
+# -- the engine is used by all decorators
+LONG = 'x' * 500
+
+
+@pytest_fixture_plus
+@pytest.mark.parametrize('s', [LONG, 'short'])
+@pytest.mark.parametrize('i', [1, 2])
+def long_fixture(s, i):
+    return s
+
+
+def test_fixture_plus_ids(long_fixture, request):
+    assert long_fixture in request.node.callspec.id
+
+
+a, b = param_fixtures('a, b', [(LONG, 1), ('short', 2)])
+
+
+def test_param_fixtures_ids(a, b, request):
+    assert request.node.callspec.id.startswith(a)
+
+
+@cases_generator("{s}", s=[LONG, 'short'])
+def case_long(s):
+    return s, None, None
+
+
+@cases_data(module=THIS_MODULE)
+def test_cases_data_ids(case_data, request):
+    assert case_data.get()[0] in request.node.callspec.id
+
+
+def test_cache_does_not_keep_values_alive():
+    """ The ids cache only holds weak references to the values """
+    o = CountingStr()
+    o_ref = weakref.ref(o)
+    assert get_id_for_value(o) == 'counting'
+    del o
+    gc.collect()
+    assert o_ref() is None
+    assert all(v_ref() is not None for v_ref, _ in common._IDS_CACHE.values())
+
+    # values that can not be weakly referenced are not cached
+    values = [1, 2]
+    get_id_for_value(values)
+    assert id(values) not in common._IDS_CACHE
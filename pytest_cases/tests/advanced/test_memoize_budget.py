@@ -0,0 +1,77 @@
+import sys
+
+from pytest_cases import get_all_cases
+from pytest_cases import memoize
+from pytest_cases.memoize import CaseResultsCache, get_size, NOT_MEMOIZED
+
+
+def test_lru_budget():
+    """ The least recently used results are evicted when the budget is exceeded """
+    one_size = get_size('a' * 100)
+    cache = CaseResultsCache(budget=2 * one_size)
+
+    cache.put(1, 'a' * 100)
+    cache.put(2, 'b' * 100)
+    assert cache.get(1) == 'a' * 100  # 1 is now the most recently used
+    cache.put(3, 'c' * 100)
+    assert cache.get(2) is NOT_MEMOIZED
+    assert cache.get(3) == 'c' * 100
+
+    # too large to be stored
+    cache.put(4, 'd' * 1000)
+    assert cache.get(4) is NOT_MEMOIZED
+
+    assert cache.get_stats() == dict(hits=2, misses=2, evictions=1, entries=2, size=2 * one_size,
+                                     budget=2 * one_size)
+
+
+def test_get_size():
+    lst = [1, 2, 3]
+    # shared objects are counted once
+    assert get_size((lst, lst)) == sys.getsizeof((lst, lst)) + get_size(lst)
+    assert get_size(dict(a=lst)) > get_size(lst)
+
+
+calls = []
+
+
+def case_counted():
+    calls.append(None)
+    return len(calls), None, None
+
+
+def test_memoized_get(monkeypatch):
+    """ Two getters for the same case share the memoized result """
+    monkeypatch.setattr(memoize, '_CACHE', CaseResultsCache(budget=10000))
+    monkeypatch.setattr(memoize, '_RESULTS_SHARING', True)
+
+    c1, = get_all_cases(cases=case_counted)
+    c2, = get_all_cases(cases=case_counted)
+    assert c1 is not c2
+    assert c1.get() == c2.get()
+    assert len(calls) == 1
+
+
+def test_memoization_summary(cases_pytester):
+    """ The memoization counters are displayed in the terminal summary """
+    cases_pytester.makepyfile("""
+        from pytest_cases import cases_data, cases_generator, THIS_MODULE
+
+        @cases_generator("gen i={i}", i=range(2))
+        def case_gen(i):
+            return i, None, None
+
+        @cases_data(module=THIS_MODULE)
+        def test_foo(case_data):
+            case_data.get()
+
+        @cases_data(module=THIS_MODULE)
+        def test_bar(case_data):
+            case_data.get()
+    """)
+    result = cases_pytester.runpytest_subprocess('--cases-memo-budget=1M')
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines([
+        '*- pytest-cases memoization -*',
+        'hits: 2, misses: 2, evictions: 0, entries: 2, size: * bytes (budget: 1048576 bytes)',
+    ])
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from pytest_cases import cases_data, get_all_cases, CaseDataGetter, THIS_MODULE
+from pytest_cases import async_cases, memoize, prefetch
+from pytest_cases.common import get_pytest_config
+from pytest_cases.memoize import get_memoization_cache, CaseResultsCache
+
+
+def case_pid():
+    return os.getpid(), None, None
+
+
+def case_error():
+    raise ValueError("this case failed")
+
+
+@cases_data(module=THIS_MODULE, prefetch=True)
+def test_prefetch(case_data  # type: CaseDataGetter
+                  ):
+    if str(case_data) == 'case_error':
+        # the error is raised in the test using the case
+        with pytest.raises(ValueError, match="this case failed"):
+            case_data.get()
+    else:
+        pid, _, _ = case_data.get()
+        config = get_pytest_config()
+        if config is not None and not config.getoption('cases_dedupe'):
+            # the plugin is active: the case was computed in a worker process, unless it was already computed during
+            # collection to detect duplicates
+            assert pid != os.getpid()
+
+        if get_memoization_cache() is None:
+            # the prefetched result is released once used
+            pid, _, _ = case_data.get()
+            assert pid == os.getpid()
+
+
+def case_shared():
+    return 'prefetched', None, None
+
+
+def test_prefetch_released_on_memo_hit(monkeypatch):
+    """ A prefetched result is released once all its users have run, even if some of them used the memoized result """
+    Future = pytest.importorskip('concurrent.futures').Future
+
+    monkeypatch.setattr(memoize, '_CACHE', CaseResultsCache(budget=10000))
+    monkeypatch.setattr(memoize, '_RESULTS_SHARING', True)
+    monkeypatch.setattr(prefetch, '_PREFETCHED', dict())
+
+    c1, = get_all_cases(cases=case_shared)
+    c2, = get_all_cases(cases=case_shared)
+    future = Future()
+    future.set_result((True, case_shared()))
+    prefetch._PREFETCHED[c1.get_case_key()] = [future, 2]
+
+    assert c1.get() == case_shared()
+    assert len(prefetch._PREFETCHED) == 1
+    # served from the memoization cache: the prefetched result is released
+    assert c2.get() == case_shared()
+    assert len(prefetch._PREFETCHED) == 0
+
+
+def test_prefetch_released_on_gathered_result(monkeypatch):
+    """ A prefetched result is released when the result of the case was gathered with the async cases """
+    Future = pytest.importorskip('concurrent.futures').Future
+
+    monkeypatch.setattr(memoize, '_RESULTS_SHARING', True)
+    monkeypatch.setattr(prefetch, '_PREFETCHED', dict())
+
+    c, = get_all_cases(cases=case_shared)
+    future = Future()
+    future.set_result((True, case_shared()))
+    prefetch._PREFETCHED[c.get_case_key()] = [future, 1]
+    monkeypatch.setattr(async_cases, '_GATHERED', {c.get_case_key(): [False, ('gathered', None, None), 1]})
+
+    assert c.get() == ('gathered', None, None)
+    assert len(prefetch._PREFETCHED) == 0
@@ -0,0 +1,76 @@
+import threading
+from time import sleep
+
+import pytest
+
+from pytest_cases import cases_generator, cases_data, CaseDataGetter, THIS_MODULE
+from pytest_cases import prefetch
+from pytest_cases.common import get_pytest_option, get_pytest_config
+from pytest_cases.prefetch import start_lookahead, advance_lookahead, release_lookahead, pop_prefetched_result, \
+    stop_prefetch, NOT_PREFETCHED
+
+
+@cases_generator("file {i}", i=range(4))
+def case_file(i):
+    # simulates reading a file
+    sleep(0.01)
+    return threading.current_thread().name, None, None
+
+
+@cases_data(module=THIS_MODULE)
+def test_lookahead_cases(case_data  # type: CaseDataGetter
+                         ):
+    thread_name, _, _ = case_data.get()
+    if get_pytest_option('cases_prefetch_lookahead', 0) > 0 and get_pytest_option('cases_prefetch', 0) == 0 \
+            and not hasattr(get_pytest_config(), 'workerinput'):
+        # the case was computed in the pool of threads, while the previous test was running (disabled with xdist)
+        assert thread_name != threading.current_thread().name
+
+
+@pytest.fixture
+def lookahead_state():
+    """ An empty prefetching state, stopped after the test """
+    stop_prefetch()
+    yield
+    stop_prefetch()
+
+
+def test_lookahead_window(lookahead_state):
+    calls = []
+
+    def load(i):
+        calls.append(i)
+        return i
+
+    # test 3 uses the case of test 2 again
+    cases = [[(('k', i), load, {'i': i})] for i in range(5)]
+    cases[3].append(cases[2][0])
+    start_lookahead(cases, 2)
+
+    # test 0: the cases of tests 0 to 2 are submitted
+    advance_lookahead(0)
+    assert sorted(prefetch._PREFETCHED) == [('k', 0), ('k', 1), ('k', 2)]
+    assert pop_prefetched_result(('k', 0)) == 0
+    release_lookahead(0)
+    assert pop_prefetched_result(('k', 0)) is NOT_PREFETCHED
+
+    # test 1 is skipped and does not retrieve its case: it is released anyway
+    advance_lookahead(1)
+    release_lookahead(1)
+    assert sorted(prefetch._PREFETCHED) == [('k', 2), ('k', 3)]
+
+    # test 2: the case is kept for test 3
+    advance_lookahead(2)
+    assert pop_prefetched_result(('k', 2)) == 2
+    release_lookahead(2)
+    assert sorted(prefetch._PREFETCHED) == [('k', 2), ('k', 3), ('k', 4)]
+
+    # test 3
+    advance_lookahead(3)
+    assert pop_prefetched_result(('k', 3)) == 3
+    assert pop_prefetched_result(('k', 2)) == 2
+    release_lookahead(3)
+    assert sorted(prefetch._PREFETCHED) == [('k', 4)]
+
+    # each case was computed once
+    assert sorted(calls) == [0, 1, 2, 3, 4]
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+
+import pytest
+
+from pytest_cases import shared_store
+from pytest_cases.shared_store import is_shared_store_supported, create_store_dir, enable_shared_store, \
+    remove_store_dir, get_shared_result
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+pytestmark = pytest.mark.skipif(not is_shared_store_supported(), reason="shared memory is not supported")
+
+
+@pytest.fixture
+def store():
+    """ A shared store, enabled during the test only """
+    enable_shared_store(None)
+    store_dir = create_store_dir()
+    enable_shared_store(store_dir)
+    yield store_dir
+    enable_shared_store(None)
+    if os.path.isdir(store_dir):
+        remove_store_dir(store_dir)
+
+
+def _get_in_other_process(case_id, queue):
+    """ Executed in another process: only reads the result from the store """
+    def compute():
+        raise AssertionError("the result should come from the shared store")
+    queue.put(get_shared_result(case_id, compute))
+
+
+def test_shared_result(store):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'data': bytearray(b'abc' * 1000), 'n': 3}
+
+    res = get_shared_result('mod::case_a', compute)
+    assert res['n'] == 3 and bytes(res['data'][:3]) == b'abc'
+    assert get_shared_result('mod::case_a', compute) == res
+    assert len(calls) == 1
+
+    # another process attaches to the segment
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        p = ctx.Process(target=_get_in_other_process, args=('mod::case_a', queue))
+        p.start()
+        assert queue.get(timeout=10) == res
+        p.join()
+        assert p.exitcode == 0
+
+
+def test_not_shareable(store):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return lambda: 1
+
+    get_shared_result('mod::case_lambda', compute)
+    get_shared_result('mod::case_lambda', compute)
+    # can not be pickled: each call computes it
+    assert len(calls) == 2
+
+    def fail():
+        raise ValueError()
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            get_shared_result('mod::case_error', fail)
+
+
+def test_cleanup(store):
+    get_shared_result('mod::case_b', lambda: b'x' * 100)
+    names = [f[:-len('.ready')] for f in os.listdir(store) if f.endswith('.ready')]
+    assert len(names) == 1
+
+    enable_shared_store(None)
+    remove_store_dir(store)
+    assert not os.path.exists(store)
+    with pytest.raises(FileNotFoundError):
+        shared_store.shared_memory.SharedMemory(name=names[0])
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_shared_arrays(store):
+    res = get_shared_result('mod::case_arr', lambda: (np.arange(100000), 'expected'))
+    arr, expected = res
+    assert arr[-1] == 99999 and expected == 'expected'
+
+    # the array uses the shared buffer, read-only
+    assert not arr.flags.writeable
+    arr2, _ = get_shared_result('mod::case_arr', lambda: None)
+    assert np.shares_memory(arr, arr2)
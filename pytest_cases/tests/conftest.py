@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+import pytest_cases
+from pytest_cases.case_history import enable_history
+
+
+pytest_plugins = 'pytester'
+
+
+@pytest.fixture
+def cases_pytester(pytester, monkeypatch):
+    """ The `pytester` fixture, with pytest-cases importable in the pytest subprocesses. Run pytest with
+    `runpytest_subprocess`, so that the plugin state of the current session is not modified """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(pytest_cases.__file__)))
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(p for p in (root, os.environ.get('PYTHONPATH')) if p))
+    return pytester
+
+
+@pytest.fixture
+def empty_history():
+    """ An empty cases history, recorded during the test only """
+    enable_history(False)
+    enable_history()
+    yield
+    enable_history(False)
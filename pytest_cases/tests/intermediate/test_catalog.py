@@ -0,0 +1,43 @@
+import sys
+
+from pytest_cases import cases_data, CaseDataGetter, THIS_MODULE
+from pytest_cases.case_catalog import get_module_cases, _CATALOGS
+from pytest_cases.tests.utils import get_pytest_param
+
+
+def case_before():
+    return 1, None, None
+
+
+@cases_data(module=THIS_MODULE)
+def test_partial(case_data  # type: CaseDataGetter
+                 ):
+    """ Only the cases defined above are visible, since the module is still being imported """
+    i, _, _ = case_data.get()
+    assert i == 1
+
+
+def case_after():
+    return 2, None, None
+
+
+@cases_data(module=THIS_MODULE)
+def test_full(case_data  # type: CaseDataGetter
+              ):
+    """ The catalog of this module was updated since it has changed """
+    i, _, _ = case_data.get()
+    assert i in (1, 2)
+
+
+def test_assert_parametrized():
+    assert len(get_pytest_param(test_partial, 0)[1]) == 1
+    assert len(get_pytest_param(test_full, 0)[1]) == 2
+
+
+def test_catalog_reused():
+    """ Checks that the catalog is computed once per session """
+    this_module = sys.modules[__name__]
+    entries = get_module_cases(this_module)
+    assert [n for _, n, _ in entries] == ['case_after', 'case_before']
+    assert get_module_cases(this_module) is entries
+    assert _CATALOGS[__name__].entries is entries
@@ -0,0 +1,70 @@
+import pytest
+
+from pytest_cases import cases_data, CaseDataGetter, THIS_MODULE, cases_generator, get_all_cases
+from pytest_cases.sharding import parse_shard, get_shard_index
+from pytest_cases.tests.utils import get_pytest_param
+
+
+def case_simple():
+    return 0, None, None
+
+
+@cases_generator("gen case i={i}", i=range(20))
+def case_gen(i):
+    return i, None, None
+
+
+@cases_data(module=THIS_MODULE, shard=(1, 4))
+def test_with_shard(case_data  # type: CaseDataGetter
+                    ):
+    i, _, _ = case_data.get()
+    assert get_shard_index(str(case_data), 4) == 1
+
+
+def test_shards_partition():
+    """ Each case belongs to exactly one shard """
+    all_ids = [str(c) for c in get_all_cases(module=THIS_MODULE, this_module_object=test_with_shard, shard=(0, 1))]
+    assert len(all_ids) == 21
+
+    shards_ids = [[str(c) for c in get_all_cases(module=THIS_MODULE, this_module_object=test_with_shard, shard=s)]
+                  for s in ((0, 4), (1, 4), '2/4', '3/4')]
+    assert sorted(i for ids in shards_ids for i in ids) == sorted(all_ids)
+    assert len(get_pytest_param(test_with_shard, 0)[1]) == len(shards_ids[1])
+
+    # the hash is stable across python sessions and versions
+    assert get_shard_index('case_simple', 4) == 3
+
+
+@pytest.mark.parametrize('shard', [(4, 4), (0, 0), 'a/b', (1, 2, 3)])
+def test_invalid_shard(shard):
+    with pytest.raises(ValueError):
+        parse_shard(shard)
+
+
+SHARDED_MODULE = """
+from pytest_cases import cases_data, cases_generator, THIS_MODULE
+
+@cases_generator("gen case i={i}", i=range(20))
+def case_gen(i):
+    return i, None, None
+
+@cases_data(module=THIS_MODULE)
+def test_foo(case_data):
+    case_data.get()
+"""
+
+
+def test_shard_option(cases_pytester):
+    """ --cases-shard only collects the cases of the shard """
+    cases_pytester.makepyfile(SHARDED_MODULE)
+    result = cases_pytester.runpytest_subprocess('--cases-shard=1/4')
+    result.assert_outcomes(passed=sum(get_shard_index('gen case i=%s' % i, 4) == 1 for i in range(20)))
+
+
+@pytest.mark.parametrize('shard', ['4/4', '0/0', 'a/b'])
+def test_shard_option_invalid(cases_pytester, shard):
+    """ An invalid --cases-shard is a usage error """
+    cases_pytester.makepyfile(SHARDED_MODULE)
+    result = cases_pytester.runpytest_subprocess('--cases-shard=%s' % shard)
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(['*argument --cases-shard: Invalid shard specification*'])
@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from pytest_cases.case_history import load_history, clear_history, HISTORY_CACHE_KEY
+from pytest_cases.plugin import _select_balanced_shard, _is_first_process
+from pytest_cases.sharding import balance_shards, extend_shard_assignment, read_shard_manifest, write_shard_manifest
+from pytest_cases.tests.utils import FakeCache, FakeConfig, FakeItem, get_fake_case_getters
+
+
+def load_fake_history(cases):
+    """ Loads the history of `cases`, recorded in session 1 """
+    cache = FakeCache()
+    cache.set(HISTORY_CACHE_KEY, {'run': 1, 'cases': cases})
+    clear_history()
+    load_history(cache)
+
+
+def test_balance_shards():
+    weights = {'a': 7., 'b': 5., 'c': 4., 'd': 3., 'e': 3., 'f': 2.}
+    assignment, loads = balance_shards(weights, 2)
+    assert loads == [12., 12.]
+    assert sorted(assignment) == sorted(weights)
+    for i in range(2):
+        assert sum(w for c, w in weights.items() if assignment[c] == i) == loads[i]
+
+    # deterministic
+    assert balance_shards(dict(reversed(list(weights.items()))), 2) == (assignment, loads)
+
+    # more shards than cases
+    assignment, loads = balance_shards({'a': 1.}, 3)
+    assert assignment == {'a': 0} and loads == [1., 0., 0.]
+
+
+def test_extend_assignment():
+    assignment, loads = {'a': 0, 'b': 1}, [5., 1.]
+    extend_shard_assignment(assignment, loads, {'a': 5., 'b': 1., 'c': 3., 'd': 2.})
+    assert assignment == {'a': 0, 'b': 1, 'c': 1, 'd': 1}
+    assert loads == [5., 6.]
+
+
+def test_manifest(tmpdir):
+    path = str(tmpdir.join('shards.json'))
+    write_shard_manifest(path, {'a': 0, 'b': 1}, [5., 1.])
+    assert read_shard_manifest(path) == ({'a': 0, 'b': 1}, [5., 1.])
+
+    tmpdir.join('invalid.json').write('{"shards": 1}')
+    with pytest.raises(ValueError):
+        read_shard_manifest(str(tmpdir.join('invalid.json')))
+
+
+def test_select_balanced_shard(empty_history, monkeypatch, tmpdir):
+    cases = {'None::slow': [10., 2, None, 1], 'None::medium': [4., 1, None, 1], 'None::fast': [2., 1, None, 1]}
+    load_fake_history(cases)
+
+    items = [FakeItem(i) for i in ('t.py::other', 't.py::test_a[slow]', 't.py::test_a[medium]', 't.py::test_a[fast]',
+                                   't.py::test_a[new]', 't.py::test_b[slow]')]
+    monkeypatch.setattr('pytest_cases.plugin._CASE_GETTERS', get_fake_case_getters(items))
+
+    def selected_ids(index, manifest_path=None):
+        selected, deselected = _select_balanced_shard(items, (index, 2), manifest_path)
+        assert len(selected) + len(deselected) == len(items)
+        return [item.nodeid for item in selected]
+
+    # the new case is estimated to take the mean duration of the others, 16/3
+    assert selected_ids(0) == ['t.py::other', 't.py::test_a[slow]', 't.py::test_b[slow]']
+    assert selected_ids(1) == ['t.py::other', 't.py::test_a[medium]', 't.py::test_a[fast]', 't.py::test_a[new]']
+
+    # the manifest is written on first use, and then read even if the durations change
+    path = str(tmpdir.join('shards.json'))
+    assert selected_ids(0, path) == ['t.py::other', 't.py::test_a[slow]', 't.py::test_b[slow]']
+    load_fake_history(dict(cases, **{'None::fast': [20., 1, None, 1]}))
+    assert selected_ids(0, path) == ['t.py::other', 't.py::test_a[slow]', 't.py::test_b[slow]']
+    assert selected_ids(0) == ['t.py::other', 't.py::test_a[medium]', 't.py::test_a[fast]']
+
+    # xdist workers: only the first one writes the manifest
+    os.remove(path)
+    gw0, gw1 = (FakeConfig(workerinput={'workerid': workerid}) for workerid in ('gw0', 'gw1'))
+    _select_balanced_shard(items, (0, 2), path, write_manifest=_is_first_process(gw1))
+    assert not os.path.exists(path)
+    _select_balanced_shard(items, (0, 2), path, write_manifest=_is_first_process(gw0))
+    assert os.path.exists(path)
+    assert _is_first_process(FakeConfig())
+
+    # a manifest with another number of shards
+    with pytest.raises(pytest.UsageError):
+        _select_balanced_shard(items, (0, 3), path)
+
+
+def test_shard_manifest_option(cases_pytester):
+    """ The manifest is written by the first shard and read by the others """
+    cases_pytester.makepyfile("""
+        from pytest_cases import cases_data, cases_generator, THIS_MODULE
+
+        @cases_generator("gen i={i}", i=range(4))
+        def case_gen(i):
+            return i, None, None
+
+        @cases_data(module=THIS_MODULE)
+        def test_foo(case_data):
+            case_data.get()
+    """)
+    args = ('--cases-shard-mode=duration', '--cases-shard-manifest=shards.json')
+    result = cases_pytester.runpytest_subprocess('--cases-shard=0/2', *args)
+    result.assert_outcomes(passed=2, deselected=2)
+
+    # without history all cases have the default duration
+    with open(str(cases_pytester.path / 'shards.json')) as f:
+        manifest = json.load(f)
+    assert manifest['count'] == 2
+    assert manifest['loads'] == [2., 2.]
+    assert sorted(manifest['shards']) == ['test_shard_manifest_option::gen i=%s' % i for i in range(4)]
+    assert sorted(manifest['shards'].values()) == [0, 0, 1, 1]
+
+    result = cases_pytester.runpytest_subprocess('--cases-shard=1/2', '-v', *args)
+    result.assert_outcomes(passed=2, deselected=2)
+    for case_id, index in manifest['shards'].items():
+        if index == 1:
+            result.stdout.fnmatch_lines(['*::test_foo?%s? PASSED*' % case_id.split('::')[1]])
+
+    # a manifest with another number of shards
+    result = cases_pytester.runpytest_subprocess('--cases-shard=0/3', *args)
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*The shard manifest 'shards.json' contains 2 shards, but --cases-shard requires 3"])
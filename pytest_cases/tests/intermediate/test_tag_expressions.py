@@ -0,0 +1,125 @@
+import sys
+
+import pytest
+
+from pytest_cases import case_tags, cases_data, get_all_cases, CaseDataGetter, THIS_MODULE
+from pytest_cases.common import get_pytest_config
+from pytest_cases.tag_expr import compile_tag_expression, is_tag_expression
+
+
+@case_tags('fast')
+def case_fast():
+    return 'fast', None, None
+
+
+@case_tags('fast', 'flaky')
+def case_fast_flaky():
+    return 'fast_flaky', None, None
+
+
+@case_tags('slow')
+def case_slow():
+    return 'slow', None, None
+
+
+@case_tags('not slow')
+def case_literal():
+    return 'literal', None, None
+
+
+@cases_data(module=THIS_MODULE, has_tag='fast and not flaky')
+def test_expression(case_data  # type: CaseDataGetter
+                    ):
+    assert case_data.get()[0] == 'fast'
+
+
+@pytest.mark.parametrize('expr, expected', [
+    ('fast', [True, True, False, False]),
+    ('fast and not flaky', [True, False, False, False]),
+    ('not (fast or slow)', [False, False, False, True]),
+    ('slow or fast and flaky', [False, True, True, False]),
+    ('(slow or fast) and flaky', [False, True, False, False]),
+])
+def test_matches(expr, expected):
+    tags = [case_fast.__case_tags__, case_fast_flaky.__case_tags__, case_slow.__case_tags__, case_literal.__case_tags__]
+    assert [compile_tag_expression(expr).matches(t) for t in tags] == expected
+
+
+@pytest.mark.parametrize('expr', ['', 'a or', '(a', 'a b', 'a and )', 'and'])
+def test_invalid(expr):
+    with pytest.raises(ValueError, match="Invalid tags expression"):
+        compile_tag_expression(expr)
+
+
+def test_compiled_once():
+    assert compile_tag_expression('a and b') is compile_tag_expression('a and b')
+    assert is_tag_expression('a and b')
+    assert not is_tag_expression('a')
+    assert not is_tag_expression('my tag')
+    assert not is_tag_expression('a-b')
+    assert is_tag_expression('(a)')
+    assert not is_tag_expression(int)
+
+
+def get_selected_names(**kwargs):
+    return [str(c) for c in get_all_cases(module=sys.modules[__name__], **kwargs)]
+
+
+def test_has_tag_expression():
+    assert get_selected_names(has_tag='fast or slow') == ['case_fast', 'case_fast_flaky', 'case_slow']
+    # a tag existing in the module takes precedence
+    assert get_selected_names(has_tag='not slow') == ['case_literal']
+    with pytest.raises(ValueError):
+        get_selected_names(has_tag='fast and')
+    # tags that are not expressions select nothing if they do not exist in the module
+    assert get_selected_names(has_tag='my tag') == []
+    assert get_selected_names(has_tag='fast-path') == []
+
+
+def test_cli_option(monkeypatch):
+    """ The --cases-tags option applies to all cases, including cases listed explicitly """
+    config = get_pytest_config()
+    if config is None:
+        pytest.skip("the pytest-cases plugin is not active")
+
+    monkeypatch.setattr(config.option, 'cases_tags', compile_tag_expression('not flaky'), raising=False)
+    assert get_selected_names(has_tag='fast') == ['case_fast']
+    assert [str(c) for c in get_all_cases(cases=[case_fast, case_fast_flaky])] == ['case_fast']
+
+
+TAGGED_MODULE = """
+from pytest_cases import case_tags, cases_data, THIS_MODULE
+
+@case_tags('fast')
+def case_fast():
+    return 'fast', None, None
+
+@case_tags('fast', 'flaky')
+def case_fast_flaky():
+    return 'fast_flaky', None, None
+
+@case_tags('slow')
+def case_slow():
+    return 'slow', None, None
+
+@cases_data(module=THIS_MODULE)
+def test_foo(case_data):
+    case_data.get()
+"""
+
+
+def test_cli_option_end_to_end(cases_pytester):
+    """ --cases-tags only collects the cases matching the expression """
+    cases_pytester.makepyfile(TAGGED_MODULE)
+    result = cases_pytester.runpytest_subprocess('--cases-tags=fast and not flaky', '-v')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*::test_foo?case_fast? PASSED*'])
+
+
+@pytest.mark.parametrize('expr', ['fast and', '', '(fast'])
+def test_cli_option_invalid(cases_pytester, expr):
+    """ An invalid --cases-tags is a usage error """
+    cases_pytester.makepyfile(TAGGED_MODULE)
+    result = cases_pytester.runpytest_subprocess('--cases-tags=%s' % expr)
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(['*argument --cases-tags: Invalid tags expression*'])
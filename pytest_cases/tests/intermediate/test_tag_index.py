@@ -0,0 +1,73 @@
+import sys
+
+from pytest_cases import case_tags, get_all_cases
+from pytest_cases.case_catalog import select_module_cases, _CATALOGS
+
+
+@case_tags('a')
+def case_a():
+    return 'a', None, None
+
+
+@case_tags('a', 'b')
+def case_ab():
+    return 'ab', None, None
+
+
+@case_tags('b')
+@case_tags('a')
+def case_ab2():
+    return 'ab2', None, None
+
+
+@case_tags(['unhashable'], 'b')
+def case_unhashable():
+    return 'unhashable', None, None
+
+
+def case_no_tag():
+    return 'no_tag', None, None
+
+
+def test_tags_list():
+    """ Tags are stored as a list, in order """
+    assert case_ab.__case_tags__ == ['a', 'b']
+    assert case_ab2.__case_tags__ == ['a', 'b']
+    assert case_unhashable.__case_tags__ == [['unhashable'], 'b']
+
+
+def get_selected_names(**kwargs):
+    return [str(c) for c in get_all_cases(module=sys.modules[__name__], **kwargs)]
+
+
+def test_has_tag():
+    assert get_selected_names(has_tag='a') == ['case_a', 'case_ab', 'case_ab2']
+    assert get_selected_names(has_tag='b') == ['case_ab', 'case_ab2', 'case_unhashable']
+    assert get_selected_names(has_tag=['unhashable']) == ['case_unhashable']
+    assert get_selected_names(has_tag='c') == []
+
+
+calls = []
+
+
+def has_b_only(tags):
+    assert isinstance(tags, list)
+    calls.append(tags)
+    return 'b' in tags and 'a' not in tags
+
+
+def test_filter():
+    assert get_selected_names(filter=has_b_only) == ['case_unhashable']
+    assert get_selected_names(has_tag='a', filter=lambda tags: 'b' in tags) == ['case_ab', 'case_ab2']
+
+    # the filter was called once per distinct list of tags: [a], [a, b], [], and the non-indexed case
+    assert len(calls) == 4
+
+    # and its results are remembered
+    assert get_selected_names(filter=has_b_only) == ['case_unhashable']
+    assert len(calls) == 4
+
+    catalog = _CATALOGS[__name__]
+    assert catalog.get_tag_bits('a') == sum(1 << i for i, (_, n, _) in enumerate(catalog.entries)
+                                            if n in ('case_a', 'case_ab', 'case_ab2'))
+    assert len(select_module_cases(sys.modules[__name__], filter=lambda tags: True)) == len(catalog.entries)
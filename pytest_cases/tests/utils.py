@@ -1,3 +1,6 @@
+import json
+
+
 def nb_pytest_parameters(f):
     try:
         # new pytest
@@ -14,3 +17,47 @@ def get_pytest_param(f, i):
     except AttributeError:
         # old pytest
         return f.parametrize.args[2*i:2*(i+1)]
+
+
+class FakeCache(object):
+    """ A dictionary-based replacement for the pytest cache """
+    def __init__(self):
+        self.data = dict()
+
+    def get(self, key, default):
+        return json.loads(self.data[key]) if key in self.data else default
+
+    def set(self, key, value):
+        self.data[key] = json.dumps(value)
+
+
+class FakeConfig(object):
+    """ A replacement for the pytest config, with all plugin options set to None """
+    def __init__(self, cache=None, workerinput=None):
+        self.cache = cache
+        if workerinput is not None:
+            self.workerinput = workerinput
+
+    def getoption(self, name):
+        return None
+
+
+class FakeItem(object):
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+
+
+class FakeCaseGetter(object):
+    """ A case getter without case function: the module is None in its case id """
+    def __init__(self, name):
+        self.f = None
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+def get_fake_case_getters(items):
+    """ Returns the case getters of the fake items, as in `plugin._CASE_GETTERS`: the case of 't.py::test[a]' is 'a' """
+    return dict((item.nodeid, [FakeCaseGetter(item.nodeid.split('[')[1][:-1])] if '[' in item.nodeid else [])
+                for item in items)
@@ -107,7 +107,7 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(exclude=['contrib', 'docs', 'tests']),
+    packages=find_packages(exclude=['contrib', 'docs', 'tests', 'benchmarks', 'benchmarks.*']),
 
     # Alternatively, if you want to distribute just a my_module.py, uncomment
     # this:
@@ -158,4 +158,10 @@ setup(
     #         'sample=sample:main',
     #     ],
     # },
+    # the pytest plugin
+    entry_points={
+        'pytest11': [
+            'pytest_cases = pytest_cases.plugin',
+        ],
+    },
 )